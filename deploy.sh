@@ -88,6 +88,8 @@ if command -v nvidia-smi &> /dev/null; then
     nvidia-smi --query-gpu=name,memory.total --format=csv,noheader,nounits
 else
     print_warning "No NVIDIA GPU detected. GPU acceleration will not be available."
+    print_status "CPU-only nodes can run gpt-oss-20b with 48GB RAM: python examples/local_deployment.py --cpu"
+    print_status "Its int8 mode leaves the MoE experts (most of gpt-oss) in bf16, so expect little gain over bf16"
 fi
 
 # Check for Ollama
@@ -155,6 +157,45 @@ GPT_OSS_20B_MODEL=gpt-oss-20b
 # Local Deployment
 OLLAMA_BASE_URL=http://localhost:11434/v1
 VLLM_BASE_URL=http://localhost:8000/v1
+# Comma-separated replicas for the backend router (default: the single URLs above)
+# OLLAMA_BASE_URLS=http://localhost:11434/v1,http://localhost:11435/v1
+# VLLM_BASE_URLS=http://localhost:8000/v1,http://localhost:8001/v1
+
+# HTTP Connection Pool
+HTTP_MAX_CONNECTIONS=100
+HTTP_MAX_KEEPALIVE_CONNECTIONS=20
+HTTP_KEEPALIVE_EXPIRY=30
+HTTP_CONNECT_TIMEOUT=5
+HTTP_READ_TIMEOUT=600
+
+# Response Cache (opt-in)
+# GPT_OSS_RESPONSE_CACHE=responses.sqlite
+# GPT_OSS_RESPONSE_CACHE_MAX_MB=256
+# GPT_OSS_RESPONSE_CACHE_TTL=86400
+# GPT_OSS_RESPONSE_CACHE_FORCE=0
+
+# Semantic Cache (opt-in, needs numpy)
+# GPT_OSS_SEMANTIC_CACHE=semantic_cache
+# GPT_OSS_SEMANTIC_CACHE_THRESHOLD=0.95
+# GPT_OSS_SEMANTIC_CACHE_SIZE=10000
+
+# Adaptive Concurrency Limiter (opt-in)
+# GPT_OSS_ADAPTIVE_LIMIT=1
+# GPT_OSS_LIMIT_INITIAL=4
+# GPT_OSS_LIMIT_MAX=64
+# GPT_OSS_RPM=600
+# GPT_OSS_TPM=200000
+
+# Request Metrics (opt-in)
+# GPT_OSS_METRICS=1
+# GPT_OSS_METRICS_PORT=9464
+# GPT_OSS_TRACE=requests.jsonl
+
+# Transformers Model Registry (opt-in background preload: model[@dtype[@device]],...)
+# GPT_OSS_PRELOAD=openai/gpt-oss-20b@auto@auto
+
+# CPU Inference (default: one thread per physical core)
+# GPT_OSS_CPU_THREADS=8
 
 # Environment
 REASONING_EFFORT=medium
@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""
+Adaptive Concurrency Limiter for GPT OSS
+AIMD concurrency control driven by 429s and latency, plus request and token budgets
+"""
+
+import argparse
+import asyncio
+import collections
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from quantiles import percentile
+
+
+class TokenBucket:
+    """Per-minute budget that callers may overdraw and then wait off
+
+    reserve() always succeeds and returns how long the caller must sleep
+    before its share of the budget exists, so waiters are served in the
+    order they reserved without any per-waiter bookkeeping.
+    """
+
+    def __init__(self, per_minute, burst=None):
+        self.rate = per_minute / 60.0
+        self.capacity = burst or per_minute
+        self.tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount):
+        """Take `amount` and return the seconds to wait until it is covered"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens -= amount
+            return max(0.0, -self.tokens / self.rate)
+
+    def refund(self, amount):
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+
+def estimate_tokens(request):
+    """Rough prompt + completion tokens for a request, before it is sent"""
+    chars = sum(len(message.get("content") or "") for message in request.get("messages", ())
+                if isinstance(message, dict))
+    completion = request.get("max_completion_tokens") or request.get("max_tokens") or 256
+    return chars // 4 + completion
+
+
+class AdaptiveLimiter:
+    """Shared concurrency limit for chat.completions.create
+
+    The limit grows by `increase / limit` after each healthy response, so
+    roughly by `increase` per round trip, and is multiplied by `backoff`
+    when the server answers 429 or when latency per completion token
+    climbs above `latency_tolerance` times its long-run average. A 429
+    also stops new requests until its Retry-After has passed. Requests
+    over the limit queue in arrival order; with `rpm` or `tpm` set they
+    additionally wait on per-minute request and token budgets, and the
+    token budget is settled against response.usage afterwards.
+    """
+
+    def __init__(self, initial=4, min_limit=1, max_limit=64, increase=1.0, backoff=0.5,
+                 latency_tolerance=2.0, rpm=None, tpm=None, window=1000):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+
+        self._cond = threading.Condition()
+        self._async_waiters = set()
+        self._in_flight = 0
+        self._waiting = 0
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._baseline = None
+        self._waits = collections.deque(maxlen=window)
+        self.stats = {
+            "requests": 0,
+            "throttled": 0,
+            "increases": 0,
+            "decreases": 0,
+            "max_queue_depth": 0,
+        }
+
+    def acquire(self, estimated_tokens=0):
+        """Block until a slot and the budgets allow one more request"""
+        start = time.perf_counter()
+        with self._cond:
+            self._waiting += 1
+            self.stats["max_queue_depth"] = max(self.stats["max_queue_depth"], self._waiting)
+            while True:
+                pause = self._paused_until - time.monotonic()
+                if pause <= 0 and self._in_flight < int(self.limit):
+                    break
+                self._cond.wait(pause if pause > 0 else None)
+            self._waiting -= 1
+            self._in_flight += 1
+            self.stats["requests"] += 1
+
+        delay = self._budget_delay(estimated_tokens)
+        if delay:
+            time.sleep(delay)
+        self._waits.append(time.perf_counter() - start)
+
+    def _budget_delay(self, estimated_tokens):
+        """Reserve one request and `estimated_tokens` tokens; returns how long to wait for them"""
+        delay = 0.0
+        if self.requests is not None:
+            delay = self.requests.reserve(1)
+        if self.tokens is not None:
+            delay = max(delay, self.tokens.reserve(estimated_tokens))
+        return delay
+
+    def release(self, latency, error=None, usage=None, estimated_tokens=0):
+        """Return the slot and adjust the limit from how the request went"""
+        if self.tokens is not None and usage is not None:
+            overestimate = estimated_tokens - usage.total_tokens
+            if overestimate > 0:
+                self.tokens.refund(overestimate)
+            else:
+                self.tokens.reserve(-overestimate)
+
+        with self._cond:
+            self._in_flight -= 1
+            now = time.monotonic()
+            if error is not None and _is_rate_limit(error):
+                self.stats["throttled"] += 1
+                self._decrease(now, latency)
+                self._paused_until = max(self._paused_until, now + (_retry_after(error) or 0.0))
+            elif error is None:
+                tokens = usage.completion_tokens if usage is not None else 0
+                sample = latency / max(1, tokens)
+                if self._baseline is None:
+                    self._baseline = sample
+                if sample > self._baseline * self.latency_tolerance:
+                    self._decrease(now, latency)
+                else:
+                    self._baseline = 0.95 * self._baseline + 0.05 * sample
+                    if self.limit < self.max_limit:
+                        self.limit = min(self.max_limit, self.limit + self.increase / self.limit)
+                        self.stats["increases"] += 1
+            self._cond.notify_all()
+            for woken in self._async_waiters:
+                woken.get_loop().call_soon_threadsafe(_wake, woken)
+
+    def _decrease(self, now, latency):
+        # One cut per round trip: responses already in flight reflect the old limit
+        if now - self._last_decrease < latency:
+            return
+        self._last_decrease = now
+        limit = max(self.min_limit, self.limit * self.backoff)
+        if limit < self.limit:
+            self.limit = limit
+            self.stats["decreases"] += 1
+
+    async def acquire_async(self, estimated_tokens=0):
+        """acquire() for asyncio callers: waits on the event loop instead of blocking it
+
+        Shares slots and budgets with acquire(); release() wakes both kinds
+        of waiter. No executor thread is held while waiting, so a long
+        queue cannot starve the loop's default executor.
+        """
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        with self._cond:
+            self._waiting += 1
+            self.stats["max_queue_depth"] = max(self.stats["max_queue_depth"], self._waiting)
+        try:
+            while True:
+                with self._cond:
+                    pause = self._paused_until - time.monotonic()
+                    if pause <= 0 and self._in_flight < int(self.limit):
+                        self._in_flight += 1
+                        self.stats["requests"] += 1
+                        break
+                    woken = loop.create_future()
+                    self._async_waiters.add(woken)
+                try:
+                    await asyncio.wait_for(woken, pause if pause > 0 else None)
+                except asyncio.TimeoutError:
+                    pass
+                finally:
+                    with self._cond:
+                        self._async_waiters.discard(woken)
+        finally:
+            with self._cond:
+                self._waiting -= 1
+
+        try:
+            delay = self._budget_delay(estimated_tokens)
+            if delay:
+                await asyncio.sleep(delay)
+        except asyncio.CancelledError as e:
+            self.release(0.0, error=e)
+            raise
+        self._waits.append(time.perf_counter() - start)
+
+    def wrap(self, create, retries=2):
+        """Wrap a chat.completions.create callable with this limiter
+
+        A 429 is retried up to `retries` times, each retry queueing for a
+        slot again so it waits out the Retry-After pause. Build the client
+        with max_retries=0 so throttling reaches the limiter at all.
+        """
+
+        def limited_create(**request):
+            estimated = estimate_tokens(request)
+            for attempt in range(retries + 1):
+                self.acquire(estimated)
+                start = time.perf_counter()
+                try:
+                    response = create(**request)
+                except Exception as e:
+                    self.release(time.perf_counter() - start, error=e)
+                    if attempt < retries and _is_rate_limit(e):
+                        continue
+                    raise
+                if request.get("stream"):
+                    return self._track_stream(response, start)
+                self.release(time.perf_counter() - start, usage=getattr(response, "usage", None),
+                             estimated_tokens=estimated)
+                return response
+
+        return limited_create
+
+    def wrap_async(self, create, retries=2):
+        """wrap() for an AsyncOpenAI chat.completions.create"""
+
+        async def limited_create(**request):
+            estimated = estimate_tokens(request)
+            for attempt in range(retries + 1):
+                await self.acquire_async(estimated)
+                start = time.perf_counter()
+                try:
+                    response = await create(**request)
+                except BaseException as e:
+                    self.release(time.perf_counter() - start, error=e)
+                    if attempt < retries and _is_rate_limit(e):
+                        continue
+                    raise
+                if request.get("stream"):
+                    return self._track_async_stream(response, start)
+                self.release(time.perf_counter() - start, usage=getattr(response, "usage", None),
+                             estimated_tokens=estimated)
+                return response
+
+        return limited_create
+
+    def _track_stream(self, stream, start):
+        error = None
+        try:
+            yield from stream
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self.release(time.perf_counter() - start, error=error)
+
+    async def _track_async_stream(self, stream, start):
+        error = None
+        try:
+            async for chunk in stream:
+                yield chunk
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self.release(time.perf_counter() - start, error=error)
+
+    def metrics(self):
+        """Current limit, in-flight and queued requests, and queue wait"""
+        waits = list(self._waits)
+        with self._cond:
+            metrics = dict(self.stats, limit=self.limit, in_flight=self._in_flight,
+                           queue_depth=self._waiting,
+                           paused_for_s=max(0.0, self._paused_until - time.monotonic()))
+        metrics["queue_wait_p50_ms"] = percentile(waits, 50) * 1000
+        metrics["queue_wait_p95_ms"] = percentile(waits, 95) * 1000
+        return metrics
+
+    def report(self):
+        m = self.metrics()
+        return (f"[limit {m['limit']:.1f} | in flight {m['in_flight']} | queued {m['queue_depth']} "
+                f"(max {m['max_queue_depth']}) | queue wait p50 {m['queue_wait_p50_ms']:.0f}ms "
+                f"p95 {m['queue_wait_p95_ms']:.0f}ms | {m['throttled']} throttled, "
+                f"{m['increases']} increases, {m['decreases']} decreases]")
+
+
+def _wake(future):
+    if not future.done():
+        future.set_result(None)
+
+
+def _is_rate_limit(error):
+    import openai
+    return isinstance(error, openai.RateLimitError)
+
+
+def _retry_after(error):
+    try:
+        return float(error.response.headers.get("retry-after"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def limiter_from_env():
+    """The process-wide limiter configured by GPT_OSS_ADAPTIVE_LIMIT, or None
+
+    GPT_OSS_ADAPTIVE_LIMIT       1 to enable the limiter
+    GPT_OSS_LIMIT_INITIAL        starting concurrency (default 4)
+    GPT_OSS_LIMIT_MAX            concurrency ceiling (default 64)
+    GPT_OSS_RPM                  requests per minute budget (default: none)
+    GPT_OSS_TPM                  tokens per minute budget (default: none)
+    """
+    global _shared
+    if os.getenv("GPT_OSS_ADAPTIVE_LIMIT", "").lower() not in ("1", "true", "yes"):
+        return None
+    with _shared_lock:
+        if _shared is None:
+            rpm = os.getenv("GPT_OSS_RPM")
+            tpm = os.getenv("GPT_OSS_TPM")
+            _shared = AdaptiveLimiter(
+                initial=int(os.getenv("GPT_OSS_LIMIT_INITIAL", "4")),
+                max_limit=int(os.getenv("GPT_OSS_LIMIT_MAX", "64")),
+                rpm=float(rpm) if rpm else None,
+                tpm=float(tpm) if tpm else None,
+            )
+        return _shared
+
+
+def benchmark(requests=300, workers=32, capacity=12):
+    """Fixed concurrency versus the adaptive limiter on a server with `capacity` slots"""
+    import openai
+    from mock_server import MockConfig, start_mock_server
+    server = start_mock_server(MockConfig(ttft=0.02, token_delay=0.002, completion_tokens=16,
+                                          capacity=capacity, retry_after=0.05))
+    # Throttling must reach the limiter instead of being absorbed by SDK retries
+    client = openai.OpenAI(base_url=server.base_url, api_key="mock", max_retries=0)
+
+    print(f"=== {requests} requests from {workers} threads, server capacity {capacity} ===")
+    for label, limit in [("fixed 4", 4), ("fixed 32", 32), ("adaptive", None)]:
+        if limit is None:
+            limiter = AdaptiveLimiter(initial=4, max_limit=workers)
+        else:
+            limiter = AdaptiveLimiter(initial=limit, min_limit=limit, max_limit=limit)
+        create = limiter.wrap(client.chat.completions.create)
+
+        def one(i):
+            for _ in range(20):
+                try:
+                    create(model="gpt-oss-20b", max_tokens=16,
+                           messages=[{"role": "user", "content": f"request {i}"}])
+                    return True
+                except openai.RateLimitError:
+                    continue
+            return False
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            ok = sum(pool.map(one, range(requests)))
+        elapsed = time.perf_counter() - start
+        print(f"{label:<10} {ok / elapsed:6.1f} req/s  {ok}/{requests} ok  {limiter.report()}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Adaptive limiter benchmark on the mock server")
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--capacity", type=int, default=12)
+    args = parser.parse_args()
+
+    benchmark(args.requests, args.workers, args.capacity)
@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+Backend Router for GPT OSS
+Spreads requests over several OpenAI-compatible replicas with health checks and outlier ejection
+"""
+
+import argparse
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from client_pool import get_client
+
+POLICIES = ("least_outstanding", "ewma")
+
+
+def _is_backend_error(error):
+    """Failures that say the replica, not the request, is at fault"""
+    import openai
+    return isinstance(error, (openai.APIConnectionError, openai.InternalServerError))
+
+
+@dataclass
+class Endpoint:
+    """One replica serving a model, with its live routing state"""
+
+    url: str
+    api_key: str = None
+    model: str = None
+    outstanding: int = 0
+    ewma: float = None
+    healthy: bool = True
+    ejected_until: float = 0.0
+    consecutive_failures: int = 0
+    ejections: int = 0
+    routed: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    probes_failed: int = 0
+
+    @property
+    def client(self):
+        return get_client(base_url=self.url, api_key=self.api_key)
+
+    def available(self, now):
+        return self.healthy and now >= self.ejected_until
+
+    def score(self, policy):
+        """Lower is better; unmeasured replicas are tried first"""
+        if policy == "ewma":
+            # Peak-EWMA: expected latency scaled by the queue already waiting on it
+            return ((self.ewma or 0.0) * (self.outstanding + 1), self.outstanding)
+        return (self.outstanding, self.ewma or 0.0)
+
+
+def _parse_endpoint(spec, api_key):
+    """Accept "url", "url#model" or an Endpoint"""
+    if isinstance(spec, Endpoint):
+        return spec
+    url, _, model = spec.partition("#")
+    return Endpoint(url=url.rstrip("/"), api_key=api_key, model=model or None)
+
+
+class _TrackedStream:
+    """A routed stream that gives its replica slot back exactly once
+
+    The slot is released when the stream is exhausted, raises, is closed,
+    or is garbage collected, so a stream the caller never iterates cannot
+    leave the replica's outstanding count raised for good.
+    """
+
+    def __init__(self, stream, release):
+        self._stream = stream
+        self._iterator = None
+        self._release = release
+        self._released = False
+
+    def _finish(self, finished, error=None):
+        if not self._released:
+            self._released = True
+            self._release(finished, error)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._iterator is None:
+            self._iterator = iter(self._stream)
+        try:
+            return next(self._iterator)
+        except StopIteration:
+            self._finish(True)
+            raise
+        except Exception as e:
+            self._finish(True, e)
+            raise
+
+    def close(self):
+        try:
+            close = getattr(self._stream, "close", None)
+            if close is not None:
+                close()
+        finally:
+            self._finish(False)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __del__(self):
+        if not getattr(self, "_released", True):
+            self.close()
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+class BackendRouter:
+    """Client-side load balancer over replicas of each model
+
+    `backends` maps the model name callers use to a list of endpoint
+    specs. Each request goes to the available replica with the fewest
+    in-flight requests ("least_outstanding") or the lowest latency EWMA
+    weighted by in-flight requests ("ewma"). A background thread probes
+    every replica's /models; replicas that fail the probe, or return
+    `eject_after` consecutive connection errors or 5xx responses, stop
+    receiving traffic for `eject_for` seconds (doubling on each repeat,
+    up to `max_eject_for`). If every replica of a model is out, traffic
+    is spread over all of them rather than failing outright. A request
+    that fails with a connection error or 5xx is retried on up to
+    `failover` other replicas before the error reaches the caller.
+
+    Use it like an OpenAI client: router.chat.completions.create(...).
+    """
+
+    def __init__(self, backends, api_key=None, policy="least_outstanding", health_interval=5.0,
+                 health_timeout=1.0, eject_after=3, eject_for=10.0, max_eject_for=120.0,
+                 ewma_alpha=0.3, failover=1):
+        if policy not in POLICIES:
+            raise ValueError(f"policy must be one of {POLICIES}")
+        api_key = api_key or os.getenv("OPENAI_API_KEY") or "none"
+        self.backends = {
+            model: [_parse_endpoint(spec, api_key) for spec in specs]
+            for model, specs in backends.items()
+        }
+        self.policy = policy
+        self.health_interval = health_interval
+        self.health_timeout = health_timeout
+        self.eject_after = eject_after
+        self.eject_for = eject_for
+        self.max_eject_for = max_eject_for
+        self.ewma_alpha = ewma_alpha
+        self.failover = failover
+        self.stats = {"decisions": 0, "failovers": 0, "fallbacks": 0, "unknown_model": 0}
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._health_thread = None
+        if health_interval:
+            self._health_thread = threading.Thread(
+                target=self._health_loop, name="backend-router-health", daemon=True)
+            self._health_thread.start()
+
+        self.chat = self.completions = self
+
+    def endpoints(self):
+        return [endpoint for endpoints in self.backends.values() for endpoint in endpoints]
+
+    def pick(self, model, exclude=()):
+        """Choose a replica for `model` and count the request against it"""
+        endpoints = self.backends.get(model)
+        if not endpoints:
+            with self._lock:
+                self.stats["unknown_model"] += 1
+            raise KeyError(f"no backends configured for model {model!r}")
+        now = time.monotonic()
+        with self._lock:
+            self.stats["decisions"] += 1
+            untried = [endpoint for endpoint in endpoints if id(endpoint) not in exclude] or endpoints
+            candidates = [endpoint for endpoint in untried if endpoint.available(now)]
+            if not candidates:
+                self.stats["fallbacks"] += 1
+                candidates = untried
+            endpoint = min(candidates, key=lambda endpoint: endpoint.score(self.policy))
+            endpoint.outstanding += 1
+            endpoint.routed += 1
+        return endpoint
+
+    def _release(self, endpoint, latency=None, error=None):
+        with self._lock:
+            endpoint.outstanding -= 1
+            if error is None:
+                endpoint.succeeded += 1
+                endpoint.consecutive_failures = 0
+                if latency is not None:
+                    endpoint.ewma = latency if endpoint.ewma is None else (
+                        self.ewma_alpha * latency + (1 - self.ewma_alpha) * endpoint.ewma)
+                return
+            endpoint.failed += 1
+            # Requests already in flight when a replica is ejected must not extend the ejection
+            if _is_backend_error(error) and time.monotonic() >= endpoint.ejected_until:
+                endpoint.consecutive_failures += 1
+                if endpoint.consecutive_failures >= self.eject_after:
+                    self._eject(endpoint)
+
+    def _eject(self, endpoint):
+        duration = min(self.eject_for * 2 ** endpoint.ejections, self.max_eject_for)
+        endpoint.ejected_until = time.monotonic() + duration
+        endpoint.ejections += 1
+        endpoint.consecutive_failures = 0
+
+    def create(self, model, **request):
+        """Route one chat completion; streams are tracked until fully consumed"""
+        tried = set()
+        while True:
+            endpoint = self.pick(model, exclude=tried)
+            tried.add(id(endpoint))
+            start = time.perf_counter()
+            try:
+                response = endpoint.client.chat.completions.create(
+                    model=endpoint.model or model, **request)
+                break
+            except Exception as e:
+                self._release(endpoint, error=e)
+                if not _is_backend_error(e) or len(tried) > self.failover:
+                    raise
+                with self._lock:
+                    self.stats["failovers"] += 1
+        if request.get("stream"):
+            return self._track_stream(endpoint, response, start)
+        self._release(endpoint, latency=time.perf_counter() - start)
+        return response
+
+    def _track_stream(self, endpoint, stream, start):
+        def release(finished, error):
+            # A stream abandoned part-way says nothing about the replica's latency
+            latency = time.perf_counter() - start if finished else None
+            self._release(endpoint, latency=latency, error=error)
+
+        return _TrackedStream(stream, release)
+
+    def probe(self, endpoint, http):
+        """Mark a replica healthy or not from one GET /models"""
+        try:
+            healthy = http.get(f"{endpoint.url}/models").status_code < 500
+        except Exception:
+            healthy = False
+        with self._lock:
+            if not healthy:
+                endpoint.probes_failed += 1
+            elif not endpoint.healthy:
+                # Back from an outage: start with a clean slate
+                endpoint.ejected_until = 0.0
+                endpoint.ejections = 0
+            endpoint.healthy = healthy
+        return healthy
+
+    def check_health(self):
+        """Probe every replica once"""
+        import httpx
+        with httpx.Client(timeout=self.health_timeout) as http:
+            for endpoint in self.endpoints():
+                self.probe(endpoint, http)
+
+    def _health_loop(self):
+        while not self._stop.is_set():
+            self.check_health()
+            self._stop.wait(self.health_interval)
+
+    def metrics(self):
+        """Routing counters plus the state of every replica"""
+        now = time.monotonic()
+        with self._lock:
+            replicas = [
+                {
+                    "model": model,
+                    "backend": endpoint.url,
+                    "available": endpoint.available(now),
+                    "healthy": endpoint.healthy,
+                    "ejected_for_s": max(0.0, endpoint.ejected_until - now),
+                    "outstanding": endpoint.outstanding,
+                    "ewma_ms": None if endpoint.ewma is None else endpoint.ewma * 1000,
+                    "routed": endpoint.routed,
+                    "succeeded": endpoint.succeeded,
+                    "failed": endpoint.failed,
+                    "ejections": endpoint.ejections,
+                    "probes_failed": endpoint.probes_failed,
+                }
+                for model, endpoints in self.backends.items()
+                for endpoint in endpoints
+            ]
+            return dict(self.stats, policy=self.policy, backends=replicas)
+
+    def report(self):
+        metrics = self.metrics()
+        lines = [f"policy={metrics['policy']} decisions={metrics['decisions']} "
+                 f"failovers={metrics['failovers']} fallbacks={metrics['fallbacks']}"]
+        for replica in metrics["backends"]:
+            ewma = "-" if replica["ewma_ms"] is None else f"{replica['ewma_ms']:.0f}ms"
+            state = "up" if replica["available"] else (
+                "down" if not replica["healthy"] else f"ejected {replica['ejected_for_s']:.0f}s")
+            lines.append(
+                f"  {replica['model']:<14} {replica['backend']:<32} {state:<12} "
+                f"routed={replica['routed']:<4} ok={replica['succeeded']:<4} "
+                f"failed={replica['failed']:<3} ejections={replica['ejections']} ewma={ewma}")
+        return "\n".join(lines)
+
+    def close(self):
+        self._stop.set()
+        if self._health_thread is not None:
+            self._health_thread.join(self.health_timeout + 1)
+
+
+def _urls(name, fallback, default):
+    value = os.getenv(name) or os.getenv(fallback) or default
+    return [url.strip() for url in value.split(",") if url.strip()]
+
+
+def router_from_env(**kwargs):
+    """Router over the replicas listed in OLLAMA_BASE_URLS / VLLM_BASE_URLS
+
+    Both are comma-separated; the single-URL OLLAMA_BASE_URL and
+    VLLM_BASE_URL (or the localhost defaults) are used when the lists
+    are not set. Callers use the model name "gpt-oss-20b" and each
+    replica is sent its own server's name for it.
+    """
+    ollama = _urls("OLLAMA_BASE_URLS", "OLLAMA_BASE_URL", "http://localhost:11434/v1")
+    vllm = _urls("VLLM_BASE_URLS", "VLLM_BASE_URL", "http://localhost:8000/v1")
+    specs = [f"{url}#gpt-oss:20b" for url in ollama] + [f"{url}#openai/gpt-oss-20b" for url in vllm]
+    return BackendRouter({"gpt-oss-20b": specs}, **kwargs)
+
+
+def demo(policy, requests=60, concurrency=8):
+    """Route traffic over a fast, a slow and a failing mock replica"""
+    import openai
+    from mock_server import MockConfig, start_mock_server
+    fast = start_mock_server(MockConfig(ttft=0.02, token_delay=0.001, completion_tokens=16))
+    slow = start_mock_server(MockConfig(ttft=0.15, token_delay=0.004, completion_tokens=16))
+    flaky = start_mock_server(MockConfig(ttft=0.02, token_delay=0.001, completion_tokens=16,
+                                         error_rate=1.0))
+    router = BackendRouter(
+        {"gpt-oss-20b": [fast.base_url, slow.base_url, flaky.base_url]},
+        api_key="mock", policy=policy, health_interval=1.0, eject_after=1)
+
+    def one(i):
+        try:
+            router.chat.completions.create(
+                model="gpt-oss-20b",
+                messages=[{"role": "user", "content": f"request {i}"}],
+                max_tokens=16,
+            )
+            return True
+        except openai.OpenAIError:
+            return False
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        ok = sum(pool.map(one, range(requests)))
+    elapsed = time.perf_counter() - start
+
+    print(f"=== {policy}: {ok}/{requests} ok in {elapsed:.2f}s ===")
+    print(router.report())
+    print()
+    router.close()
+    for server in (fast, slow, flaky):
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Multi-backend router demo on mock replicas")
+    parser.add_argument("--requests", type=int, default=60)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    for policy in POLICIES:
+        demo(policy, args.requests, args.concurrency)
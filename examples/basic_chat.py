@@ -4,16 +4,22 @@ Basic Chat Example for GPT OSS
 Simple examples of using gpt-oss-120b and gpt-oss-20b
 """
 
+import argparse
 import os
-from openai import OpenAI
+from client_pool import get_client, print_env_report
+from conversation import Conversation
+from fan_out import run_fan_out
+from request_executor import RequestExecutor
+from streaming import add_stream_flag, print_completion, set_streaming
 
 def basic_chat_example():
     """Basic chat completion with gpt-oss-120b"""
     print("=== Basic Chat with gpt-oss-120b ===")
     
-    client = OpenAI()
+    client = get_client()
     
-    response = client.chat.completions.create(
+    print_completion(
+        client,
         model="gpt-oss-120b",
         messages=[
             {"role": "user", "content": "Explain quantum computing in simple terms."}
@@ -21,40 +27,92 @@ def basic_chat_example():
         max_tokens=200,
         temperature=0.7
     )
-    
-    print(response.choices[0].message.content)
     print()
 
 def compare_models():
     """Compare responses between gpt-oss-120b and gpt-oss-20b"""
     print("=== Comparing gpt-oss-120b vs gpt-oss-20b ===")
     
-    client = OpenAI()
+    client = get_client()
     question = "What are the three laws of robotics?"
     
     # Test with gpt-oss-120b
-    response_120b = client.chat.completions.create(
+    print("gpt-oss-120b response:")
+    print_completion(
+        client,
         model="gpt-oss-120b",
         messages=[{"role": "user", "content": question}],
         max_tokens=150,
         temperature=0.7
     )
+    print()
     
     # Test with gpt-oss-20b
-    response_20b = client.chat.completions.create(
+    print("gpt-oss-20b response:")
+    print_completion(
+        client,
         model="gpt-oss-20b",
         messages=[{"role": "user", "content": question}],
         max_tokens=150,
         temperature=0.7
     )
+
+def compare_models_concurrent(max_concurrency=2):
+    """Compare gpt-oss-120b and gpt-oss-20b with both requests in flight at once"""
+    print("=== Comparing gpt-oss-120b vs gpt-oss-20b (concurrent) ===")
     
-    print("gpt-oss-120b response:")
-    print(response_120b.choices[0].message.content)
-    print()
-    print("gpt-oss-20b response:")
-    print(response_20b.choices[0].message.content)
+    question = "What are the three laws of robotics?"
+    requests = [
+        (model, {
+            "model": model,
+            "messages": [{"role": "user", "content": question}],
+            "max_tokens": 150,
+            "temperature": 0.7,
+        })
+        for model in ["gpt-oss-120b", "gpt-oss-20b"]
+    ]
+    
+    # Retry transient failures (429s, 5xx, dropped connections) within a per-request deadline
+    executor = RequestExecutor(deadline=120.0)
+    run = run_fan_out(requests, max_concurrency=max_concurrency, executor=executor)
+    
+    for result in run.results:
+        print(f"{result.label} response:")
+        print(result.content if result.error is None else f"Error: {result.error}")
+        print()
+    print("Latency:")
+    run.report()
+
+def multi_turn_chat_example():
+    """Multi-turn chat that stays inside a token budget"""
+    print("\n=== Multi-Turn Chat with a Token Budget ===")
+    
+    client = get_client()
+    conversation = Conversation(
+        system="You are a concise assistant.",
+        context_limit=8192,
+        max_tokens=150
+    )
+    
+    for question in [
+        "Explain quantum computing in simple terms.",
+        "How is a qubit different from a classical bit?",
+        "Summarize our discussion in one sentence."
+    ]:
+        print(f"User: {question}")
+        reply = conversation.ask(client, question, model="gpt-oss-20b", temperature=0.7)
+        print(f"Assistant: {reply}")
+        print(f"[{conversation.turn_prompt_tokens[-1]} prompt tokens this turn]")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="GPT OSS Basic Chat Examples")
+    parser.add_argument("--concurrent", action="store_true",
+                        help="run the model comparison with concurrent async requests")
+    add_stream_flag(parser)
+    args = parser.parse_args()
+    if args.stream:
+        set_streaming(True)
+    
     if not os.getenv("OPENAI_API_KEY"):
         print("Error: Please set your OPENAI_API_KEY environment variable")
         print("You can set it with: export OPENAI_API_KEY='your-api-key-here'")
@@ -66,7 +124,13 @@ if __name__ == "__main__":
     
     try:
         basic_chat_example()
-        compare_models()
+        if args.concurrent:
+            compare_models_concurrent()
+        else:
+            compare_models()
+        multi_turn_chat_example()
     except Exception as e:
         print(f"Error: {e}")
-        print("Make sure you have access to the gpt-oss models and your API key is valid.") 
\ No newline at end of file
+        print("Make sure you have access to the gpt-oss models and your API key is valid.") 
+    finally:
+        print_env_report()
\ No newline at end of file
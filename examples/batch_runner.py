@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Batch Runner for GPT OSS
+Streams prompts from a JSONL file through bounded async concurrency, resumably
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from dataclasses import asdict, dataclass
+
+from client_pool import close_async_clients, print_env_report
+from request_executor import Backend, RequestExecutor
+
+
+@dataclass
+class Checkpoint:
+    """Where a run can safely resume
+
+    Every input line before `input_offset` (line number `input_line`) has
+    its result in the first `output_offset` bytes of the output. `done`
+    lists the lines after that watermark that are also in those bytes.
+    """
+
+    input_offset: int = 0
+    input_line: int = 0
+    output_offset: int = 0
+    done: list = None
+
+    @classmethod
+    def load(cls, path):
+        try:
+            with open(path) as f:
+                return cls(**json.load(f))
+        except FileNotFoundError:
+            return cls(done=[])
+
+    def save(self, path):
+        temporary = f"{path}.tmp"
+        with open(temporary, "w") as f:
+            json.dump(asdict(self), f)
+        os.replace(temporary, path)
+
+
+def build_request(row, defaults):
+    """Turn one input row into chat.completions.create kwargs
+
+    Rows carry either `messages` or a `prompt` (with an optional
+    `system`); any other key except `id` overrides the defaults.
+    """
+    request = dict(defaults)
+    request.update({key: value for key, value in row.items()
+                    if key not in ("id", "prompt", "system")})
+    if "messages" not in request:
+        messages = [{"role": "system", "content": row["system"]}] if row.get("system") else []
+        messages.append({"role": "user", "content": row["prompt"]})
+        request["messages"] = messages
+    return request
+
+
+class BatchRunner:
+    """Runs every row of an input JSONL and appends one result line per row
+
+    At most `concurrency` requests are in flight and at most `window`
+    rows are read ahead of the oldest unfinished one, so memory stays flat
+    however large the input is. Results are written in completion order,
+    each tagged with the row's `id` (or its line number) so they can be
+    re-ordered later. A checkpoint is saved every `checkpoint_every`
+    results; after a crash the output is truncated to the checkpoint and
+    reading resumes at its watermark, skipping rows already written.
+    """
+
+    def __init__(self, input_path, output_path, concurrency=16, window=None,
+                 checkpoint_every=100, executor=None, defaults=None):
+        self.input_path = input_path
+        self.output_path = output_path
+        self.checkpoint_path = f"{output_path}.checkpoint"
+        self.concurrency = concurrency
+        self.window = window or concurrency * 8
+        self.checkpoint_every = checkpoint_every
+        self.executor = executor or RequestExecutor()
+        self.defaults = defaults or {}
+        self.stats = {"completed": 0, "failed": 0, "skipped": 0, "checkpoints": 0}
+
+    def _rows(self, f, line):
+        """Yield (line, start, end, raw) from the current input position"""
+        while True:
+            start = f.tell()
+            raw = f.readline()
+            if not raw:
+                return
+            line += 1
+            if raw.strip():
+                yield line, start, f.tell(), raw
+
+    async def _process(self, line, raw):
+        start = time.perf_counter()
+        try:
+            row = json.loads(raw)
+        except json.JSONDecodeError as e:
+            return {"id": line, "line": line, "error": f"invalid JSON: {e}"}
+        if not isinstance(row, dict):
+            return {"id": line, "line": line, "error": f"expected a JSON object, got {type(row).__name__}"}
+        row_id = row.get("id", line)
+        try:
+            response = await self.executor.create(**build_request(row, self.defaults))
+        except Exception as e:
+            return {"id": row_id, "line": line, "error": f"{type(e).__name__}: {e}",
+                    "latency": time.perf_counter() - start}
+        usage = response.usage
+        return {
+            "id": row_id,
+            "line": line,
+            "content": response.choices[0].message.content,
+            "finish_reason": response.choices[0].finish_reason,
+            "usage": usage.model_dump() if usage is not None else None,
+            "latency": time.perf_counter() - start,
+        }
+
+    async def run(self, progress=None):
+        checkpoint = Checkpoint.load(self.checkpoint_path)
+        already_done = set(checkpoint.done or ())
+        self.stats["skipped"] = checkpoint.input_line + len(already_done)
+
+        # Anything written after the last checkpoint is redone rather than duplicated
+        mode = "r+b" if os.path.exists(self.output_path) else "w+b"
+        with open(self.input_path, "rb") as source, open(self.output_path, mode) as out:
+            out.truncate(checkpoint.output_offset)
+            out.seek(checkpoint.output_offset)
+            source.seek(checkpoint.input_offset)
+
+            watermark_line = checkpoint.input_line
+            watermark_offset = checkpoint.input_offset
+            # line -> end offset, for rows read but not yet below the watermark
+            open_rows = {}
+            finished = set(already_done)
+            since_checkpoint = 0
+            room = asyncio.Condition()
+            semaphore = asyncio.Semaphore(self.concurrency)
+            tasks = set()
+
+            def advance_watermark():
+                nonlocal watermark_line, watermark_offset
+                # Blank lines never enter open_rows and are passed over like finished ones
+                while watermark_line + 1 < next_line:
+                    line = watermark_line + 1
+                    if line in open_rows and line not in finished:
+                        break
+                    watermark_line = line
+                    finished.discard(line)
+                    end = open_rows.pop(line, None)
+                    if end is not None:
+                        watermark_offset = end
+
+            def save_checkpoint():
+                out.flush()
+                os.fsync(out.fileno())
+                Checkpoint(watermark_offset, watermark_line, out.tell(), sorted(finished)).save(
+                    self.checkpoint_path)
+                self.stats["checkpoints"] += 1
+
+            async def handle(line, raw):
+                nonlocal since_checkpoint
+                try:
+                    result = await self._process(line, raw)
+                finally:
+                    semaphore.release()
+                out.write(json.dumps(result, default=str).encode() + b"\n")
+                self.stats["failed" if "error" in result else "completed"] += 1
+                finished.add(line)
+                advance_watermark()
+                since_checkpoint += 1
+                if since_checkpoint >= self.checkpoint_every:
+                    since_checkpoint = 0
+                    save_checkpoint()
+                    if progress:
+                        progress(self.stats)
+                async with room:
+                    room.notify_all()
+
+            next_line = watermark_line + 1
+            for line, _, end, raw in self._rows(source, watermark_line):
+                open_rows[line] = end
+                next_line = line + 1
+                if line in already_done:
+                    advance_watermark()
+                    continue
+                async with room:
+                    await room.wait_for(lambda: line - watermark_line <= self.window)
+                await semaphore.acquire()
+                task = asyncio.create_task(handle(line, raw))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*list(tasks))
+            advance_watermark()
+            save_checkpoint()
+        return self.stats
+
+    def run_sync(self, progress=None):
+        async def _main():
+            try:
+                return await self.run(progress)
+            finally:
+                await close_async_clients()
+
+        return asyncio.run(_main())
+
+
+def write_sample_input(path, rows):
+    """Write `rows` synthetic prompts, for trying the runner out"""
+    with open(path, "w") as f:
+        for i in range(rows):
+            f.write(json.dumps({"id": f"q{i}", "prompt": f"Question {i}: explain item {i} briefly."}) + "\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a JSONL file of prompts through GPT OSS")
+    parser.add_argument("input", help="JSONL with one {'prompt': ...} or {'messages': [...]} per line")
+    parser.add_argument("output", help="results JSONL, appended in completion order")
+    parser.add_argument("--model", default="gpt-oss-20b")
+    parser.add_argument("--max-tokens", type=int, default=256)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--checkpoint-every", type=int, default=100)
+    parser.add_argument("--deadline", type=float, default=120.0, help="seconds per request, retries included")
+    parser.add_argument("--sample", type=int, default=0, help="first write this many sample prompts to INPUT")
+    parser.add_argument("--mock", action="store_true", help="run against an in-process mock server")
+    args = parser.parse_args()
+
+    if args.sample:
+        write_sample_input(args.input, args.sample)
+
+    backend = Backend()
+    if args.mock:
+        from mock_server import MockConfig, start_mock_server
+        server = start_mock_server(MockConfig(ttft=0.02, token_delay=0.001, completion_tokens=16))
+        backend = Backend(server.base_url, "mock")
+    elif not os.getenv("OPENAI_API_KEY"):
+        print("Error: Please set your OPENAI_API_KEY environment variable")
+        sys.exit(1)
+
+    runner = BatchRunner(
+        args.input, args.output,
+        concurrency=args.concurrency,
+        checkpoint_every=args.checkpoint_every,
+        executor=RequestExecutor([backend], deadline=args.deadline),
+        defaults={"model": args.model, "max_tokens": args.max_tokens},
+    )
+    start = time.perf_counter()
+    stats = runner.run_sync(progress=lambda stats: print(
+        f"\r{stats['completed'] + stats['failed']} done, {stats['failed']} failed",
+        end="", flush=True))
+    elapsed = time.perf_counter() - start
+    done = stats["completed"] + stats["failed"]
+    print(f"\n{done} rows in {elapsed:.1f}s ({done / elapsed:.1f}/s), "
+          f"{stats['failed']} failed, {stats['skipped']} skipped from a previous run")
+    print_env_report()
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Micro-Batching Gateway for GPT OSS
+Coalesces concurrent requests to a Transformers pipeline into padded batches
+"""
+
+import argparse
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+import torch
+
+_DONE = object()
+
+
+def render_prompt(tokenizer, messages):
+    """Turn chat messages into prompt text, using the model's chat template if it has one"""
+    if getattr(tokenizer, "chat_template", None):
+        return tokenizer.apply_chat_template(messages, add_generation_prompt=True, tokenize=False)
+    lines = [f"{message['role']}: {message['content']}" for message in messages]
+    return "\n".join(lines) + "\nassistant:"
+
+
+@dataclass
+class _Pending:
+    """One queued request and the channel its tokens stream back on"""
+
+    input_ids: list
+    max_new_tokens: int
+    temperature: float
+    enqueued: float = field(default_factory=time.perf_counter)
+    output: queue.Queue = field(default_factory=queue.Queue)
+    generated: list = field(default_factory=list)
+    text: str = ""
+    finished: bool = False
+
+
+class BatchingGateway:
+    """In-process, OpenAI-shaped gateway in front of a causal LM
+
+    Requests are queued and a single worker thread drains the queue into
+    batches of at most `max_batch_size`, waiting no longer than
+    `max_wait_ms` for a batch to fill. Each batch is split into buckets of
+    similar prompt length so little compute is spent on left padding, and
+    every request gets its own token stream back even though decoding runs
+    for the whole bucket at once.
+    """
+
+    def __init__(self, pipe=None, model=None, tokenizer=None, max_batch_size=8,
+                 max_wait_ms=10.0, bucket_width=32):
+        if pipe is not None:
+            model, tokenizer = pipe.model, pipe.tokenizer
+        self.model = model
+        self.tokenizer = tokenizer
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.bucket_width = bucket_width
+        if tokenizer.pad_token_id is None:
+            tokenizer.pad_token = tokenizer.eos_token
+        self.batches = 0
+        self.batched_requests = 0
+
+        self._queue = queue.Queue()
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+        # Mirror the OpenAI client surface: gateway.chat.completions.create(...)
+        self.chat = self
+        self.completions = self
+
+    def submit(self, messages, max_tokens=100, temperature=0.0):
+        """Queue a request; returns the pending handle whose .output yields text pieces"""
+        if self._closed:
+            raise RuntimeError("gateway is closed")
+        prompt = render_prompt(self.tokenizer, messages)
+        pending = _Pending(
+            input_ids=self.tokenizer(prompt)["input_ids"],
+            max_new_tokens=max_tokens,
+            temperature=temperature or 0.0,
+        )
+        self._queue.put(pending)
+        return pending
+
+    def stream(self, messages, max_tokens=100, temperature=0.0):
+        """Yield this request's text as it is decoded"""
+        pending = self.submit(messages, max_tokens, temperature)
+        while True:
+            piece = pending.output.get()
+            if piece is _DONE:
+                return
+            if isinstance(piece, Exception):
+                raise piece
+            yield piece
+
+    def create(self, messages, model=None, max_tokens=100, temperature=0.0, stream=False, **_):
+        """chat.completions.create equivalent returning plain dicts"""
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        model = model or getattr(self.model, "name_or_path", "local")
+        pieces = self.stream(messages, max_tokens, temperature)
+        if stream:
+            return (
+                {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "model": model,
+                    "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}],
+                }
+                for piece in pieces
+            )
+        text = "".join(pieces)
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": text},
+                "finish_reason": "stop",
+            }],
+        }
+
+    def close(self):
+        self._closed = True
+        self._queue.put(None)
+        self._worker.join()
+
+    def _collect(self):
+        """Block for one request, then gather more until the batch is full or max_wait passes"""
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                pending = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if pending is None:
+                self._queue.put(None)
+                break
+            batch.append(pending)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            buckets = {}
+            for pending in batch:
+                buckets.setdefault(len(pending.input_ids) // self.bucket_width, []).append(pending)
+            for bucket in buckets.values():
+                self.batches += 1
+                self.batched_requests += len(bucket)
+                try:
+                    self._generate(bucket)
+                except Exception as e:
+                    for pending in bucket:
+                        if not pending.finished:
+                            pending.output.put(e)
+                            pending.finished = True
+
+    @torch.inference_mode()
+    def _generate(self, bucket):
+        """Decode a bucket of requests together, streaming each row's new text"""
+        pad_id = self.tokenizer.pad_token_id
+        eos_id = self.tokenizer.eos_token_id
+        device = self.model.device
+        width = max(len(pending.input_ids) for pending in bucket)
+
+        # Left-pad so every row's next token lands in the last position
+        input_ids = torch.tensor(
+            [[pad_id] * (width - len(p.input_ids)) + p.input_ids for p in bucket], device=device)
+        attention_mask = torch.tensor(
+            [[0] * (width - len(p.input_ids)) + [1] * len(p.input_ids) for p in bucket], device=device)
+
+        past_key_values = None
+        steps = max(pending.max_new_tokens for pending in bucket)
+        for _ in range(steps):
+            position_ids = (attention_mask.cumsum(-1) - 1).clamp(min=0)
+            if past_key_values is not None:
+                position_ids = position_ids[:, -1:]
+            outputs = self.model(
+                input_ids=input_ids,
+                attention_mask=attention_mask,
+                position_ids=position_ids,
+                past_key_values=past_key_values,
+                use_cache=True,
+            )
+            past_key_values = outputs.past_key_values
+            logits = outputs.logits[:, -1, :]
+            next_ids = logits.argmax(-1)
+            for row, pending in enumerate(bucket):
+                if pending.temperature > 0:
+                    probs = torch.softmax(logits[row].float() / pending.temperature, -1)
+                    next_ids[row] = torch.multinomial(probs, 1)[0]
+
+            for row, pending in enumerate(bucket):
+                if pending.finished:
+                    next_ids[row] = pad_id
+                    continue
+                token = int(next_ids[row])
+                if token == eos_id:
+                    self._finish(pending)
+                    continue
+                pending.generated.append(token)
+                text = self.tokenizer.decode(pending.generated, skip_special_tokens=True)
+                if len(text) > len(pending.text):
+                    pending.output.put(text[len(pending.text):])
+                    pending.text = text
+                if len(pending.generated) >= pending.max_new_tokens:
+                    self._finish(pending)
+
+            if all(pending.finished for pending in bucket):
+                break
+            input_ids = next_ids.unsqueeze(-1)
+            attention_mask = torch.cat(
+                [attention_mask, torch.ones_like(input_ids)], dim=-1)
+
+        for pending in bucket:
+            self._finish(pending)
+
+    @staticmethod
+    def _finish(pending):
+        if not pending.finished:
+            pending.finished = True
+            pending.output.put(_DONE)
+
+
+def benchmark(model_name="sshleifer/tiny-gpt2", requests=32, max_new_tokens=32,
+              max_batch_size=8, max_wait_ms=10.0, device="cpu"):
+    """Compare one-at-a-time pipeline calls with the batching gateway under concurrent load"""
+    from transformers import pipeline
+
+    pipe = pipeline("text-generation", model=model_name, device=device)
+    prompts = [
+        [{"role": "user", "content": f"Question {i}: " + "tell me something interesting " * (1 + i % 4)}]
+        for i in range(requests)
+    ]
+
+    start = time.perf_counter()
+    for messages in prompts:
+        pipe(render_prompt(pipe.tokenizer, messages), max_new_tokens=max_new_tokens,
+             do_sample=False, pad_token_id=pipe.tokenizer.eos_token_id)
+    sequential = time.perf_counter() - start
+
+    gateway = BatchingGateway(pipe, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+    try:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=requests) as pool:
+            texts = list(pool.map(
+                lambda messages: "".join(gateway.stream(messages, max_tokens=max_new_tokens)),
+                prompts,
+            ))
+        batched = time.perf_counter() - start
+    finally:
+        gateway.close()
+
+    print(f"=== {requests} requests, {max_new_tokens} new tokens each, model {model_name} ===")
+    print(f"one-at-a-time pipeline: {sequential:.2f}s  {requests / sequential:6.1f} req/s")
+    print(f"batching gateway:       {batched:.2f}s  {requests / batched:6.1f} req/s "
+          f"({gateway.batches} batches, mean size {gateway.batched_requests / max(gateway.batches, 1):.1f})")
+    print(f"speedup: {sequential / batched:.2f}x")
+    return texts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the micro-batching gateway on CPU")
+    parser.add_argument("--model", default="sshleifer/tiny-gpt2")
+    parser.add_argument("--requests", type=int, default=32)
+    parser.add_argument("--max-new-tokens", type=int, default=32)
+    parser.add_argument("--max-batch-size", type=int, default=8)
+    parser.add_argument("--max-wait-ms", type=float, default=10.0)
+    parser.add_argument("--device", default="cpu")
+    args = parser.parse_args()
+    benchmark(args.model, args.requests, args.max_new_tokens, args.max_batch_size,
+              args.max_wait_ms, args.device)
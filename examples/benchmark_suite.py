@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Benchmark Suite for GPT OSS
+Measures latency, TTFT, throughput and error rate of any OpenAI-compatible endpoint
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+
+from client_pool import close_async_clients, get_async_client
+from quantiles import percentile
+
+TARGETS = {
+    "ollama": (os.getenv("OLLAMA_BASE_URL", "http://localhost:11434/v1"), "ollama", "gpt-oss:20b"),
+    "vllm": (os.getenv("VLLM_BASE_URL", "http://localhost:8000/v1"), "dummy", "openai/gpt-oss-20b"),
+}
+
+# A metric regresses when it moves the wrong way by more than the tolerance
+REGRESSION_DIRECTIONS = {
+    "latency_p50": 1,
+    "latency_p95": 1,
+    "latency_p99": 1,
+    "ttft_p50": 1,
+    "ttft_p95": 1,
+    "tokens_per_sec": -1,
+    "error_rate": 1,
+}
+
+
+@dataclass
+class CellResult:
+    """Aggregated measurements for one (concurrency, prompt, output) cell"""
+
+    concurrency: int
+    prompt_words: int
+    max_tokens: int
+    requests: int
+    errors: int = 0
+    latency_p50: float = 0.0
+    latency_p95: float = 0.0
+    latency_p99: float = 0.0
+    ttft_p50: float = 0.0
+    ttft_p95: float = 0.0
+    tokens_per_sec: float = 0.0
+    error_rate: float = 0.0
+
+    @property
+    def key(self):
+        return f"c{self.concurrency}-p{self.prompt_words}-o{self.max_tokens}"
+
+
+@dataclass
+class BenchmarkReport:
+    """A complete sweep, serializable to JSON"""
+
+    base_url: str
+    model: str
+    started: float
+    cells: list = field(default_factory=list)
+
+    def to_json(self):
+        return json.dumps(asdict(self), indent=2)
+
+    @classmethod
+    def from_json(cls, text):
+        data = json.loads(text)
+        data["cells"] = [CellResult(**cell) for cell in data["cells"]]
+        return cls(**data)
+
+
+def make_prompt(words):
+    """Deterministic filler prompt of roughly `words` words"""
+    filler = " ".join(itertools.islice(itertools.cycle(
+        "the quick brown fox jumps over the lazy dog".split()), words))
+    return f"{filler}\n\nWrite a detailed story about the text above."
+
+
+async def _one_request(client, semaphore, model, prompt, max_tokens):
+    """Stream one completion, returning (latency, ttft, completion_tokens) or raising"""
+    async with semaphore:
+        start = time.perf_counter()
+        ttft = None
+        deltas = 0
+        usage = None
+        stream = await client.chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=max_tokens,
+            temperature=0,
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        async for chunk in stream:
+            if getattr(chunk, "usage", None):
+                usage = chunk.usage
+            if chunk.choices and chunk.choices[0].delta.content:
+                if ttft is None:
+                    ttft = time.perf_counter() - start
+                deltas += 1
+        latency = time.perf_counter() - start
+        tokens = usage.completion_tokens if usage else deltas
+        return latency, ttft if ttft is not None else latency, tokens
+
+
+async def run_cell(client, model, concurrency, prompt_words, max_tokens, requests):
+    """Send `requests` completions at the given concurrency and aggregate them"""
+    semaphore = asyncio.Semaphore(concurrency)
+    prompt = make_prompt(prompt_words)
+    start = time.perf_counter()
+    outcomes = await asyncio.gather(
+        *(_one_request(client, semaphore, model, prompt, max_tokens) for _ in range(requests)),
+        return_exceptions=True,
+    )
+    wall = time.perf_counter() - start
+
+    ok = [outcome for outcome in outcomes if not isinstance(outcome, BaseException)]
+    latencies = [latency for latency, _, _ in ok]
+    ttfts = [ttft for _, ttft, _ in ok]
+    tokens = sum(count for _, _, count in ok)
+    errors = requests - len(ok)
+    return CellResult(
+        concurrency=concurrency,
+        prompt_words=prompt_words,
+        max_tokens=max_tokens,
+        requests=requests,
+        errors=errors,
+        latency_p50=percentile(latencies, 50),
+        latency_p95=percentile(latencies, 95),
+        latency_p99=percentile(latencies, 99),
+        ttft_p50=percentile(ttfts, 50),
+        ttft_p95=percentile(ttfts, 95),
+        tokens_per_sec=tokens / wall if wall else 0.0,
+        error_rate=errors / requests if requests else 0.0,
+    )
+
+
+async def run_sweep(base_url, api_key, model, concurrency=(1, 4), prompt_words=(32,),
+                    max_tokens=(64,), requests=8, progress=None):
+    """Run every combination of concurrency x prompt length x output length"""
+    client = get_async_client(base_url=base_url, api_key=api_key)
+    report = BenchmarkReport(base_url=base_url, model=model, started=time.time())
+    try:
+        for c, p, o in itertools.product(concurrency, prompt_words, max_tokens):
+            cell = await run_cell(client, model, c, p, o, max(requests, c))
+            report.cells.append(cell)
+            if progress:
+                progress(cell)
+    finally:
+        await close_async_clients()
+    return report
+
+
+def render_table(report):
+    """Render a report as a Markdown table"""
+    lines = [
+        f"Endpoint: {report.base_url}  Model: {report.model}",
+        "",
+        "| Conc | Prompt | Output | p50 (s) | p95 (s) | p99 (s) | TTFT p50 (s) | Tok/s | Errors |",
+        "|------|--------|--------|---------|---------|---------|--------------|-------|--------|",
+    ]
+    for cell in report.cells:
+        lines.append(
+            f"| {cell.concurrency:>4} | {cell.prompt_words:>6} | {cell.max_tokens:>6} "
+            f"| {cell.latency_p50:7.3f} | {cell.latency_p95:7.3f} | {cell.latency_p99:7.3f} "
+            f"| {cell.ttft_p50:12.3f} | {cell.tokens_per_sec:5.1f} | {cell.error_rate:6.1%} |"
+        )
+    return "\n".join(lines)
+
+
+def find_regressions(report, baseline, tolerance=0.10):
+    """Compare against a baseline report and list metrics that got worse
+
+    Returns (cell_key, metric, baseline_value, current_value) tuples. Cells
+    missing from the baseline are ignored so the sweep can grow over time.
+    """
+    previous = {cell.key: cell for cell in baseline.cells}
+    regressions = []
+    for cell in report.cells:
+        old = previous.get(cell.key)
+        if old is None:
+            continue
+        for metric, direction in REGRESSION_DIRECTIONS.items():
+            before = getattr(old, metric)
+            after = getattr(cell, metric)
+            if metric == "error_rate":
+                worse = after - before > tolerance
+            elif direction > 0:
+                worse = before > 0 and after > before * (1 + tolerance)
+            else:
+                worse = before > 0 and after < before * (1 - tolerance)
+            if worse:
+                regressions.append((cell.key, metric, before, after))
+    return regressions
+
+
+def _int_list(text):
+    return [int(value) for value in text.split(",") if value]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark an OpenAI-compatible endpoint")
+    parser.add_argument("--target", default="ollama",
+                        help="ollama, vllm, mock (in-process mock server), or a base_url "
+                             "such as http://localhost:8080/v1")
+    parser.add_argument("--model", help="model name (defaults per target)")
+    parser.add_argument("--api-key", default=None)
+    parser.add_argument("--concurrency", type=_int_list, default=[1, 4, 8])
+    parser.add_argument("--prompt-words", type=_int_list, default=[32, 512])
+    parser.add_argument("--max-tokens", type=_int_list, default=[64, 256])
+    parser.add_argument("--requests", type=int, default=16, help="requests per cell")
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--baseline", help="compare against this JSON report")
+    parser.add_argument("--save-baseline", help="also write the report here as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="relative change that counts as a regression (default 0.10)")
+    args = parser.parse_args(argv)
+
+    if args.target == "mock":
+        from mock_server import MockConfig, start_mock_server
+        server = start_mock_server(MockConfig())
+        base_url, api_key, model = server.base_url, "mock", "gpt-oss-20b"
+    elif args.target in TARGETS:
+        base_url, api_key, model = TARGETS[args.target]
+    else:
+        base_url, api_key, model = args.target, "dummy", "gpt-oss-20b"
+    model = args.model or model
+    api_key = args.api_key or api_key
+
+    report = asyncio.run(run_sweep(
+        base_url, api_key, model,
+        concurrency=args.concurrency,
+        prompt_words=args.prompt_words,
+        max_tokens=args.max_tokens,
+        requests=args.requests,
+        progress=lambda cell: print(f"  done {cell.key}", file=sys.stderr),
+    ))
+
+    print(render_table(report))
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w") as f:
+                f.write(report.to_json())
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = BenchmarkReport.from_json(f.read())
+        regressions = find_regressions(report, baseline, args.tolerance)
+        if regressions:
+            print("\nRegressions against baseline:")
+            for key, metric, before, after in regressions:
+                print(f"  {key} {metric}: {before:.4f} -> {after:.4f}")
+            return 1
+        print("\nNo regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
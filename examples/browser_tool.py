@@ -0,0 +1,447 @@
+#!/usr/bin/env python3
+"""
+Browser Tool for GPT OSS
+search/open/find handlers with a pooled HTTP session, a revalidating disk cache and per-page text indexes
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from urllib.parse import quote_plus, urljoin
+
+BROWSER_TOOLS = [
+    {
+        "type": "function",
+        "function": {
+            "name": "search",
+            "description": "Search the web and return a page of results with numbered links",
+            "parameters": {
+                "type": "object",
+                "properties": {"query": {"type": "string"}},
+                "required": ["query"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "open",
+            "description": "Open a URL, or a numbered link from the current page",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "id": {"type": ["string", "integer"], "description": "URL or link number"},
+                    "loc": {"type": "integer", "description": "First line to show", "default": 0}
+                },
+                "required": ["id"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "find",
+            "description": "Find lines containing a pattern on the current page",
+            "parameters": {
+                "type": "object",
+                "properties": {"pattern": {"type": "string"}},
+                "required": ["pattern"]
+            }
+        }
+    },
+]
+
+
+class _TextExtractor(HTMLParser):
+    """Collects visible text lines and links from HTML"""
+
+    _SKIP = {"script", "style", "noscript", "head"}
+    _BLOCK = {"p", "div", "br", "li", "tr", "h1", "h2", "h3", "h4", "h5", "h6", "section", "article"}
+
+    def __init__(self, base_url):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.title = ""
+        self.lines = []
+        self.links = []
+        self._current = []
+        self._skip_depth = 0
+        self._in_title = False
+        self._href = None
+        self._link_text = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "title":
+            self._in_title = True
+        if tag in self._SKIP:
+            self._skip_depth += 1
+        if tag in self._BLOCK:
+            self._flush()
+        if tag == "a":
+            self._href = dict(attrs).get("href")
+            self._link_text = []
+
+    def handle_endtag(self, tag):
+        if tag == "title":
+            self._in_title = False
+        if tag in self._SKIP and self._skip_depth:
+            self._skip_depth -= 1
+        if tag == "a" and self._href:
+            text = " ".join("".join(self._link_text).split())
+            self.links.append((urljoin(self.base_url, self._href), text))
+            self._current.append(f"【{len(self.links) - 1}†{text}】")
+            self._href = None
+        if tag in self._BLOCK:
+            self._flush()
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+            return
+        if self._skip_depth:
+            return
+        if self._href is not None:
+            self._link_text.append(data)
+        else:
+            self._current.append(data)
+
+    def _flush(self):
+        line = " ".join("".join(self._current).split())
+        if line:
+            self.lines.append(line)
+        self._current = []
+
+    def close(self):
+        super().close()
+        self._flush()
+
+
+@dataclass
+class Page:
+    """An opened page: its text lines, links and a trigram -> line-number index"""
+
+    url: str
+    title: str
+    lines: list
+    links: list
+    index: dict = field(default_factory=dict)
+    found: dict = field(default_factory=dict)
+
+    @classmethod
+    def from_html(cls, url, html):
+        extractor = _TextExtractor(url)
+        extractor.feed(html)
+        extractor.close()
+        page = cls(url=url, title=extractor.title.strip(), lines=extractor.lines, links=extractor.links)
+        page.build_index()
+        return page
+
+    def build_index(self):
+        """Index every character trigram once so find() never rescans the page"""
+        index = {}
+        for number, line in enumerate(self.lines):
+            line = line.lower()
+            for trigram in {line[i:i + 3] for i in range(len(line) - 2)}:
+                index.setdefault(trigram, []).append(number)
+        self.index = index
+
+    def find(self, pattern, limit=20):
+        """Line numbers containing `pattern` (case-insensitive), memoized per page"""
+        needle = pattern.lower()
+        matches = self.found.get(needle)
+        if matches is None:
+            matches = [n for n in self._candidates(needle) if needle in self.lines[n].lower()]
+            if len(self.found) >= 256:
+                self.found.clear()
+            self.found[needle] = matches
+        return matches[:limit]
+
+    def _candidates(self, needle):
+        """Lines that contain every trigram of needle, starting from the rarest"""
+        if len(needle) < 3:
+            return range(len(self.lines))
+        postings = sorted(
+            (self.index.get(needle[i:i + 3], []) for i in range(len(needle) - 2)), key=len)
+        if not postings[0]:
+            return []
+        lines = set(postings[0])
+        for numbers in postings[1:3]:
+            lines.intersection_update(numbers)
+        return sorted(lines)
+
+    def render(self, loc=0, num_lines=40):
+        header = f"{self.title or self.url}\nURL: {self.url}\n"
+        body = "\n".join(f"L{n}: {line}" for n, line in
+                         enumerate(self.lines[loc:loc + num_lines], start=loc))
+        return header + body
+
+
+class DiskCache:
+    """Size-bounded on-disk HTTP cache keyed by URL, with ETag/Last-Modified validators"""
+
+    def __init__(self, directory, max_bytes=64 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._total = sum(
+            os.path.getsize(os.path.join(directory, name))
+            for name in os.listdir(directory) if name.endswith(".body"))
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode()).hexdigest()
+        base = os.path.join(self.directory, key)
+        return base + ".json", base + ".body"
+
+    def get(self, url):
+        """Return (meta, body) for a cached URL, or (None, None)"""
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            with open(body_path, "rb") as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None, None
+        os.utime(meta_path)  # mark as recently used for eviction
+        return meta, body
+
+    def touch(self, url, meta):
+        """Record a successful revalidation"""
+        meta_path, _ = self._paths(url)
+        meta["fetched"] = time.time()
+        with open(meta_path, "w") as f:
+            json.dump(meta, f)
+
+    def put(self, url, meta, body):
+        meta_path, body_path = self._paths(url)
+        with self._lock:
+            if os.path.exists(body_path):
+                self._total -= os.path.getsize(body_path)
+            with open(body_path, "wb") as f:
+                f.write(body)
+            with open(meta_path, "w") as f:
+                json.dump(meta, f)
+            self._total += len(body)
+            self._evict()
+
+    def _evict(self):
+        if self._total <= self.max_bytes:
+            return
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                path = os.path.join(self.directory, name)
+                entries.append((os.path.getmtime(path), path))
+        for _, meta_path in sorted(entries):
+            if self._total <= self.max_bytes:
+                break
+            body_path = meta_path[:-len(".json")] + ".body"
+            try:
+                self._total -= os.path.getsize(body_path)
+                os.remove(body_path)
+            except OSError:
+                pass
+            try:
+                os.remove(meta_path)
+            except OSError:
+                pass
+
+
+class BrowserTool:
+    """Handlers for the gpt-oss browser tool: search, open and find
+
+    Pages are fetched through one pooled requests.Session. Responses land
+    in a disk cache; a cached page younger than `fresh_for` seconds is used
+    as is, an older one is revalidated with If-None-Match/If-Modified-Since
+    so unchanged pages cost a 304 instead of a full download. Opened pages
+    keep their text index in memory, so repeated find() calls are lookups.
+
+    open() and find() act on the page the previous call left open, so the
+    handlers take a lock around that state, and agents should run their
+    calls in order: pass `sequential=browser.handlers` to run_tool_agent.
+    """
+
+    def __init__(self, cache_dir=".browser_cache", max_cache_bytes=64 * 1024 * 1024,
+                 fresh_for=300.0, search_url=None, timeout=10.0, max_pages=32, pool_size=10):
+        self.cache = DiskCache(cache_dir, max_cache_bytes)
+        self.fresh_for = fresh_for
+        self.search_url = search_url or os.getenv(
+            "BROWSER_SEARCH_URL", "https://html.duckduckgo.com/html/?q={query}")
+        self.timeout = timeout
+        self.max_pages = max_pages
+        # requests is only needed once a browser is actually created
+        import requests
+        from requests.adapters import HTTPAdapter
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["User-Agent"] = "gpt-oss-browser-tool/1.0"
+        self.pages = OrderedDict()
+        self.current = None
+        self._lock = threading.RLock()
+        self.stats = {"fetches": 0, "fresh_hits": 0, "revalidated": 0, "finds": 0}
+
+    def fetch(self, url):
+        """Return HTML for url, from cache when fresh or still valid"""
+        meta, body = self.cache.get(url)
+        if meta is not None and time.time() - meta["fetched"] < self.fresh_for:
+            self.stats["fresh_hits"] += 1
+            return body.decode(meta.get("encoding") or "utf-8", errors="replace")
+
+        headers = {}
+        if meta is not None:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+        response = self.session.get(url, headers=headers, timeout=self.timeout)
+        if response.status_code == 304 and meta is not None:
+            self.stats["revalidated"] += 1
+            self.cache.touch(url, meta)
+            return body.decode(meta.get("encoding") or "utf-8", errors="replace")
+
+        response.raise_for_status()
+        self.stats["fetches"] += 1
+        self.cache.put(url, {
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "encoding": response.encoding,
+            "fetched": time.time(),
+        }, response.content)
+        return response.text
+
+    def _load(self, url):
+        page = self.pages.get(url)
+        if page is not None:
+            self.pages.move_to_end(url)
+            return page
+        page = Page.from_html(url, self.fetch(url))
+        self.pages[url] = page
+        if len(self.pages) > self.max_pages:
+            self.pages.popitem(last=False)
+        return page
+
+    def search(self, query):
+        """Run a web search and show the results page"""
+        url = self.search_url.format(query=quote_plus(query))
+        with self._lock:
+            self.current = self._load(url)
+            return self.current.render()
+
+    def open(self, id, loc=0):
+        """Open a URL or a link number from the current page"""
+        with self._lock:
+            if isinstance(id, int) or (isinstance(id, str) and id.isdigit()):
+                if self.current is None:
+                    raise ValueError("no page is open to follow a link from")
+                url = self.current.links[int(id)][0]
+            else:
+                url = id
+            self.current = self._load(url)
+            return self.current.render(loc)
+
+    def find(self, pattern):
+        """Show lines on the current page that contain `pattern`"""
+        with self._lock:
+            page = self.current
+            if page is None:
+                raise ValueError("no page is open")
+            self.stats["finds"] += 1
+        matches = page.find(pattern)
+        if not matches:
+            return f"No matches for {pattern!r}"
+        return "\n".join(f"L{n}: {page.lines[n]}" for n in matches)
+
+    @property
+    def handlers(self):
+        """Tool handlers for tool_agent.run_tool_agent"""
+        return {"search": self.search, "open": self.open, "find": self.find}
+
+    def close(self):
+        self.session.close()
+
+
+if __name__ == "__main__":
+    import tempfile
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    import random
+    rng = random.Random(0)
+    vocabulary = ("model weights reasoning level tokens latency batch cache prompt answer "
+                  "channel harmony analysis final tool browser python quantized expert").split()
+    fixture_pages = {
+        "/": "<html><head><title>Fixture Home</title></head><body>"
+             "<h1>gpt-oss fixture</h1><p>See the <a href='/models'>model page</a>.</p></body></html>",
+        "/models": "<html><head><title>Models</title></head><body>"
+                   + "".join(f"<p>Line {i}: " + " ".join(rng.choice(vocabulary) for _ in range(12))
+                             + f" run {i}.</p>" for i in range(2000))
+                   + "</body></html>",
+    }
+    served = {"200": 0, "304": 0}
+
+    class FixtureHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            html = fixture_pages.get(self.path)
+            if html is None:
+                self.send_error(404)
+                return
+            etag = '"%s"' % hashlib.md5(html.encode()).hexdigest()
+            if self.headers.get("If-None-Match") == etag:
+                served["304"] += 1
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+            served["200"] += 1
+            body = html.encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("ETag", etag)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        browser = BrowserTool(cache_dir=cache_dir, fresh_for=0)
+        print(browser.open(base + "/"))
+        print(browser.open(0, loc=0)[:200], "...")
+        # A fresh tool (e.g. the next process) reuses the disk cache: 304, no body
+        browser = BrowserTool(cache_dir=cache_dir, fresh_for=0)
+        browser.open(base + "/models")
+
+        page = browser.current
+        start = time.perf_counter()
+        for _ in range(200):
+            page.found.clear()
+            page.find("level tokens")
+        indexed = (time.perf_counter() - start) / 200
+        start = time.perf_counter()
+        for _ in range(200):
+            page.find("level tokens")
+        repeated = (time.perf_counter() - start) / 200
+        start = time.perf_counter()
+        for _ in range(200):
+            [n for n, line in enumerate(browser.current.lines) if "level tokens" in line.lower()]
+        scanned = (time.perf_counter() - start) / 200
+        print(browser.find("run 1999"))
+
+        print(f"\nserver responses: {served}, browser stats: {browser.stats}")
+        print(f"find via index: {indexed * 1e6:.0f}us, repeated find: {repeated * 1e6:.1f}us, "
+              f"full rescan: {scanned * 1e6:.0f}us")
+        browser.close()
+    server.shutdown()
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Latency-Budget Router for GPT OSS
+Picks the model and reasoning effort per request from a latency or cost budget
+"""
+
+import argparse
+import collections
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+
+from harmony import split_channels
+from quantiles import percentile
+
+# Ordered from cheapest/fastest to most capable
+ARMS = (
+    ("gpt-oss-20b", "low"),
+    ("gpt-oss-20b", "medium"),
+    ("gpt-oss-120b", "low"),
+    ("gpt-oss-120b", "medium"),
+    ("gpt-oss-20b", "high"),
+    ("gpt-oss-120b", "high"),
+)
+
+# Starting guesses (seconds, relative cost) until real measurements arrive
+PRIOR_LATENCY = {
+    ("gpt-oss-20b", "low"): 1.5,
+    ("gpt-oss-20b", "medium"): 4.0,
+    ("gpt-oss-120b", "low"): 3.0,
+    ("gpt-oss-120b", "medium"): 8.0,
+    ("gpt-oss-20b", "high"): 12.0,
+    ("gpt-oss-120b", "high"): 25.0,
+}
+RELATIVE_COST = {
+    ("gpt-oss-20b", "low"): 1.0,
+    ("gpt-oss-20b", "medium"): 2.5,
+    ("gpt-oss-120b", "low"): 4.0,
+    ("gpt-oss-120b", "medium"): 10.0,
+    ("gpt-oss-20b", "high"): 8.0,
+    ("gpt-oss-120b", "high"): 30.0,
+}
+
+# How many samples the prior latency counts as before any are measured; each
+# measurement replaces one of them, so after PRIOR_WEIGHT samples it is gone
+PRIOR_WEIGHT = 5
+
+# Minimum arm index each class of request should start from
+CLASS_LEVELS = {"chat": 0, "knowledge": 1, "code": 2, "math": 3, "logic": 3, "proof": 5}
+
+_PATTERNS = [
+    ("proof", re.compile(r"\b(prove|proof|theorem|lemma|rigorous)\b", re.I)),
+    ("logic", re.compile(r"\b(puzzle|riddle|lying|truth|deduce|logic)\b", re.I)),
+    ("math", re.compile(r"\b(solve|calculate|equation|average|probability|integral|\d+\s*[-+*/^]\s*\d+)", re.I)),
+    ("code", re.compile(r"\b(def|class|function|code|bug|compile|python|javascript)\b|```", re.I)),
+    ("knowledge", re.compile(r"\b(explain|why|how does|what is|compare|difference)\b", re.I)),
+]
+_REASONING_LINE = re.compile(r"reasoning:\s*(low|medium|high)\.?\s*", re.I)
+
+
+def classify(messages):
+    """Cheap request classifier: (class, level) from keywords and prompt length"""
+    text = " ".join(message.get("content") or "" for message in messages
+                    if isinstance(message, dict) and message.get("role") in ("user", "system"))
+    kind = next((name for name, pattern in _PATTERNS if pattern.search(text)), "chat")
+    level = CLASS_LEVELS[kind]
+    # Long prompts tend to need more deliberate reasoning
+    if len(text) > 2000 and level < len(ARMS) - 1:
+        level += 1
+    return kind, level
+
+
+def with_effort(messages, effort):
+    """Messages with the system prompt's "Reasoning: x" line set to `effort`"""
+    messages = [dict(message) for message in messages]
+    line = f"Reasoning: {effort}."
+    for message in messages:
+        if message.get("role") == "system":
+            content = _REASONING_LINE.sub("", message.get("content") or "")
+            message["content"] = f"{line} {content}".strip()
+            return messages
+    return [{"role": "system", "content": line}] + messages
+
+
+@dataclass
+class ArmStats:
+    """Online latency statistics for one (model, effort)"""
+
+    prior: float
+    samples: collections.deque = field(default_factory=lambda: collections.deque(maxlen=200))
+    requests: int = 0
+    truncated: int = 0
+
+    @property
+    def prior_weight(self):
+        """Samples' worth of weight the prior still carries"""
+        return max(0, PRIOR_WEIGHT - len(self.samples))
+
+    def predicted(self, pct=90):
+        """The prior and the measured percentile, weighted by sample count"""
+        if not self.samples:
+            return self.prior
+        count = len(self.samples)
+        weight = self.prior_weight
+        return (weight * self.prior + count * percentile(self.samples, pct)) / (weight + count)
+
+
+@dataclass
+class Decision:
+    """What was chosen for a request and why"""
+
+    kind: str
+    level: int
+    model: str
+    effort: str
+    predicted: float
+    budget: float = None
+    cost_budget: float = None
+    reason: str = ""
+
+
+class BudgetRouter:
+    """Chooses (model, reasoning effort) per request within a budget
+
+    The classifier sets the least capable arm worth trying; the router
+    takes the cheapest arm at or above it whose predicted p90 latency
+    (from live measurements, seeded with priors) and relative cost fit
+    the caller's budgets. If none fits, it falls back to the most capable
+    arm that does. With probability `explore`, a request is sent instead
+    to an arm at or above its level that its prior still rules out but
+    that has fewer than PRIOR_WEIGHT samples; the prior fades with each
+    sample, so a pessimistic prior cannot keep an arm out of rotation
+    forever. A response cut off by max_tokens, or empty, is retried
+    one arm up while the latency budget lasts. Every decision and its
+    outcome can be appended to a JSONL log for offline evaluation.
+    """
+
+    def __init__(self, client, log_path=None, arms=ARMS, percentile=90, explore=0.05, seed=None):
+        self.client = client
+        self.arms = arms
+        self.percentile = percentile
+        self.explore = explore
+        self._rng = random.Random(seed)
+        self.stats = {arm: ArmStats(PRIOR_LATENCY.get(arm, 10.0)) for arm in arms}
+        self._log = open(log_path, "a", buffering=1) if log_path else None
+        self._lock = threading.Lock()
+
+    def choose(self, messages, latency_budget=None, cost_budget=None, minimum_level=None):
+        kind, level = classify(messages)
+        if minimum_level is not None:
+            level = max(level, minimum_level)
+        with self._lock:
+            predictions = {arm: self.stats[arm].predicted(self.percentile) for arm in self.arms}
+            unsettled = [arm for arm in self.arms[level:] if self.stats[arm].prior_weight]
+            # Exploring only makes sense while there is budget left to spend on it
+            probe = (bool(unsettled) and (latency_budget is None or latency_budget > 0)
+                     and self._rng.random() < self.explore)
+
+        def within_cost(arm):
+            return cost_budget is None or RELATIVE_COST.get(arm, 1.0) <= cost_budget
+
+        def fits(arm):
+            return (latency_budget is None or predictions[arm] <= latency_budget) and within_cost(arm)
+
+        if probe:
+            arm = next((arm for arm in unsettled if within_cost(arm)), None)
+            if arm is not None and not fits(arm):
+                return Decision(kind, level, *arm, predictions[arm], latency_budget, cost_budget,
+                                "exploring an arm its prior rules out")
+
+        for index in range(level, len(self.arms)):
+            arm = self.arms[index]
+            if fits(arm):
+                return Decision(kind, level, *arm, predictions[arm], latency_budget, cost_budget,
+                                "cheapest arm at the needed level within budget")
+        for index in range(min(level, len(self.arms)) - 1, -1, -1):
+            arm = self.arms[index]
+            if fits(arm):
+                return Decision(kind, level, *arm, predictions[arm], latency_budget, cost_budget,
+                                "needed level over budget; degraded")
+        arm = self.arms[0]
+        return Decision(kind, level, *arm, predictions[arm], latency_budget, cost_budget,
+                        "nothing fits the budget; fastest arm")
+
+    def observe(self, model, effort, latency, truncated=False):
+        with self._lock:
+            stats = self.stats[(model, effort)]
+            stats.samples.append(latency)
+            stats.requests += 1
+            stats.truncated += truncated
+
+    def create(self, messages, latency_budget=None, cost_budget=None, **request):
+        """Route, send and, if the answer is cut short, escalate within the budget"""
+        start = time.perf_counter()
+        decision = self.choose(messages, latency_budget, cost_budget)
+        escalated_from = None
+        while True:
+            attempt_start = time.perf_counter()
+            response = self.client.chat.completions.create(
+                model=decision.model, messages=with_effort(messages, decision.effort), **request)
+            latency = time.perf_counter() - attempt_start
+            choice = response.choices[0]
+            answer = split_channels(choice.message.content or "")[1]
+            truncated = choice.finish_reason == "length" or not answer.strip()
+            self.observe(decision.model, decision.effort, latency, truncated)
+            self._record(decision, response, latency, truncated, escalated_from)
+
+            arm_index = self.arms.index((decision.model, decision.effort))
+            remaining = None if latency_budget is None else latency_budget - (time.perf_counter() - start)
+            if not truncated or arm_index + 1 >= len(self.arms):
+                return response, decision
+            nxt = self.choose(messages, remaining, cost_budget, minimum_level=arm_index + 1)
+            if self.arms.index((nxt.model, nxt.effort)) <= arm_index:
+                return response, decision
+            escalated_from = (decision.model, decision.effort)
+            nxt.reason = "escalated after a truncated or empty answer"
+            decision = nxt
+
+    def _record(self, decision, response, latency, truncated, escalated_from):
+        if self._log is None:
+            return
+        usage = getattr(response, "usage", None)
+        event = {
+            "time": time.time(),
+            "kind": decision.kind,
+            "level": decision.level,
+            "model": decision.model,
+            "effort": decision.effort,
+            "reason": decision.reason,
+            "predicted": decision.predicted,
+            "budget": decision.budget,
+            "cost_budget": decision.cost_budget,
+            "latency": latency,
+            "within_budget": decision.budget is None or latency <= decision.budget,
+            "truncated": truncated,
+            "completion_tokens": usage.completion_tokens if usage else None,
+            "escalated_from": escalated_from,
+        }
+        with self._lock:
+            self._log.write(json.dumps(event) + "\n")
+
+    def report(self):
+        lines = [f"{'model':<14} {'effort':<7} {'requests':>8} {'p50':>8} {'p90':>8} {'truncated':>10}"]
+        with self._lock:
+            for (model, effort), stats in self.stats.items():
+                samples = list(stats.samples)
+                lines.append(f"{model:<14} {effort:<7} {stats.requests:>8} "
+                             f"{percentile(samples, 50):>7.2f}s {percentile(samples, 90):>7.2f}s "
+                             f"{stats.truncated:>10}")
+        return "\n".join(lines)
+
+
+def evaluate_log(path):
+    """Summarize a decision log: budget hit rate and escalations per arm"""
+    per_arm = collections.defaultdict(lambda: {"requests": 0, "within_budget": 0, "escalations": 0,
+                                               "latencies": []})
+    with open(path) as f:
+        for line in f:
+            event = json.loads(line)
+            arm = per_arm[(event["model"], event["effort"])]
+            arm["requests"] += 1
+            arm["within_budget"] += event["within_budget"]
+            arm["escalations"] += event["escalated_from"] is not None
+            arm["latencies"].append(event["latency"])
+    print(f"{'model':<14} {'effort':<7} {'requests':>8} {'in budget':>10} {'escalated':>10} {'p90':>8}")
+    for (model, effort), arm in sorted(per_arm.items()):
+        print(f"{model:<14} {effort:<7} {arm['requests']:>8} "
+              f"{arm['within_budget'] / arm['requests']:>10.0%} {arm['escalations']:>10} "
+              f"{percentile(arm['latencies'], 90):>7.2f}s")
+
+
+class _SimulatedClient:
+    """Stands in for a server: latency grows with model size and effort"""
+
+    SPEED = {"gpt-oss-20b": 1.0, "gpt-oss-120b": 2.0}
+    EFFORT = {"low": 1.0, "medium": 2.5, "high": 7.0}
+
+    def __init__(self, scale=0.01, seed=0):
+        self.scale = scale
+        self.rng = random.Random(seed)
+        self.chat = self.completions = self
+
+    def create(self, model, messages, max_tokens=None, **request):
+        effort = _REASONING_LINE.search(messages[0]["content"]).group(1).lower()
+        latency = self.scale * self.SPEED[model] * self.EFFORT[effort] * self.rng.lognormvariate(0, 0.3)
+        time.sleep(latency)
+        # Hard prompts on weak arms sometimes run out of tokens
+        hard = classify(messages)[1] >= 3
+        truncated = hard and self.EFFORT[effort] * self.SPEED[model] < 5 and self.rng.random() < 0.5
+        message = SimpleNamespace(content="answer")
+        choice = SimpleNamespace(message=message, finish_reason="length" if truncated else "stop")
+        return SimpleNamespace(choices=[choice], usage=SimpleNamespace(completion_tokens=100))
+
+
+def simulate(log_path="budget_router.jsonl", requests=200, scale=0.01):
+    """Route a mixed workload against a simulated server and evaluate the log"""
+    prompts = [
+        "Hello! How are you today?",
+        "Explain why the sky appears blue during the day but red during sunset.",
+        "If a train travels 120 km in 2 hours, and then 180 km in 3 hours, what is the average speed?",
+        "Three people are in a room: Alice, Bob, and Charlie. If exactly one person is telling the truth, who is lying?",
+        "Analyze this code and explain what it does: def mystery_function(n): ...",
+        "Prove that the square root of 2 is irrational.",
+    ]
+    rng = random.Random(1)
+    open(log_path, "w").close()
+    router = BudgetRouter(_SimulatedClient(scale), log_path=log_path, seed=0)
+    # Scale the priors to the simulation's time base
+    for stats in router.stats.values():
+        stats.prior *= scale
+    for _ in range(requests):
+        prompt = rng.choice(prompts)
+        budget = rng.choice([None, 0.02, 0.05, 0.1])
+        router.create([{"role": "user", "content": prompt}], latency_budget=budget, max_tokens=200)
+    print("=== Online statistics ===")
+    print(router.report())
+    print(f"\n=== Decision log ({log_path}) ===")
+    evaluate_log(log_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Latency-budget routing over model size and effort")
+    parser.add_argument("--evaluate", metavar="LOG", help="summarize an existing decision log")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--log", default="budget_router.jsonl")
+    args = parser.parse_args()
+
+    if args.evaluate:
+        evaluate_log(args.evaluate)
+    else:
+        simulate(args.log, args.requests)
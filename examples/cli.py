@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Command-Line Interface for GPT OSS
+One entry point for every example, loading only the subcommand that runs
+"""
+
+import runpy
+import sys
+
+# name -> (module, summary); modules are imported only when their command runs
+COMMANDS = {
+    "chat": ("basic_chat", "basic, concurrent and multi-turn chat"),
+    "reason": ("cot_reasoning", "chain-of-thought reasoning at each effort level"),
+    "functions": ("function_calling", "function calling with parallel tool execution"),
+    "tools": ("tool_use", "browser and python tools"),
+    "local": ("local_deployment", "Ollama, vLLM and Transformers deployments"),
+    "batch": ("batch_runner", "resumable JSONL batch runs"),
+    "bench": ("benchmark_suite", "throughput and latency sweeps"),
+    "mock": ("mock_server", "offline OpenAI-compatible server"),
+    "gateway": ("batching_gateway", "micro-batching gateway over a local model (needs torch)"),
+    "models": ("model_registry", "cold and warm Transformers pipeline loads (needs torch)"),
+    "cpu": ("cpu_inference", "CPU int8/bf16/fp32 speed, memory and drift (needs torch)"),
+    "prefix": ("prefix_cache", "prefill saved by prefix KV-cache reuse (needs torch)"),
+    "route": ("backend_router", "replica routing with health checks"),
+    "budget": ("budget_router", "model and effort routing within a latency budget"),
+    "executor": ("request_executor", "deadlines, retries and hedging"),
+    "limiter": ("adaptive_limiter", "adaptive concurrency limiting"),
+    "metrics": ("metrics", "per-request metrics overhead"),
+    "conversation": ("conversation", "token-budgeted conversation window"),
+    "cache": ("semantic_cache", "semantic response cache"),
+    "harmony": ("harmony", "Harmony channel parser"),
+    "pool": ("client_pool_benchmark", "pooled versus per-request clients"),
+    "registry": ("function_registry", "function registry validation"),
+    "browser": ("browser_tool", "browser tool"),
+    "python": ("python_tool", "python tool"),
+}
+
+
+def usage():
+    width = max(map(len, COMMANDS))
+    lines = ["usage: cli.py <command> [args...]", "",
+             "Run a GPT OSS example. `cli.py <command> --help` shows the command's options.", "",
+             "commands:"]
+    lines += [f"  {name:<{width}}  {summary}" for name, (_, summary) in COMMANDS.items()]
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    # Parsed by hand: even argparse is more than `--help` needs to import
+    if not argv or argv[0] in ("-h", "--help"):
+        print(usage())
+        return 0 if argv else 2
+    command, *args = argv
+    if command not in COMMANDS:
+        print(f"cli.py: unknown command {command!r}\n\n{usage()}", file=sys.stderr)
+        return 2
+    module, _ = COMMANDS[command]
+    # run_module puts the example's own path in argv[0], as if it were run directly
+    sys.argv = [sys.argv[0], *args]
+    runpy.run_module(module, run_name="__main__", alter_sys=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Shared Client Pool for GPT OSS
+Process-wide OpenAI clients that reuse HTTP connections across examples
+"""
+
+import asyncio
+import os
+import threading
+import weakref
+
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    pass
+
+# httpx and the openai SDK are imported when the first client is built:
+# openai alone takes most of a second, which scripts that only parse
+# arguments or print help should not pay
+_clients = {}
+_async_clients = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+def _env_int(name, default):
+    """Read an integer setting from the environment"""
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def _env_float(name, default):
+    """Read a float setting from the environment"""
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+def http_settings():
+    """Connection pool settings, read from the .env written by deploy.sh"""
+    return {
+        "max_connections": _env_int("HTTP_MAX_CONNECTIONS", 100),
+        "max_keepalive_connections": _env_int("HTTP_MAX_KEEPALIVE_CONNECTIONS", 20),
+        "keepalive_expiry": _env_float("HTTP_KEEPALIVE_EXPIRY", 30.0),
+        "connect_timeout": _env_float("HTTP_CONNECT_TIMEOUT", 5.0),
+        "read_timeout": _env_float("HTTP_READ_TIMEOUT", 600.0),
+    }
+
+
+def _limits(settings):
+    import httpx
+    return httpx.Limits(
+        max_connections=settings["max_connections"],
+        max_keepalive_connections=settings["max_keepalive_connections"],
+        keepalive_expiry=settings["keepalive_expiry"],
+    )
+
+
+def _timeout(settings):
+    import httpx
+    return httpx.Timeout(
+        settings["read_timeout"],
+        connect=settings["connect_timeout"],
+    )
+
+
+class _CompletionsProxy:
+    def __init__(self, completions, create):
+        self._completions = completions
+        self.create = create
+
+    def __getattr__(self, name):
+        return getattr(self._completions, name)
+
+
+class _ChatProxy:
+    def __init__(self, chat, create):
+        self._chat = chat
+        self.completions = _CompletionsProxy(chat.completions, create)
+
+    def __getattr__(self, name):
+        return getattr(self._chat, name)
+
+
+class _ClientProxy:
+    def __init__(self, client, wrapper):
+        self._client = client
+        self._wrapper = wrapper
+        self.chat = _ChatProxy(client.chat, wrapper(client.chat.completions.create))
+
+    def with_options(self, **options):
+        # Copies of the client (e.g. with max_retries=0) keep the wrapper
+        return _ClientProxy(self._client.with_options(**options), self._wrapper)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+def wrap_completions(client, wrapper):
+    """Return a client whose chat.completions.create is wrapper(original_create)
+
+    Everything else on the client is passed through untouched, so wrapped
+    clients can be used anywhere a plain OpenAI client is expected.
+    """
+    return _ClientProxy(client, wrapper)
+
+
+def _apply_env_wrappers(client):
+    """Layer the opt-in wrappers enabled through the environment onto a client"""
+    from adaptive_limiter import limiter_from_env
+    from metrics import metrics_from_env
+    from response_cache import cache_from_env
+
+    # Metrics go innermost to time the backend alone; the limiter next so
+    # cache hits never wait for a slot
+    metrics = metrics_from_env()
+    if metrics is not None:
+        backend = str(client.base_url)
+        client = wrap_completions(client, lambda create: metrics.wrap(create, backend))
+    limiter = limiter_from_env()
+    if limiter is not None:
+        client = wrap_completions(client, limiter.wrap)
+    # The semantic cache needs numpy, so it is only imported when enabled
+    if os.getenv("GPT_OSS_SEMANTIC_CACHE"):
+        from semantic_cache import semantic_cache_from_env
+        semantic = semantic_cache_from_env()
+        namespace = str(client.base_url)
+        client = wrap_completions(client, lambda create: semantic.wrap(create, namespace))
+    # The exact-match cache goes outermost: it is the cheapest lookup
+    cache = cache_from_env()
+    if cache is not None:
+        namespace = str(client.base_url)
+        client = wrap_completions(client, lambda create: cache.wrap(create, namespace))
+    return client
+
+
+def _apply_async_env_wrappers(client):
+    """The subset of the environment wrappers that supports AsyncOpenAI (all but the cache)"""
+    from adaptive_limiter import limiter_from_env
+    from metrics import metrics_from_env
+
+    metrics = metrics_from_env()
+    if metrics is not None:
+        backend = str(client.base_url)
+        client = wrap_completions(client, lambda create: metrics.wrap_async(create, backend))
+    limiter = limiter_from_env()
+    if limiter is not None:
+        client = wrap_completions(client, limiter.wrap_async)
+    return client
+
+
+def _retry_options():
+    """SDK retry settings: none when the adaptive limiter has to see every 429 itself"""
+    from adaptive_limiter import limiter_from_env
+
+    # The limiter retries throttled requests once its Retry-After pause is over
+    return {"max_retries": 0} if limiter_from_env() is not None else {}
+
+
+def get_client(base_url=None, api_key=None):
+    """Return the shared OpenAI client for this base_url/api_key pair
+
+    Clients are created once per process and keep their connection pool
+    warm, so only the first request to an endpoint pays TCP/TLS setup.
+    Arguments left as None fall back to OPENAI_BASE_URL/OPENAI_API_KEY.
+    Setting GPT_OSS_RESPONSE_CACHE puts the response cache in front of
+    chat.completions.create, GPT_OSS_ADAPTIVE_LIMIT=1 routes it
+    through the shared adaptive concurrency limiter (and turns off the
+    SDK's own retries, so 429s reach it), GPT_OSS_SEMANTIC_CACHE answers
+    near-duplicate prompts, and GPT_OSS_METRICS=1 records per-request
+    metrics.
+    """
+    base_url = base_url or os.getenv("OPENAI_BASE_URL")
+    api_key = api_key or os.getenv("OPENAI_API_KEY")
+    key = (base_url, api_key)
+
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            import httpx
+            from openai import OpenAI
+            settings = http_settings()
+            http_client = httpx.Client(limits=_limits(settings), timeout=_timeout(settings))
+            client = OpenAI(
+                base_url=base_url,
+                api_key=api_key,
+                http_client=http_client,
+                timeout=_timeout(settings),
+                **_retry_options(),
+            )
+            client = _apply_env_wrappers(client)
+            _clients[key] = client
+        return client
+
+
+def get_async_client(base_url=None, api_key=None):
+    """Return the shared AsyncOpenAI client for the running event loop
+
+    httpx async connections are bound to the loop that opened them, so the
+    cache is kept per loop and released when the loop goes away. The
+    GPT_OSS_ADAPTIVE_LIMIT and GPT_OSS_METRICS wrappers apply here too,
+    sharing the limiter with the sync clients; the response cache does not.
+    """
+    base_url = base_url or os.getenv("OPENAI_BASE_URL")
+    api_key = api_key or os.getenv("OPENAI_API_KEY")
+    key = (base_url, api_key)
+    loop = asyncio.get_running_loop()
+
+    with _lock:
+        clients = _async_clients.setdefault(loop, {})
+        client = clients.get(key)
+        if client is None:
+            import httpx
+            from openai import AsyncOpenAI
+            settings = http_settings()
+            http_client = httpx.AsyncClient(limits=_limits(settings), timeout=_timeout(settings))
+            client = AsyncOpenAI(
+                base_url=base_url,
+                api_key=api_key,
+                http_client=http_client,
+                timeout=_timeout(settings),
+                **_retry_options(),
+            )
+            client = _apply_async_env_wrappers(client)
+            clients[key] = client
+        return client
+
+
+async def close_async_clients():
+    """Close the pooled async clients owned by the running event loop"""
+    with _lock:
+        clients = _async_clients.pop(asyncio.get_running_loop(), {})
+    for client in clients.values():
+        await client.close()
+
+
+def close_clients():
+    """Close every pooled client and drop it from the cache"""
+    with _lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        client.close()
+
+
+def env_report():
+    """Reports from the opt-in environment wrappers that are enabled, or ""
+
+    The wrappers never print on their own; scripts call this (or
+    print_env_report) when they finish.
+    """
+    from adaptive_limiter import limiter_from_env
+    from metrics import metrics_from_env
+    from response_cache import cache_from_env
+
+    reports = []
+    metrics = metrics_from_env()
+    if metrics is not None:
+        reports.append("=== Request Metrics ===\n" + metrics.summary())
+    limiter = limiter_from_env()
+    if limiter is not None:
+        reports.append(limiter.report())
+    cache = cache_from_env()
+    if cache is not None:
+        reports.append(cache.report())
+    if os.getenv("GPT_OSS_SEMANTIC_CACHE"):
+        from semantic_cache import semantic_cache_from_env
+        reports.append(semantic_cache_from_env().stats.report())
+    return "\n".join(reports)
+
+
+def print_env_report():
+    """Print env_report() after a blank line, if any wrapper is enabled"""
+    report = env_report()
+    if report:
+        print(f"\n{report}")
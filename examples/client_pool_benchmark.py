@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Client Pool Benchmark for GPT OSS
+Compares warm pooled connections against a fresh OpenAI() client per call
+"""
+
+import argparse
+import statistics
+import time
+
+from openai import OpenAI
+
+from client_pool import close_clients, get_client
+from mock_server import MockConfig, start_mock_server
+
+
+def _request(client):
+    client.chat.completions.create(
+        model="gpt-oss-20b",
+        messages=[{"role": "user", "content": "ping"}],
+        max_tokens=1,
+    )
+
+
+def time_calls(make_client, calls):
+    """Time `calls` sequential requests, building the client via make_client each time"""
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        client = make_client()
+        _request(client)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def summarize(name, latencies):
+    """Print mean/p50/p95 latency in milliseconds"""
+    ordered = sorted(latencies)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    print(
+        f"{name:<18} mean={statistics.mean(ordered) * 1000:7.2f}ms "
+        f"p50={statistics.median(ordered) * 1000:7.2f}ms "
+        f"p95={p95 * 1000:7.2f}ms"
+    )
+
+
+def run_benchmark(calls=200):
+    """Run both strategies against a zero-latency local mock server"""
+    server = start_mock_server(MockConfig(ttft=0.0, token_delay=0.0, completion_tokens=1))
+    base_url = server.base_url
+    try:
+        def per_call_client():
+            return OpenAI(base_url=base_url, api_key="mock")
+
+        def pooled_client():
+            return get_client(base_url=base_url, api_key="mock")
+
+        # Warm the pooled connection once so the comparison is steady-state
+        _request(pooled_client())
+
+        print(f"=== {calls} sequential calls against {base_url} ===")
+        summarize("per-call OpenAI()", time_calls(per_call_client, calls))
+        summarize("pooled get_client", time_calls(pooled_client, calls))
+    finally:
+        close_clients()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=200, help="requests per strategy")
+    args = parser.parse_args()
+    run_benchmark(args.calls)
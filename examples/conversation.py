@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Token-Budgeted Conversation for GPT OSS
+Multi-turn history with cached token counts, a sliding window and a hard context limit
+"""
+
+import argparse
+import collections
+import time
+from dataclasses import dataclass
+
+# Chat-format framing per message (<|start|>role<|message|>...<|end|>) and reply priming
+MESSAGE_OVERHEAD = 4
+REPLY_OVERHEAD = 3
+
+
+class ContextOverflow(ValueError):
+    """The pinned messages and the newest turn alone do not fit the context"""
+
+
+class Tokenizer:
+    """Counts tokens locally with tiktoken's o200k_base (the gpt-oss vocabulary)
+
+    Falls back to a 4-characters-per-token estimate when tiktoken is not
+    installed or its vocabulary file cannot be fetched (first use only;
+    tiktoken caches it afterwards).
+    """
+
+    def __init__(self):
+        self.name = "estimate"
+        self._encode = None
+        try:
+            import tiktoken
+            self._encode = tiktoken.get_encoding("o200k_base").encode_ordinary
+            self.name = "tiktoken/o200k_base"
+        except Exception:
+            pass
+
+    def count(self, text):
+        if not text:
+            return 0
+        if self._encode is None:
+            return max(1, (len(text) + 3) // 4)
+        return len(self._encode(text))
+
+
+@dataclass
+class Message:
+    """One message with its token count, computed once"""
+
+    role: str
+    content: str
+    tokens: int
+
+    def to_dict(self):
+        return {"role": self.role, "content": self.content}
+
+
+class Conversation:
+    """Chat history that fits a token budget
+
+    Each message is tokenized once when it is added and the window total
+    is kept as a running sum, so building a request costs nothing per
+    message already seen. The system prompt is always sent. When the
+    window exceeds `budget` (default: whatever the context has left after
+    `max_tokens` of output), the oldest whole turns are evicted, but never
+    the latest one; a user message too large to fit the context with the
+    pinned messages raises ContextOverflow instead. If a
+    `summarize(evicted, previous_summary)` hook is given, its result is
+    kept as a pinned summary message in their place. Before each request
+    `max_tokens` is clamped to what the context still has room for.
+    """
+
+    def __init__(self, system=None, context_limit=8192, max_tokens=1000, budget=None,
+                 summarize=None, min_output_tokens=64, tokenizer=None):
+        self.tokenizer = tokenizer or Tokenizer()
+        self.context_limit = context_limit
+        self.max_tokens = max_tokens
+        self.budget = budget or context_limit - max_tokens - REPLY_OVERHEAD
+        self.summarize = summarize
+        self.min_output_tokens = min_output_tokens
+        self.system = self._message("system", system) if system else None
+        self.summary = None
+        self._window = collections.deque()
+        self._window_tokens = 0
+        self.evicted = 0
+        self.turn_prompt_tokens = []
+
+    def _message(self, role, content):
+        return Message(role, content, self.tokenizer.count(content) + MESSAGE_OVERHEAD)
+
+    @property
+    def pinned_tokens(self):
+        return sum(message.tokens for message in (self.system, self.summary) if message)
+
+    @property
+    def prompt_tokens(self):
+        """Tokens the next request will send, including reply priming"""
+        return self.pinned_tokens + self._window_tokens + REPLY_OVERHEAD
+
+    def add(self, role, content):
+        message = self._message(role, content)
+        if role == "user":
+            prompt = self.pinned_tokens + message.tokens + REPLY_OVERHEAD
+            if self.context_limit - prompt < self.min_output_tokens:
+                raise ContextOverflow(
+                    f"a {message.tokens}-token message with {self.pinned_tokens} pinned tokens "
+                    f"leaves {self.context_limit - prompt} of {self.context_limit} for output")
+        self._window.append(message)
+        self._window_tokens += message.tokens
+        self._fit()
+        return message
+
+    def _latest_turn(self):
+        """Messages from the newest user message on (just the newest message if there is none)"""
+        for length, message in enumerate(reversed(self._window), 1):
+            if message.role == "user":
+                return length
+        return min(1, len(self._window))
+
+    def _fit(self):
+        evicted = []
+        keep = self._latest_turn()
+        while len(self._window) > keep and self.pinned_tokens + self._window_tokens > self.budget:
+            # Evict whole turns so the window never starts with an orphaned reply
+            message = self._window.popleft()
+            self._window_tokens -= message.tokens
+            evicted.append(message)
+            while len(self._window) > keep and self._window[0].role != "user":
+                message = self._window.popleft()
+                self._window_tokens -= message.tokens
+                evicted.append(message)
+        if not evicted:
+            return
+        self.evicted += len(evicted)
+        if self.summarize is not None:
+            previous = self.summary.content if self.summary else None
+            text = self.summarize([message.to_dict() for message in evicted], previous)
+            self.summary = self._message("system", f"Summary of the earlier conversation: {text}")
+            if self.pinned_tokens + self._window_tokens > self.budget:
+                self._fit()
+
+    def messages(self):
+        """The message list to send"""
+        pinned = [message.to_dict() for message in (self.system, self.summary) if message]
+        return pinned + [message.to_dict() for message in self._window]
+
+    def output_budget(self):
+        """max_tokens clamped to the room the context has left"""
+        room = self.context_limit - self.prompt_tokens
+        if room < self.min_output_tokens:
+            raise ContextOverflow(
+                f"{self.prompt_tokens} prompt tokens leave {room} of {self.context_limit} for output")
+        return min(self.max_tokens, room)
+
+    def ask(self, client, content, **request):
+        """Add a user turn, send the window and record the assistant's reply"""
+        self.add("user", content)
+        max_tokens = self.output_budget()
+        self.turn_prompt_tokens.append(self.prompt_tokens)
+        response = client.chat.completions.create(
+            messages=self.messages(), max_tokens=max_tokens, **request)
+        reply = response.choices[0].message.content or ""
+        self.add("assistant", reply)
+        return reply
+
+
+def summarize_with(client, model="gpt-oss-20b", max_tokens=200):
+    """A summarize hook that asks the model to condense evicted turns"""
+
+    def summarize(evicted, previous):
+        transcript = "\n".join(f"{message['role']}: {message['content']}" for message in evicted)
+        if previous:
+            transcript = f"Earlier summary: {previous}\n{transcript}"
+        response = client.chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": "Reasoning: low. Summarize the conversation in a few sentences, keeping names, numbers and decisions."},
+                {"role": "user", "content": transcript},
+            ],
+            max_tokens=max_tokens,
+        )
+        return response.choices[0].message.content or ""
+
+    return summarize
+
+
+def benchmark(turns=200, context_limit=8192, max_tokens=512):
+    """Prompt tokens per turn for full history versus the budgeted window"""
+    tokenizer = Tokenizer()
+    system = "You are a helpful math tutor. Always show your step-by-step reasoning before giving the final answer."
+    question = "If a train travels {0} km in 2 hours, and then 180 km in 3 hours, what is the average speed?"
+    answer = ("The total distance is {0} + 180 km and the total time is 5 hours, "
+              "so the average speed is the total distance divided by 5 hours. ") * 3
+
+    conversation = Conversation(system, context_limit, max_tokens, tokenizer=tokenizer)
+    full_history = [system]
+    full_tokens = []
+    start = time.perf_counter()
+    for turn in range(turns):
+        conversation.add("user", question.format(turn))
+        conversation.turn_prompt_tokens.append(conversation.prompt_tokens)
+        conversation.add("assistant", answer.format(turn))
+    windowed_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for turn in range(turns):
+        full_history.append(question.format(turn))
+        # What a naive client pays: re-tokenize and resend everything, every turn
+        full_tokens.append(sum(tokenizer.count(text) + MESSAGE_OVERHEAD for text in full_history)
+                           + REPLY_OVERHEAD)
+        full_history.append(answer.format(turn))
+    recount_time = time.perf_counter() - start
+
+    print(f"=== {turns} turns, context {context_limit}, max_tokens {max_tokens}, "
+          f"tokenizer {tokenizer.name} ===")
+    print(f"{'turn':>6} {'full history':>14} {'windowed':>10}")
+    for turn in (1, 10, 25, 50, 100, 200, 500, 1000):
+        if turn <= turns:
+            print(f"{turn:>6} {full_tokens[turn - 1]:>14} {conversation.turn_prompt_tokens[turn - 1]:>10}"
+                  + ("  (over context limit)" if full_tokens[turn - 1] + max_tokens > context_limit else ""))
+    print(f"total prompt tokens: full {sum(full_tokens):,} vs windowed "
+          f"{sum(conversation.turn_prompt_tokens):,} ({conversation.evicted} messages evicted)")
+    print(f"counting cost: {windowed_time * 1000:.1f}ms cached vs {recount_time * 1000:.1f}ms "
+          f"re-tokenizing the history each turn")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prompt tokens per turn with a token-budgeted window")
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--context-limit", type=int, default=8192)
+    parser.add_argument("--max-tokens", type=int, default=512)
+    args = parser.parse_args()
+
+    benchmark(args.turns, args.context_limit, args.max_tokens)
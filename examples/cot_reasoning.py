@@ -4,18 +4,27 @@ Chain of Thought Reasoning Example for GPT OSS
 Demonstrates reasoning capabilities with different effort levels
 """
 
+import argparse
 import os
-from openai import OpenAI
+from budget_router import BudgetRouter
+from client_pool import get_client, print_env_report
+from fan_out import run_fan_out
+from harmony import add_reasoning_flag, print_final, set_show_reasoning, split_channels
+from request_executor import RequestExecutor
+from streaming import add_stream_flag, set_streaming
 
 def math_reasoning_example():
     """Example of mathematical reasoning with step-by-step thinking"""
     print("=== Mathematical Reasoning Example ===")
     
-    client = OpenAI()
+    client = get_client()
     
     math_problem = "If a train travels 120 km in 2 hours, and then 180 km in 3 hours, what is the average speed for the entire journey?"
     
-    response = client.chat.completions.create(
+    print(f"Problem: {math_problem}")
+    print_final(
+        client,
+        prefix="Solution: ",
         model="gpt-oss-120b",
         messages=[
             {
@@ -30,15 +39,12 @@ def math_reasoning_example():
         max_tokens=400,
         temperature=0.3
     )
-    
-    print(f"Problem: {math_problem}")
-    print(f"Solution: {response.choices[0].message.content}")
 
 def logical_reasoning_example():
     """Example of logical reasoning"""
     print("\n=== Logical Reasoning Example ===")
     
-    client = OpenAI()
+    client = get_client()
     
     logic_puzzle = """
     Three people are in a room: Alice, Bob, and Charlie. 
@@ -49,7 +55,10 @@ def logical_reasoning_example():
     If exactly one person is telling the truth, who is it?
     """
     
-    response = client.chat.completions.create(
+    print(f"Puzzle: {logic_puzzle}")
+    print_final(
+        client,
+        prefix="Analysis: ",
         model="gpt-oss-20b",
         messages=[
             {
@@ -64,15 +73,12 @@ def logical_reasoning_example():
         max_tokens=300,
         temperature=0.2
     )
-    
-    print(f"Puzzle: {logic_puzzle}")
-    print(f"Analysis: {response.choices[0].message.content}")
 
 def reasoning_levels_comparison():
     """Compare different reasoning effort levels"""
     print("\n=== Reasoning Levels Comparison ===")
     
-    client = OpenAI()
+    client = get_client()
     
     question = "Explain why the sky appears blue during the day but red during sunset."
     
@@ -81,7 +87,8 @@ def reasoning_levels_comparison():
     for level in reasoning_levels:
         print(f"\n--- Reasoning Level: {level.upper()} ---")
         
-        response = client.chat.completions.create(
+        print_final(
+            client,
             model="gpt-oss-120b",
             messages=[
                 {
@@ -96,14 +103,47 @@ def reasoning_levels_comparison():
             max_tokens=200,
             temperature=0.5
         )
-        
-        print(response.choices[0].message.content)
+
+def reasoning_levels_comparison_concurrent(max_concurrency=3):
+    """Compare reasoning effort levels with all levels requested at once"""
+    print("\n=== Reasoning Levels Comparison (concurrent) ===")
+    
+    question = "Explain why the sky appears blue during the day but red during sunset."
+    
+    requests = [
+        (level, {
+            "model": "gpt-oss-120b",
+            "messages": [
+                {
+                    "role": "system",
+                    "content": f"Reasoning: {level}. Provide an explanation appropriate for this reasoning level."
+                },
+                {
+                    "role": "user",
+                    "content": question
+                }
+            ],
+            "max_tokens": 200,
+            "temperature": 0.5,
+        })
+        for level in ["low", "medium", "high"]
+    ]
+    
+    # Retry transient failures (429s, 5xx, dropped connections) within a per-request deadline
+    executor = RequestExecutor(deadline=120.0)
+    run = run_fan_out(requests, max_concurrency=max_concurrency, executor=executor)
+    
+    for result in run.results:
+        print(f"\n--- Reasoning Level: {result.label.upper()} ---")
+        print(split_channels(result.content or "")[1] if result.error is None else f"Error: {result.error}")
+    print("\nLatency:")
+    run.report()
 
 def code_reasoning_example():
     """Example of reasoning about code"""
     print("\n=== Code Reasoning Example ===")
     
-    client = OpenAI()
+    client = get_client()
     
     code_snippet = """
     def mystery_function(n):
@@ -115,7 +155,10 @@ def code_reasoning_example():
     print(result)
     """
     
-    response = client.chat.completions.create(
+    print(f"Code: {code_snippet}")
+    print_final(
+        client,
+        prefix="Analysis: ",
         model="gpt-oss-120b",
         messages=[
             {
@@ -130,11 +173,46 @@ def code_reasoning_example():
         max_tokens=250,
         temperature=0.3
     )
-    
-    print(f"Code: {code_snippet}")
-    print(f"Analysis: {response.choices[0].message.content}")
+
+def budgeted_reasoning_example(latency_budget, log_path=None):
+    """Let the router pick model and reasoning effort per problem within a latency budget"""
+    print(f"\n=== Budgeted Reasoning Example ({latency_budget:.0f}s budget) ===")
+    
+    router = BudgetRouter(get_client(), log_path=log_path)
+    problems = [
+        "What is the capital of France?",
+        "If a train travels 120 km in 2 hours, and then 180 km in 3 hours, what is the average speed for the entire journey?",
+        "Three people are in a room: Alice, Bob, and Charlie. Alice says Bob is lying, Bob says Charlie is lying and Charlie says Alice is lying. If exactly one person is telling the truth, who is it?",
+    ]
+    
+    for problem in problems:
+        response, decision = router.create(
+            [{"role": "user", "content": problem}],
+            latency_budget=latency_budget,
+            max_tokens=400,
+            temperature=0.3
+        )
+        print(f"\nProblem: {problem}")
+        print(f"Routed to {decision.model} / {decision.effort} ({decision.kind}): {decision.reason}")
+        print(f"Answer: {split_channels(response.choices[0].message.content or '')[1]}")
+    print("\nLatency by model and effort:")
+    print(router.report())
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="GPT OSS Chain of Thought Reasoning Examples")
+    parser.add_argument("--concurrent", action="store_true",
+                        help="request all reasoning levels concurrently")
+    parser.add_argument("--latency-budget", type=float, metavar="SECONDS",
+                        help="also route problems by model and effort within this budget")
+    parser.add_argument("--decision-log", help="append routing decisions to this JSONL file")
+    add_stream_flag(parser)
+    add_reasoning_flag(parser)
+    args = parser.parse_args()
+    if args.stream:
+        set_streaming(True)
+    if args.show_reasoning:
+        set_show_reasoning(True)
+    
     if not os.getenv("OPENAI_API_KEY"):
         print("Error: Please set your OPENAI_API_KEY environment variable")
         exit(1)
@@ -145,8 +223,15 @@ if __name__ == "__main__":
     try:
         math_reasoning_example()
         logical_reasoning_example()
-        reasoning_levels_comparison()
+        if args.concurrent:
+            reasoning_levels_comparison_concurrent()
+        else:
+            reasoning_levels_comparison()
         code_reasoning_example()
+        if args.latency_budget:
+            budgeted_reasoning_example(args.latency_budget, args.decision_log)
     except Exception as e:
         print(f"Error: {e}")
-        print("Make sure you have access to the gpt-oss models and your API key is valid.") 
\ No newline at end of file
+        print("Make sure you have access to the gpt-oss models and your API key is valid.") 
+    finally:
+        print_env_report()
\ No newline at end of file
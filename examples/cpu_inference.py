@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+CPU Inference for GPT OSS
+Dynamic int8 quantization and core-matched threading for CPU-only Transformers deployments
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from model_registry import ModelKey, load_pipeline
+
+# Fixed prompts for the accuracy-drift check; greedy decoding keeps them deterministic
+DRIFT_PROMPTS = [
+    "What is the capital of France?",
+    "Explain quantum computing in simple terms.",
+    "If a train travels 120 km in 2 hours, what is its average speed?",
+    "Write a Python function that returns the factorial of n.",
+    "Why does the sky appear blue during the day?",
+    "List three uses of machine learning in medicine.",
+    "Translate 'good morning' into Spanish and French.",
+    "What is the difference between a list and a tuple in Python?",
+]
+
+
+def physical_cores():
+    """Physical cores this process may run on (hyperthread siblings counted once)"""
+    try:
+        allowed = os.sched_getaffinity(0)
+    except AttributeError:
+        allowed = set(range(os.cpu_count() or 1))
+    try:
+        cores = set()
+        cpu = physical = None
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                name = name.strip()
+                if name == "processor":
+                    cpu, physical = int(value), "0"
+                elif name == "physical id":
+                    physical = value.strip()
+                elif name == "core id" and cpu in allowed:
+                    cores.add((physical, value.strip()))
+        if cores:
+            return len(cores)
+    except OSError:
+        pass
+    # No topology information (macOS, containers hiding it): assume no SMT
+    return len(allowed)
+
+
+def configure_threads(threads=None):
+    """Match torch's intra-op threads to physical cores; returns the count used
+
+    Hyperthreads share a core's vector units, so running more GEMM threads
+    than physical cores only adds contention. OMP_NUM_THREADS and
+    MKL_NUM_THREADS are set too, which only takes effect if torch has not
+    been imported yet, so call this first thing.
+    """
+    threads = threads or int(os.getenv("GPT_OSS_CPU_THREADS", 0)) or physical_cores()
+    os.environ.setdefault("OMP_NUM_THREADS", str(threads))
+    os.environ.setdefault("MKL_NUM_THREADS", str(threads))
+    import torch
+    torch.set_num_threads(threads)
+    try:
+        # One inter-op thread: generation is a chain of dependent ops
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # Only allowed before any parallel work has started
+        pass
+    return threads
+
+
+def _conv1d_to_linear(model):
+    """Swap GPT-2 style Conv1D layers for nn.Linear so dynamic quantization sees them"""
+    import torch
+    from transformers.pytorch_utils import Conv1D
+
+    for module in list(model.modules()):
+        for name, child in list(module.named_children()):
+            if isinstance(child, Conv1D):
+                in_features, out_features = child.weight.shape
+                linear = torch.nn.Linear(in_features, out_features, bias=child.bias is not None)
+                linear.weight.data = child.weight.data.t().contiguous()
+                if child.bias is not None:
+                    linear.bias.data = child.bias.data
+                setattr(module, name, linear)
+    return model
+
+
+def _int8_linear_class():
+    import torch
+
+    class Int8Linear(torch.nn.Module):
+        """A dynamically quantized nn.Linear inside a model that stays in bf16/fp32"""
+
+        def __init__(self, module):
+            super().__init__()
+            # A float32 copy, so weights shared with other modules keep their dtype
+            linear = torch.nn.Linear(module.in_features, module.out_features, bias=module.bias is not None)
+            linear.weight.data = module.weight.data.float()
+            if module.bias is not None:
+                linear.bias.data = module.bias.data.float()
+            linear.qconfig = torch.ao.quantization.per_channel_dynamic_qconfig
+            self.linear = torch.ao.nn.quantized.dynamic.Linear.from_float(linear)
+
+        def forward(self, x):
+            # Quantized kernels take float32 activations
+            return self.linear(x.float()).to(x.dtype)
+
+    return Int8Linear
+
+
+def quantize_int8(model):
+    """Dynamically quantize every nn.Linear to int8 weights, in place on CPU
+
+    Weights are stored as int8 with per-channel scales; activations are
+    quantized on the fly per batch, so no calibration data is needed.
+    Layers are converted one at a time, so peak memory is the loaded
+    model plus one float32 layer. The output head, where int8 costs the
+    most accuracy, and everything that is not nn.Linear (embeddings,
+    norms, and gpt-oss's MoE expert tensors) keep the dtype they were
+    loaded in.
+    """
+    import torch
+
+    engines = torch.backends.quantized.supported_engines
+    # fbgemm/x86 on Intel and AMD, qnnpack on ARM edge boards
+    for engine in ("x86", "fbgemm", "qnnpack"):
+        if engine in engines:
+            torch.backends.quantized.engine = engine
+            break
+    int8_linear = _int8_linear_class()
+    model = _conv1d_to_linear(model.cpu())
+    head = model.get_output_embeddings()
+    for module in list(model.modules()):
+        for name, child in list(module.named_children()):
+            if isinstance(child, torch.nn.Linear) and child is not head:
+                setattr(module, name, int8_linear(child))
+    return model
+
+
+def load_cpu_pipeline(model, mode="int8", threads=None):
+    """A pipeline for CPU-only nodes: "int8" (default), "float32" or "bfloat16" weights"""
+    configure_threads(threads)
+    return load_pipeline(ModelKey(model, mode, "cpu"))
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024 if platform.system() == "Darwin" else 1024)
+
+
+def _encode(tokenizer, prompt):
+    if tokenizer.chat_template:
+        return tokenizer.apply_chat_template([{"role": "user", "content": prompt}], add_generation_prompt=True,
+                                             return_tensors="pt", return_dict=False)
+    return tokenizer(prompt, return_tensors="pt").input_ids
+
+
+def run_mode(model, mode, max_new_tokens, threads, reference=None):
+    """Load `model` in `mode`, time greedy generation and compare it with `reference`
+
+    Drift is measured teacher-forced: the reference (fp32) continuation is
+    fed back in and we count the positions where this mode's top-1 token
+    agrees, so one early divergence does not hide how close the rest is.
+    """
+    import torch
+
+    start = time.perf_counter()
+    pipe = load_cpu_pipeline(model, mode, threads)
+    load_seconds = time.perf_counter() - start
+    tokenizer, lm = pipe.tokenizer, pipe.model
+    pad = tokenizer.pad_token_id if tokenizer.pad_token_id is not None else tokenizer.eos_token_id
+    encoded = [_encode(tokenizer, prompt) for prompt in DRIFT_PROMPTS]
+
+    with torch.inference_mode():
+        lm.generate(encoded[0], max_new_tokens=4, do_sample=False, pad_token_id=pad)
+        generated, tokens = [], 0
+        start = time.perf_counter()
+        for ids in encoded:
+            out = lm.generate(ids, max_new_tokens=max_new_tokens, min_new_tokens=max_new_tokens,
+                              do_sample=False, pad_token_id=pad)
+            continuation = out[0, ids.shape[1]:].tolist()
+            generated.append(continuation)
+            tokens += len(continuation)
+        elapsed = time.perf_counter() - start
+
+        agreement = exact = None
+        if reference is not None:
+            matches = positions = exact = 0
+            for ids, ref in zip(encoded, reference):
+                full = torch.cat([ids, torch.tensor([ref])], dim=1)
+                predicted = lm(full).logits[0, ids.shape[1] - 1:-1].argmax(-1).tolist()
+                matches += sum(p == r for p, r in zip(predicted, ref))
+                positions += len(ref)
+            exact = sum(g == r for g, r in zip(generated, reference)) / len(reference)
+            agreement = matches / positions
+
+    return {
+        "mode": mode,
+        "threads": torch.get_num_threads(),
+        "load_seconds": load_seconds,
+        "tokens_per_second": tokens / elapsed,
+        "peak_rss_mb": _peak_rss_mb(),
+        "agreement": agreement,
+        "exact": exact,
+        "generated": generated,
+    }
+
+
+def benchmark(model="HuggingFaceTB/SmolLM2-135M-Instruct", modes=("float32", "bfloat16", "int8"),
+              max_new_tokens=32, threads=None, min_agreement=0.9):
+    """Tokens/sec, peak RSS and drift per mode; returns False if int8 drifted too far
+
+    Each mode runs in its own process so peak RSS is not inherited from
+    the previous model. float32 runs first and is the reference.
+    """
+    results = []
+    reference_path = os.path.join(tempfile.mkdtemp(prefix="gpt-oss-cpu-"), "reference.json")
+    for mode in ("float32",) + tuple(m for m in modes if m != "float32"):
+        command = [sys.executable, os.path.abspath(__file__), "--worker", mode, "--model", model,
+                   "--max-new-tokens", str(max_new_tokens), "--reference", reference_path]
+        if threads:
+            command += ["--threads", str(threads)]
+        output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        if mode == "float32":
+            with open(reference_path, "w") as f:
+                json.dump(result["generated"], f)
+        results.append(result)
+
+    baseline = results[0]
+    print(f"=== {model} on CPU, {baseline['threads']} threads "
+          f"({physical_cores()} physical cores), {max_new_tokens} new tokens x {len(DRIFT_PROMPTS)} prompts ===")
+    print(f"{'mode':<10} {'load':>7} {'tok/s':>8} {'speedup':>8} {'peak RSS':>10} {'top-1 agree':>12} {'exact':>7}")
+    for result in results:
+        agreement = "-" if result["agreement"] is None else f"{result['agreement']:.1%}"
+        exact = "-" if result["exact"] is None else f"{result['exact']:.0%}"
+        print(f"{result['mode']:<10} {result['load_seconds']:>6.1f}s {result['tokens_per_second']:>8.1f} "
+              f"{result['tokens_per_second'] / baseline['tokens_per_second']:>7.2f}x "
+              f"{result['peak_rss_mb']:>8.0f}MB {agreement:>12} {exact:>7}")
+
+    int8 = next((result for result in results if result["mode"] == "int8"), None)
+    if int8 is not None and int8["agreement"] < min_agreement:
+        print(f"\nFAIL: int8 top-1 agreement {int8['agreement']:.1%} is below {min_agreement:.0%}")
+        return False
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark CPU inference modes and check int8 drift")
+    parser.add_argument("--model", default="HuggingFaceTB/SmolLM2-135M-Instruct")
+    parser.add_argument("--modes", default="float32,bfloat16,int8", help="comma-separated")
+    parser.add_argument("--max-new-tokens", type=int, default=32)
+    parser.add_argument("--threads", type=int, help="default: physical cores (or GPT_OSS_CPU_THREADS)")
+    parser.add_argument("--min-agreement", type=float, default=0.9,
+                        help="fail if int8's teacher-forced top-1 agreement with float32 is lower")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--reference", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        reference = None
+        if args.worker != "float32":
+            with open(args.reference) as f:
+                reference = json.load(f)
+        print(json.dumps(run_mode(args.model, args.worker, args.max_new_tokens, args.threads, reference)))
+    elif not benchmark(args.model, tuple(args.modes.split(",")), args.max_new_tokens,
+                       args.threads, args.min_agreement):
+        sys.exit(1)
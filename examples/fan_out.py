@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Concurrent Fan-Out for GPT OSS
+Runs several chat completions at once on AsyncOpenAI under a bounded semaphore
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+
+from client_pool import close_async_clients, get_async_client
+
+
+@dataclass
+class TimedResult:
+    """One completion from a fan-out run, with its own latency"""
+
+    label: str
+    latency: float
+    response: object = None
+    error: Exception = None
+
+    @property
+    def content(self):
+        if self.response is None:
+            return None
+        return self.response.choices[0].message.content
+
+
+@dataclass
+class FanOutRun:
+    """All results of a fan-out run, in the order the requests were given"""
+
+    results: list = field(default_factory=list)
+    wall_time: float = 0.0
+
+    @property
+    def sequential_time(self):
+        """What the same calls would have cost one after the other"""
+        return sum(result.latency for result in self.results)
+
+    def report(self):
+        """Print per-call latency and the whole-run wall time"""
+        for result in self.results:
+            status = "ok" if result.error is None else f"error: {result.error}"
+            print(f"  {result.label:<24} {result.latency * 1000:8.1f}ms  {status}")
+        print(
+            f"  wall time {self.wall_time * 1000:.1f}ms "
+            f"(sequential would be ~{self.sequential_time * 1000:.1f}ms)"
+        )
+
+
+async def _timed_call(create, semaphore, label, request):
+    async with semaphore:
+        start = time.perf_counter()
+        try:
+            response = await create(**request)
+            return TimedResult(label, time.perf_counter() - start, response=response)
+        except Exception as e:
+            return TimedResult(label, time.perf_counter() - start, error=e)
+
+
+async def fan_out(requests, max_concurrency=4, base_url=None, api_key=None, executor=None):
+    """Send (label, request_kwargs) pairs concurrently
+
+    Results come back in the same order as `requests` regardless of which
+    call finishes first; failures are captured per call instead of aborting
+    the whole run. Pass a request_executor.RequestExecutor to give every
+    call a deadline, retries and hedging.
+    """
+    if executor is not None:
+        create = executor.create
+    else:
+        create = get_async_client(base_url=base_url, api_key=api_key).chat.completions.create
+    semaphore = asyncio.Semaphore(max_concurrency)
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *(_timed_call(create, semaphore, label, request) for label, request in requests)
+    )
+    return FanOutRun(results=list(results), wall_time=time.perf_counter() - start)
+
+
+def run_fan_out(requests, max_concurrency=4, base_url=None, api_key=None, executor=None):
+    """Synchronous entry point for scripts: run fan_out() in a fresh event loop"""
+
+    async def _main():
+        try:
+            return await fan_out(requests, max_concurrency, base_url, api_key, executor)
+        finally:
+            await close_async_clients()
+
+    return asyncio.run(_main())
@@ -4,38 +4,86 @@ Function Calling Example for GPT OSS
 Demonstrates how to use function calling with gpt-oss models
 """
 
+import argparse
 import os
-import json
-from openai import OpenAI
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone as dt_timezone
+from client_pool import get_client, print_env_report
+from function_registry import ArgumentError, FunctionRegistry
+from streaming import add_stream_flag, set_streaming
+from streaming_arguments import stream_tool_calls
+from tool_agent import run_tool_agent
+
+def get_weather(location, unit="fahrenheit"):
+    """Stand-in weather backend (sleeps like a slow remote API)"""
+    time.sleep(0.5)
+    return {"location": location, "temperature": 72 if unit == "fahrenheit" else 22, "unit": unit,
+            "conditions": "partly cloudy"}
+
+def get_time(timezone):
+    """Stand-in time backend (sleeps like a slow remote API)"""
+    time.sleep(0.5)
+    return {"timezone": timezone, "utc_time": datetime.now(dt_timezone.utc).isoformat(timespec="seconds")}
+
+# Every schema is compiled once here and reused to validate the model's arguments
+registry = FunctionRegistry()
+registry.register(
+    "get_weather",
+    {
+        "type": "object",
+        "properties": {
+            "location": {
+                "type": "string",
+                "description": "The city and state, e.g. San Francisco, CA"
+            },
+            "unit": {
+                "type": "string",
+                "enum": ["celsius", "fahrenheit"],
+                "default": "fahrenheit",
+                "description": "The temperature unit to use"
+            }
+        },
+        "required": ["location"]
+    },
+    handler=get_weather,
+    description="Get current weather information for a location",
+)
+registry.register(
+    "calculate",
+    {
+        "type": "object",
+        "properties": {
+            "expression": {
+                "type": "string",
+                "description": "The mathematical expression to evaluate"
+            }
+        },
+        "required": ["expression"]
+    },
+    description="Perform mathematical calculations",
+)
+registry.register(
+    "get_time",
+    {
+        "type": "object",
+        "properties": {
+            "timezone": {"type": "string"}
+        },
+        "required": ["timezone"]
+    },
+    handler=get_time,
+    description="Get current time for a timezone",
+)
 
 def weather_function_example():
     """Example of function calling with a weather function"""
     print("=== Weather Function Example ===")
     
-    client = OpenAI()
-    
-    # Define the function
-    functions = [
-        {
-            "name": "get_weather",
-            "description": "Get current weather information for a location",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "location": {
-                        "type": "string",
-                        "description": "The city and state, e.g. San Francisco, CA"
-                    },
-                    "unit": {
-                        "type": "string",
-                        "enum": ["celsius", "fahrenheit"],
-                        "description": "The temperature unit to use"
-                    }
-                },
-                "required": ["location"]
-            }
-        }
-    ]
+    client = get_client()
+    
+    # Look up the function definition
+    functions = registry.functions(["get_weather"])
     
     # Make the request
     response = client.chat.completions.create(
@@ -53,10 +101,14 @@ def weather_function_example():
         print(f"Function called: {function_call.name}")
         print(f"Arguments: {function_call.arguments}")
         
-        # Parse the arguments
-        args = json.loads(function_call.arguments)
-        print(f"Location: {args.get('location')}")
-        print(f"Unit: {args.get('unit', 'fahrenheit')}")
+        # Parse and validate the arguments against the compiled schema
+        try:
+            args = registry.validate(function_call.name, function_call.arguments)
+        except ArgumentError as e:
+            print(f"Invalid arguments: {e}")
+            return
+        print(f"Location: {args['location']}")
+        print(f"Unit: {args['unit']}")
     else:
         print("No function call requested")
         print(response.choices[0].message.content)
@@ -65,24 +117,9 @@ def calculator_example():
     """Example of function calling with a calculator function"""
     print("\n=== Calculator Function Example ===")
     
-    client = OpenAI()
-    
-    functions = [
-        {
-            "name": "calculate",
-            "description": "Perform mathematical calculations",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "expression": {
-                        "type": "string",
-                        "description": "The mathematical expression to evaluate"
-                    }
-                },
-                "required": ["expression"]
-            }
-        }
-    ]
+    client = get_client()
+    
+    functions = registry.functions(["calculate"])
     
     response = client.chat.completions.create(
         model="gpt-oss-20b",
@@ -96,7 +133,12 @@ def calculator_example():
     if response.choices[0].message.function_call:
         function_call = response.choices[0].message.function_call
         print(f"Function called: {function_call.name}")
-        print(f"Expression: {json.loads(function_call.arguments)['expression']}")
+        try:
+            args = registry.validate(function_call.name, function_call.arguments)
+        except ArgumentError as e:
+            print(f"Invalid arguments: {e}")
+            return
+        print(f"Expression: {args['expression']}")
     else:
         print("No function call requested")
         print(response.choices[0].message.content)
@@ -105,32 +147,9 @@ def multiple_functions_example():
     """Example with multiple available functions"""
     print("\n=== Multiple Functions Example ===")
     
-    client = OpenAI()
-    
-    functions = [
-        {
-            "name": "get_weather",
-            "description": "Get weather information",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "location": {"type": "string"}
-                },
-                "required": ["location"]
-            }
-        },
-        {
-            "name": "get_time",
-            "description": "Get current time for a timezone",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "timezone": {"type": "string"}
-                },
-                "required": ["timezone"]
-            }
-        }
-    ]
+    client = get_client()
+    
+    functions = registry.functions(["get_weather", "get_time"])
     
     response = client.chat.completions.create(
         model="gpt-oss-120b",
@@ -149,7 +168,76 @@ def multiple_functions_example():
         print("No function call requested")
         print(response.choices[0].message.content)
 
+def parallel_tools_example():
+    """Answer the Tokyo question with parallel tool calls in one round trip"""
+    print("\n=== Parallel Tool Calls Example ===")
+    
+    client = get_client()
+    
+    tools = registry.tools(["get_weather", "get_time"])
+    
+    run = run_tool_agent(
+        client,
+        messages=[
+            {"role": "user", "content": "What's the weather in Tokyo and what time is it there?"}
+        ],
+        tools=tools,
+        handlers=registry.handlers,
+        model="gpt-oss-120b",
+    )
+    
+    for result in run.results:
+        print(f"Tool {result.name}({result.arguments}) -> {result.error or result.result}")
+    print(f"Answer: {run.content}")
+    print(run.report())
+
+def streaming_arguments_example():
+    """Start slow tool backends while the model is still streaming its arguments"""
+    print("\n=== Streaming Function Arguments Example ===")
+    
+    client = get_client()
+    
+    tools = registry.tools(["get_weather"])
+    started = []
+    
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        def on_ready(name, fields, elapsed):
+            # Required fields are complete: kick off the backend now
+            print(f"{name} ready after {elapsed * 1000:.0f}ms with {fields}")
+            started.append((name, fields, pool.submit(registry.dispatch, name, fields)))
+        
+        start = time.perf_counter()
+        calls = stream_tool_calls(
+            client,
+            on_ready,
+            model="gpt-oss-120b",
+            messages=[
+                {"role": "user", "content": "What's the weather like in New York?"}
+            ],
+            tools=tools,
+        )
+        print(f"Stream finished after {(time.perf_counter() - start) * 1000:.0f}ms")
+        for name, arguments in calls:
+            early = next((entry for entry in started
+                          if entry[0] == name and entry[1].items() <= arguments.items()), None)
+            if early is not None:
+                started.remove(early)
+            print(f"Function called: {name}")
+            print(f"Arguments: {arguments}")
+            if early is not None and early[1] == arguments:
+                print(f"Result: {early[2].result()}")
+            else:
+                # Optional arguments arrived after the required ones, so the early call missed them
+                print(f"Result (re-dispatched with the final arguments): {registry.dispatch(name, arguments)}")
+        print(f"Total with early start: {(time.perf_counter() - start) * 1000:.0f}ms")
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="GPT OSS Function Calling Examples")
+    add_stream_flag(parser)
+    args = parser.parse_args()
+    if args.stream:
+        set_streaming(True)
+    
     if not os.getenv("OPENAI_API_KEY"):
         print("Error: Please set your OPENAI_API_KEY environment variable")
         exit(1)
@@ -161,6 +249,10 @@ if __name__ == "__main__":
         weather_function_example()
         calculator_example()
         multiple_functions_example()
+        parallel_tools_example()
+        streaming_arguments_example()
     except Exception as e:
         print(f"Error: {e}")
-        print("Make sure you have access to the gpt-oss models and your API key is valid.") 
\ No newline at end of file
+        print("Make sure you have access to the gpt-oss models and your API key is valid.") 
+    finally:
+        print_env_report()
\ No newline at end of file
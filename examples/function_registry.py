@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Function Registry for GPT OSS
+Compiles each function's JSON schema once and validates model arguments before dispatch
+"""
+
+import hashlib
+import json
+import re
+import threading
+import time
+
+_compiled = {}
+_by_identity = {}
+_IDENTITY_CACHE_SIZE = 1024
+_compiled_lock = threading.Lock()
+
+_TYPE_NAMES = {
+    "string": str,
+    "integer": int,
+    "number": (int, float),
+    "boolean": bool,
+    "object": dict,
+    "array": list,
+    "null": type(None),
+}
+
+
+class ArgumentError(ValueError):
+    """The model's arguments do not match the function's schema"""
+
+    def __init__(self, path, message):
+        super().__init__(f"{path or '<root>'}: {message}")
+        self.path = path
+
+
+def schema_hash(schema):
+    """Stable hash of a schema, used as the compiled-validator cache key"""
+    canonical = json.dumps(schema, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def _coerce_scalar(kind, value):
+    """Lenient conversions for values models commonly send as strings"""
+    if kind == "integer":
+        if isinstance(value, str) and re.fullmatch(r"\s*-?\d+\s*", value):
+            return int(value)
+        if isinstance(value, float) and value.is_integer():
+            return int(value)
+    elif kind == "number":
+        if isinstance(value, str):
+            try:
+                return float(value)
+            except ValueError:
+                pass
+    elif kind == "boolean":
+        if isinstance(value, str) and value.lower() in ("true", "false"):
+            return value.lower() == "true"
+    elif kind == "string":
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return str(value)
+    return value
+
+
+def _check_type(kind, value):
+    # bool is a subclass of int, so it never satisfies integer/number
+    if kind in ("integer", "number") and isinstance(value, bool):
+        return False
+    return isinstance(value, _TYPE_NAMES[kind])
+
+
+def _compile(schema):
+    """Build a closure that validates and coerces one value against `schema`"""
+    kinds = schema.get("type")
+    if isinstance(kinds, str):
+        kinds = [kinds]
+    enum = schema.get("enum")
+    enum_set = set(enum) if enum is not None and all(
+        isinstance(item, (str, int, float, bool, type(None))) for item in enum) else None
+    minimum = schema.get("minimum")
+    maximum = schema.get("maximum")
+    min_length = schema.get("minLength")
+    max_length = schema.get("maxLength")
+    pattern = re.compile(schema["pattern"]) if "pattern" in schema else None
+
+    properties = {name: _compile(sub) for name, sub in schema.get("properties", {}).items()}
+    defaults = {name: sub["default"] for name, sub in schema.get("properties", {}).items()
+                if "default" in sub}
+    required = tuple(schema.get("required", ()))
+    additional = schema.get("additionalProperties", True)
+    additional_validator = _compile(additional) if isinstance(additional, dict) else None
+    items = _compile(schema["items"]) if isinstance(schema.get("items"), dict) else None
+
+    def validate(value, path=""):
+        # A value that already has one of the allowed types is kept as is; only
+        # otherwise is it coerced, so ["string", "integer"] leaves 5 an integer
+        if kinds is not None and not any(_check_type(kind, value) for kind in kinds):
+            for kind in kinds:
+                candidate = _coerce_scalar(kind, value)
+                if _check_type(kind, candidate):
+                    value = candidate
+                    break
+            else:
+                raise ArgumentError(path, f"expected {' or '.join(kinds)}, got {type(value).__name__}")
+
+        if enum is not None:
+            try:
+                allowed = value in enum_set if enum_set is not None else value in enum
+            except TypeError:
+                allowed = value in enum
+            if not allowed:
+                raise ArgumentError(path, f"must be one of {enum}, got {value!r}")
+
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            if minimum is not None and value < minimum:
+                raise ArgumentError(path, f"must be >= {minimum}")
+            if maximum is not None and value > maximum:
+                raise ArgumentError(path, f"must be <= {maximum}")
+        elif isinstance(value, str):
+            if min_length is not None and len(value) < min_length:
+                raise ArgumentError(path, f"must be at least {min_length} characters")
+            if max_length is not None and len(value) > max_length:
+                raise ArgumentError(path, f"must be at most {max_length} characters")
+            if pattern is not None and not pattern.search(value):
+                raise ArgumentError(path, f"does not match {pattern.pattern!r}")
+        elif isinstance(value, dict):
+            for name in required:
+                if name not in value:
+                    raise ArgumentError(f"{path}.{name}" if path else name, "is required")
+            result = dict(defaults)
+            for name, item in value.items():
+                item_path = f"{path}.{name}" if path else name
+                validator = properties.get(name)
+                if validator is not None:
+                    result[name] = validator(item, item_path)
+                elif additional_validator is not None:
+                    result[name] = additional_validator(item, item_path)
+                elif additional is False:
+                    raise ArgumentError(item_path, "is not an allowed property")
+                else:
+                    result[name] = item
+            value = result
+        elif isinstance(value, list) and items is not None:
+            value = [items(item, f"{path}[{i}]") for i, item in enumerate(value)]
+        return value
+
+    return validate
+
+
+def compile_schema(schema):
+    """Return the cached validator for a schema, compiling it on first use
+
+    Equal schemas share one validator via their hash; the very same dict
+    object is recognised by identity first, which skips re-hashing.
+    Schemas are treated as immutable once compiled.
+    """
+    entry = _by_identity.get(id(schema))
+    if entry is not None and entry[0] is schema:
+        return entry[1]
+    key = schema_hash(schema)
+    with _compiled_lock:
+        validator = _compiled.get(key)
+        if validator is None:
+            validator = _compile(schema)
+            _compiled[key] = validator
+        if len(_by_identity) >= _IDENTITY_CACHE_SIZE:
+            _by_identity.clear()
+        _by_identity[id(schema)] = (schema, validator)
+    return validator
+
+
+class FunctionRegistry:
+    """Function definitions, their compiled validators and their handlers"""
+
+    def __init__(self):
+        self._definitions = {}
+        self._validators = {}
+        self._handlers = {}
+
+    def register(self, name, parameters, handler=None, description=""):
+        """Add a function; its schema is compiled (or fetched from cache) right away"""
+        self._definitions[name] = {"name": name, "description": description, "parameters": parameters}
+        self._validators[name] = compile_schema(parameters)
+        if handler is not None:
+            self._handlers[name] = handler
+        return handler
+
+    def function(self, parameters, description="", name=None):
+        """Decorator form of register()"""
+        def decorator(handler):
+            return self.register(name or handler.__name__, parameters, handler, description)
+        return decorator
+
+    def functions(self, names=None):
+        """Definitions in the legacy `functions=` format"""
+        names = names or list(self._definitions)
+        return [self._definitions[name] for name in names]
+
+    def tools(self, names=None):
+        """Definitions in the `tools=` format"""
+        return [{"type": "function", "function": definition} for definition in self.functions(names)]
+
+    def validate(self, name, arguments):
+        """Parse (if needed), validate and coerce arguments for `name`"""
+        validator = self._validators.get(name)
+        if validator is None:
+            raise ArgumentError(name, "unknown function")
+        if isinstance(arguments, str):
+            try:
+                arguments = json.loads(arguments or "{}")
+            except json.JSONDecodeError as e:
+                raise ArgumentError("", f"invalid JSON: {e}") from e
+        return validator(arguments)
+
+    def dispatch(self, name, arguments):
+        """Validate arguments and call the registered handler"""
+        arguments = self.validate(name, arguments)
+        handler = self._handlers.get(name)
+        if handler is None:
+            raise ArgumentError(name, "no handler registered")
+        return handler(**arguments)
+
+    @property
+    def handlers(self):
+        """Validating handlers keyed by name, for tool_agent.run_tool_agent"""
+        return {name: self._validated(name) for name in self._handlers}
+
+    def _validated(self, name):
+        def handler(**arguments):
+            return self.dispatch(name, arguments)
+        return handler
+
+
+def benchmark_validation(iterations=100000):
+    """Print the per-call cost of validation, compilation and cache lookups"""
+    schema = {
+        "type": "object",
+        "properties": {
+            "location": {"type": "string", "minLength": 1},
+            "unit": {"type": "string", "enum": ["celsius", "fahrenheit"], "default": "fahrenheit"},
+            "days": {"type": "integer", "minimum": 1, "maximum": 14},
+        },
+        "required": ["location"],
+        "additionalProperties": False,
+    }
+    arguments = {"location": "Tokyo", "unit": "celsius", "days": "3"}
+
+    start = time.perf_counter()
+    for _ in range(1000):
+        _compile(schema)
+    compile_cost = (time.perf_counter() - start) / 1000
+
+    compile_schema(schema)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        compile_schema(schema)
+    lookup_cost = (time.perf_counter() - start) / iterations
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        schema_hash(schema)
+    hash_cost = (time.perf_counter() - start) / iterations
+
+    validator = compile_schema(schema)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        validator(arguments)
+    validate_cost = (time.perf_counter() - start) / iterations
+
+    print("=== Function argument validation ===")
+    print(f"compile schema:        {compile_cost * 1e6:8.2f} us (once per schema)")
+    print(f"cached, same schema:   {lookup_cost * 1e6:8.2f} us")
+    print(f"cached, equal copy:    {hash_cost * 1e6:8.2f} us (schema hash)")
+    print(f"validate + coerce:     {validate_cost * 1e6:8.2f} us per call")
+    print(f"coerced result: {validator(arguments)}")
+
+
+if __name__ == "__main__":
+    benchmark_validation()
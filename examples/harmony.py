@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Harmony Channel Parser for GPT OSS
+Splits streamed output into reasoning (analysis) and answer (final) in a single pass
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+
+from streaming import StreamStats, streaming_enabled
+
+SPECIAL_TOKENS = frozenset((
+    "<|start|>", "<|end|>", "<|message|>", "<|channel|>", "<|constrain|>", "<|return|>", "<|call|>",
+))
+_LONGEST_TOKEN = max(map(len, SPECIAL_TOKENS))
+_END_TOKENS = frozenset(("<|end|>", "<|return|>", "<|call|>"))
+_HEADER_LIMIT = 256
+_CHANNEL = re.compile(r"<\|channel\|>\s*([\w-]+)")
+_RECIPIENT = re.compile(r"\bto=(\S+?)(?=<\||\s|$)")
+
+_show_reasoning = os.getenv("GPT_OSS_SHOW_REASONING", "").lower() in ("1", "true", "yes")
+
+
+def add_reasoning_flag(parser):
+    """Add the shared --show-reasoning flag to an example's argument parser"""
+    parser.add_argument("--show-reasoning", action="store_true",
+                        help="print the analysis channel (dimmed) before the answer "
+                             "(or set GPT_OSS_SHOW_REASONING=1)")
+
+
+def set_show_reasoning(enabled):
+    """Show or hide reasoning for every print_final() call"""
+    global _show_reasoning
+    _show_reasoning = bool(enabled)
+
+
+class HarmonyParser:
+    """Incremental parser for raw Harmony-format model output
+
+    Feed it text as it streams in, split anywhere (including inside a
+    special token). Message bodies are passed straight to the sink for
+    their channel: `on_final`, `on_analysis` or `on_commentary`. A channel
+    without a sink is counted and dropped, never stored. Only a possible
+    partial special token (at most 13 characters) and the current message
+    header (bounded) are held back between chunks. Text that arrives
+    before any Harmony token is treated as final, so content a server has
+    already split out passes through unchanged.
+    """
+
+    def __init__(self, on_final=None, on_analysis=None, on_commentary=None):
+        self.sinks = {"final": on_final, "analysis": on_analysis, "commentary": on_commentary}
+        self.channel = "final"
+        self.recipient = None
+        self.done = False
+        self.chars = {}
+        self._in_header = False
+        self._header = []
+        self._header_size = 0
+        self._pending = ""
+
+    def feed(self, text):
+        if self._pending:
+            text = self._pending + text
+            self._pending = ""
+        pos = 0
+        size = len(text)
+        while pos < size:
+            start = text.find("<|", pos)
+            if start < 0:
+                if text.endswith("<"):
+                    self._text(text[pos:-1])
+                    self._pending = "<"
+                else:
+                    self._text(text[pos:])
+                return
+            if start > pos:
+                self._text(text[pos:start])
+            end = text.find("|>", start + 2, start + _LONGEST_TOKEN)
+            if end < 0:
+                if size - start < _LONGEST_TOKEN:
+                    # Possibly a special token cut off by the chunk boundary
+                    self._pending = text[start:]
+                    return
+                self._text("<|")
+                pos = start + 2
+                continue
+            token = text[start:end + 2]
+            if token in SPECIAL_TOKENS:
+                self._special(token)
+            else:
+                self._text(token)
+            pos = end + 2
+
+    def close(self):
+        """Flush whatever was held back at the end of the stream"""
+        if self._pending:
+            pending, self._pending = self._pending, ""
+            self._text(pending)
+
+    def _text(self, text):
+        if not text:
+            return
+        if self._in_header:
+            if self._header_size < _HEADER_LIMIT:
+                self._header.append(text)
+                self._header_size += len(text)
+            return
+        if self.channel is None:
+            return
+        self.chars[self.channel] = self.chars.get(self.channel, 0) + len(text)
+        sink = self.sinks.get(self.channel)
+        if sink is not None:
+            sink(text)
+
+    def _special(self, token):
+        if token == "<|message|>":
+            header = "".join(self._header)
+            match = _CHANNEL.search(header)
+            self.channel = match.group(1) if match else "final"
+            match = _RECIPIENT.search(header)
+            self.recipient = match.group(1) if match else None
+            self._in_header = False
+            self._header = []
+            self._header_size = 0
+        elif token in _END_TOKENS:
+            self.channel = None
+            self._in_header = False
+            if token == "<|return|>":
+                self.done = True
+        elif token == "<|start|>":
+            self._in_header = True
+            self._header = []
+            self._header_size = 0
+        else:
+            # <|channel|> and <|constrain|> belong to the header being read
+            if not self._in_header:
+                self._in_header = True
+                self._header = []
+                self._header_size = 0
+            self._header.append(token)
+            self._header_size += len(token)
+
+
+def split_channels(text):
+    """(analysis, final) of a complete Harmony-format completion"""
+    analysis, final = [], []
+    parser = HarmonyParser(on_final=final.append, on_analysis=analysis.append)
+    parser.feed(text)
+    parser.close()
+    return "".join(analysis), "".join(final)
+
+
+@dataclass
+class ChannelStats(StreamStats):
+    """StreamStats where TTFT is the time to the first answer token"""
+
+    first_token: float = None
+    analysis_chars: int = 0
+
+    def report(self):
+        first = f"{self.first_token * 1000:.0f}ms" if self.first_token is not None else "n/a"
+        return (f"{super().report()} [first token {first} | "
+                f"{self.analysis_chars} reasoning chars]")
+
+
+def stream_final(client, out=sys.stdout, on_analysis=None, **request):
+    """Stream a chat completion, writing only the final answer to `out`
+
+    Reasoning arrives either as raw Harmony text in `content` or, on
+    servers that parse it themselves (vLLM, Ollama), in a separate
+    `reasoning_content`/`reasoning` delta field; both go to `on_analysis`
+    if given and are dropped otherwise. Returns (answer, ChannelStats).
+    """
+    request.setdefault("stream_options", {"include_usage": True})
+    stats = ChannelStats()
+    parts = []
+    usage = None
+    start = last = None
+
+    def on_final(text):
+        nonlocal last
+        now = time.perf_counter()
+        if stats.ttft is None:
+            stats.ttft = now - start
+        else:
+            stats.inter_token.append(now - last)
+        last = now
+        parts.append(text)
+        if out is not None:
+            out.write(text)
+            out.flush()
+
+    parser = HarmonyParser(on_final=on_final, on_analysis=on_analysis)
+    start = time.perf_counter()
+    for chunk in client.chat.completions.create(stream=True, **request):
+        if getattr(chunk, "usage", None):
+            usage = chunk.usage
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta
+        reasoning = getattr(delta, "reasoning_content", None) or getattr(delta, "reasoning", None)
+        if reasoning or delta.content:
+            if stats.first_token is None:
+                stats.first_token = time.perf_counter() - start
+            stats.tokens += 1
+        if reasoning:
+            stats.analysis_chars += len(reasoning)
+            if on_analysis is not None:
+                on_analysis(reasoning)
+        if delta.content:
+            parser.feed(delta.content)
+    parser.close()
+
+    stats.analysis_chars += parser.chars.get("analysis", 0)
+    stats.total_time = time.perf_counter() - start
+    if usage:
+        stats.tokens = usage.completion_tokens
+    return "".join(parts), stats
+
+
+class _AnswerWriter:
+    """Writes `prefix` (after a line break if reasoning was shown) before the first answer text"""
+
+    def __init__(self, prefix, newline):
+        self.prefix = f"\n{prefix}" if newline else prefix
+        self.started = False
+
+    def write(self, text):
+        if not self.started:
+            self.started = True
+            text = self.prefix + text
+        sys.stdout.write(text)
+
+    def flush(self):
+        sys.stdout.flush()
+
+
+def _print_reasoning(text):
+    sys.stdout.write(f"\033[2m{text}\033[0m")
+    sys.stdout.flush()
+
+
+def print_final(client, prefix="", show_reasoning=None, **request):
+    """print_completion() that prints the answer, and the reasoning if asked
+
+    Streams when streaming is enabled, otherwise splits the finished
+    message. Reasoning is shown per set_show_reasoning() unless
+    `show_reasoning` says otherwise. Returns the answer text.
+    """
+    if show_reasoning is None:
+        show_reasoning = _show_reasoning
+    if not streaming_enabled():
+        message = client.chat.completions.create(**request).choices[0].message
+        analysis, final = split_channels(message.content or "")
+        analysis = (getattr(message, "reasoning_content", None)
+                    or getattr(message, "reasoning", None) or analysis)
+        if show_reasoning and analysis:
+            print("Reasoning: ", end="")
+            _print_reasoning(analysis)
+            print()
+        print(f"{prefix}{final}")
+        return final
+
+    if show_reasoning:
+        print("Reasoning: ", end="", flush=True)
+    text, stats = stream_final(client, out=_AnswerWriter(prefix, show_reasoning),
+                               on_analysis=_print_reasoning if show_reasoning else None, **request)
+    print()
+    print(stats.report())
+    return text
+
+
+def _harmony_stream(analysis_words, final_words, rng):
+    """A synthetic raw Harmony completion, as (full text, random chunks)"""
+    words = "the model checks each step and the answer is forty two".split()
+    analysis = " ".join(rng.choice(words) for _ in range(analysis_words))
+    final = " ".join(rng.choice(words) for _ in range(final_words))
+    text = (f"<|channel|>analysis<|message|>{analysis}<|end|>"
+            f"<|start|>assistant<|channel|>final<|message|>{final}<|return|>")
+    chunks = []
+    pos = 0
+    while pos < len(text):
+        step = rng.randint(1, 8)
+        chunks.append(text[pos:pos + step])
+        pos += step
+    return text, analysis, final, chunks
+
+
+def benchmark(analysis_words=200_000, final_words=200, seed=0):
+    """Check chunk-boundary handling, then time the parser and its memory use"""
+    rng = random.Random(seed)
+    _, analysis, final, chunks = _harmony_stream(2000, 50, rng)
+    got_analysis, got_final = [], []
+    parser = HarmonyParser(on_final=got_final.append, on_analysis=got_analysis.append)
+    for chunk in chunks:
+        parser.feed(chunk)
+    parser.close()
+    assert "".join(got_analysis) == analysis and "".join(got_final) == final and parser.done
+    print(f"correctness: {len(chunks)} random chunks of 1-8 chars parsed exactly")
+
+    text, _, final, chunks = _harmony_stream(analysis_words, final_words, rng)
+    print(f"\n=== {len(text) / 1e6:.1f} MB completion in {len(chunks):,} chunks ===")
+    print(f"{'mode':<26} {'MB/s':>8} {'peak memory':>12} {'answer after':>16}")
+    for label, keep in (("buffer then split", None), ("stream, keep reasoning", True),
+                        ("stream, drop reasoning", False)):
+        results = []
+        # Timed without tracemalloc, then measured with it
+        for traced in (False, True):
+            if traced:
+                tracemalloc.start()
+            start = time.perf_counter()
+            answer_at = len(chunks)
+            if keep is None:
+                answer = split_channels("".join(chunks))[1]
+            else:
+                kept, answer_parts = [], []
+                parser = HarmonyParser(on_final=answer_parts.append,
+                                       on_analysis=kept.append if keep else None)
+                for i, chunk in enumerate(chunks):
+                    parser.feed(chunk)
+                    if answer_parts and answer_at == len(chunks):
+                        answer_at = i + 1
+                parser.close()
+                answer = "".join(answer_parts)
+            results.append(time.perf_counter() - start)
+            if traced:
+                results.append(tracemalloc.get_traced_memory()[1])
+                tracemalloc.stop()
+            assert answer == final
+        elapsed, _, peak = results
+        print(f"{label:<26} {len(text) / elapsed / 1e6:>8.1f} {peak / 1e6:>10.2f}MB "
+              f"{answer_at / len(chunks):>9.1%} of stream")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the streaming Harmony channel parser")
+    parser.add_argument("--analysis-words", type=int, default=200_000)
+    parser.add_argument("--final-words", type=int, default=200)
+    args = parser.parse_args()
+
+    benchmark(args.analysis_words, args.final_words)
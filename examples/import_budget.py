@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Import-Time Budget Check for GPT OSS
+Fails when a command's startup imports exceed their budget or pull in heavy modules
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Heavy dependencies that only the commands needing them may import at startup
+HEAVY = ("torch", "transformers", "openai", "httpx", "numpy", "requests")
+
+# label -> (python arguments, budget in ms of imports beyond a bare interpreter, modules that must stay unloaded)
+BUDGETS = {
+    "cli --help": (["cli.py", "--help"], 30, HEAVY),
+    "cli chat --help": (["cli.py", "chat", "--help"], 120, HEAVY),
+    "cli reason --help": (["cli.py", "reason", "--help"], 120, HEAVY),
+    "cli functions --help": (["cli.py", "functions", "--help"], 120, HEAVY),
+    "cli tools --help": (["cli.py", "tools", "--help"], 120, HEAVY),
+    "cli local --help": (["cli.py", "local", "--help"], 120, HEAVY),
+    "cli batch --help": (["cli.py", "batch", "--help"], 120, HEAVY),
+    "import client_pool": (["-c", "import client_pool"], 80, HEAVY),
+}
+
+
+def imported(args):
+    """{module: self time in microseconds} from one `python -X importtime` run"""
+    # With a key set, a command that ignores --help runs its examples and is caught importing them
+    env = dict(os.environ, OPENAI_API_KEY=os.getenv("OPENAI_API_KEY") or "import-budget")
+    result = subprocess.run([sys.executable, "-X", "importtime", *args], cwd=HERE, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = int(self_us)
+    return modules
+
+
+def measure(args, baseline, runs):
+    """Median milliseconds of imports beyond the baseline, and the modules loaded"""
+    totals = []
+    for _ in range(runs):
+        modules = imported(args)
+        totals.append(sum(us for name, us in modules.items() if name not in baseline) / 1000)
+    return statistics.median(totals), set(modules)
+
+
+def check(runs=5, scale=1.0):
+    """Measure every budgeted command; returns the number of failures"""
+    # Warm the bytecode cache so the first measured run is not slower than the rest
+    for args, _, _ in BUDGETS.values():
+        imported(args)
+    baseline = set(imported(["-c", "pass"]))
+    failures = 0
+    print(f"{'command':<24} {'imports':>9} {'budget':>8}  result")
+    for label, (args, budget, forbidden) in BUDGETS.items():
+        elapsed, modules = measure(args, baseline, runs)
+        loaded = sorted(name for name in forbidden if name in modules)
+        over = elapsed > budget * scale
+        failed = over or loaded
+        failures += bool(failed)
+        reasons = []
+        if over:
+            reasons.append("over budget")
+        if loaded:
+            reasons.append(f"imports {', '.join(loaded)}")
+        print(f"{label:<24} {elapsed:>7.1f}ms {budget * scale:>6.0f}ms  "
+              f"{'FAIL: ' + '; '.join(reasons) if failed else 'ok'}")
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check startup import time against budgets")
+    parser.add_argument("--runs", type=int, default=5, help="runs per command; the median is compared")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="multiply every budget, e.g. 2 on a slow CI machine")
+    args = parser.parse_args()
+
+    failures = check(args.runs, args.scale)
+    if failures:
+        print(f"\n{failures} command(s) over their import budget")
+        sys.exit(1)
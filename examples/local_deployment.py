@@ -4,10 +4,18 @@ Local Deployment Example for GPT OSS
 Demonstrates how to run gpt-oss models locally
 """
 
+import argparse
+import asyncio
 import os
 import subprocess
 import sys
-from openai import OpenAI
+from backend_router import router_from_env
+from benchmark_suite import TARGETS, render_table, run_sweep
+from client_pool import get_client, print_env_report
+from cpu_inference import configure_threads
+from model_registry import get_pipeline, get_registry, preload_from_env
+from prefix_cache import MATH_TUTOR, CachedGenerator
+from streaming import add_stream_flag, print_completion, set_streaming
 
 def ollama_deployment():
     """Example using Ollama for local deployment"""
@@ -28,20 +36,21 @@ def ollama_deployment():
     print("   ollama run gpt-oss:20b")
     
     print("\n3. Use with OpenAI client:")
-    client = OpenAI(
+    client = get_client(
         base_url="http://localhost:11434/v1",
         api_key="ollama"  # Ollama doesn't require a real API key
     )
     
     try:
-        response = client.chat.completions.create(
+        print_completion(
+            client,
+            prefix="Response: ",
             model="gpt-oss:20b",
             messages=[
                 {"role": "user", "content": "Hello! How are you today?"}
             ],
             max_tokens=100
         )
-        print(f"Response: {response.choices[0].message.content}")
     except Exception as e:
         print(f"Error: {e}")
         print("Make sure Ollama is running with: ollama serve")
@@ -60,26 +69,27 @@ def vllm_deployment():
     print("   vllm serve openai/gpt-oss-20b")
     
     print("\n3. Use with OpenAI client:")
-    client = OpenAI(
+    client = get_client(
         base_url="http://localhost:8000/v1",
         api_key="dummy"  # vLLM doesn't require authentication
     )
     
     try:
-        response = client.chat.completions.create(
+        print_completion(
+            client,
+            prefix="Response: ",
             model="gpt-oss-20b",
             messages=[
                 {"role": "user", "content": "What is machine learning?"}
             ],
             max_tokens=150
         )
-        print(f"Response: {response.choices[0].message.content}")
     except Exception as e:
         print(f"Error: {e}")
         print("Make sure vLLM server is running")
 
-def transformers_deployment():
-    """Example using Transformers for local deployment"""
+def transformers_deployment(cpu=False, threads=None):
+    """Example using Transformers for local deployment (int8 on CPU-only nodes with cpu=True)"""
     print("\n=== Transformers Local Deployment ===")
     
     print("1. Install dependencies:")
@@ -111,15 +121,15 @@ print(outputs[0]["generated_text"][-1])
     
     # Try to run the example if transformers is available
     try:
-        from transformers import pipeline
         print("\n3. Running example...")
         
-        pipe = pipeline(
-            "text-generation",
-            model="openai/gpt-oss-20b",
-            torch_dtype="auto",
-            device_map="auto",
-        )
+        # Loaded once per process (or already loading via GPT_OSS_PRELOAD) and reused
+        if cpu:
+            threads = threads or configure_threads()
+            print(f"   CPU mode: int8 attention/router layers (MoE experts stay bf16), {threads} threads")
+            pipe = get_pipeline("openai/gpt-oss-20b", dtype="int8", device="cpu")
+        else:
+            pipe = get_pipeline("openai/gpt-oss-20b", dtype="auto", device="auto")
         
         messages = [
             {"role": "user", "content": "What is artificial intelligence?"}
@@ -128,6 +138,26 @@ print(outputs[0]["generated_text"][-1])
         outputs = pipe(messages, max_new_tokens=100)
         print(f"Response: {outputs[0]['generated_text'][-1]}")
         
+        print("\n4. Serve concurrent requests through a micro-batching gateway:")
+        print("   gateway = BatchingGateway(pipe, max_batch_size=8, max_wait_ms=10)")
+        print("   gateway.chat.completions.create(messages=messages, max_tokens=100)")
+        print("   Benchmark on CPU: python examples/batching_gateway.py --model sshleifer/tiny-gpt2")
+        
+        print("\n5. Later calls reuse the warm pipeline:")
+        print(get_registry().report())
+        print("   Benchmark on CPU: python examples/model_registry.py --model sshleifer/tiny-gpt2")
+        
+        print("\n6. Multi-turn chat that reuses the KV cache of the shared prefix:")
+        generator = CachedGenerator(pipe.model, pipe.tokenizer)
+        conversation = [{"role": "system", "content": MATH_TUTOR}]
+        for question in ["What is 15% of 240?", "And 20% of the same amount?"]:
+            conversation.append({"role": "user", "content": question})
+            reply = generator.generate(conversation, max_new_tokens=100)
+            conversation.append({"role": "assistant", "content": reply})
+            print(f"User: {question}\nAssistant: {reply}")
+        print(generator.report())
+        print("   Benchmark on CPU: python examples/prefix_cache.py --model sshleifer/tiny-gpt2")
+        
     except ImportError:
         print("Transformers not installed. Run: pip install transformers torch accelerate")
     except Exception as e:
@@ -145,37 +175,108 @@ def system_requirements():
     print("- gpt-oss-20b: 32GB RAM, 16GB VRAM")
     print("- gpt-oss-120b: 80GB VRAM, 4x H100 GPUs")
     
+    print("\nCPU-only (Transformers, --cpu):")
+    print("- gpt-oss-20b: 48GB RAM, 8+ physical cores with AVX2 (AVX-512/AMX or ARM NEON help)")
+    print("- int8 only covers the non-expert layers (attention and router Linears); the MoE experts,")
+    print("  almost all of gpt-oss's weights, stay bf16, so int8 barely changes its memory or speed")
+    print("- Expect a few tokens/sec; int8 pays off on dense models: python examples/cpu_inference.py")
+    
     print("\nDeployment Options:")
     print("1. Ollama: Easiest for consumer hardware")
     print("2. vLLM: Best performance, requires more resources")
     print("3. Transformers: Most flexible, slower inference")
 
+def _endpoint_reachable(base_url):
+    """Quick check that an OpenAI-compatible server is listening"""
+    import httpx
+    try:
+        httpx.get(f"{base_url}/models", timeout=1.0)
+        return True
+    except httpx.HTTPError:
+        return False
+
 def performance_comparison():
-    """Compare different deployment methods"""
+    """Measure the local deployments that are actually running"""
     print("\n=== Performance Comparison ===")
     
-    comparison = """
-    | Method      | Setup Difficulty | Speed | Memory | Best For |
-    |-------------|------------------|-------|--------|----------|
-    | Ollama      | Easy            | Fast  | Low    | Development |
-    | vLLM        | Medium          | Fast  | Medium | Production |
-    | Transformers| Easy            | Slow  | Low    | Research |
-    """
+    measured = False
+    for name, (base_url, api_key, model) in TARGETS.items():
+        if not _endpoint_reachable(base_url):
+            print(f"{name}: no server at {base_url}, skipping")
+            continue
+        
+        report = asyncio.run(run_sweep(
+            base_url, api_key, model,
+            concurrency=(1, 4),
+            prompt_words=(32,),
+            max_tokens=(64,),
+            requests=4,
+        ))
+        print(render_table(report))
+        print()
+        measured = True
+    
+    if not measured:
+        print("Start Ollama or vLLM to measure them here.")
+    print("For full sweeps, JSON output and regression checks run:")
+    print("   python examples/benchmark_suite.py --target ollama --save-baseline baseline.json")
+
+def multi_backend_routing():
+    """Route across every Ollama/vLLM replica listed in .env"""
+    print("\n=== Multi-Backend Routing ===")
+    print("List replicas in .env, e.g.:")
+    print("   OLLAMA_BASE_URLS=http://gpu1:11434/v1,http://gpu2:11434/v1")
+    print("   VLLM_BASE_URLS=http://gpu3:8000/v1")
+    
+    router = router_from_env(health_interval=0)
+    router.check_health()
     
-    print(comparison)
+    try:
+        response = router.chat.completions.create(
+            model="gpt-oss-20b",
+            messages=[
+                {"role": "user", "content": "Hello from the router!"}
+            ],
+            max_tokens=50
+        )
+        print(f"Response: {response.choices[0].message.content}")
+    except Exception as e:
+        print(f"Error: {e}")
+    finally:
+        print(router.report())
+        router.close()
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="GPT OSS Local Deployment Examples")
+    parser.add_argument("--cpu", action="store_true",
+                        help="run the Transformers example on CPU (int8 non-expert layers)")
+    add_stream_flag(parser)
+    args = parser.parse_args()
+    if args.stream:
+        set_streaming(True)
+    threads = None
+    if args.cpu:
+        # Thread counts only take effect before torch starts work, so before any preload
+        try:
+            threads = configure_threads()
+        except ImportError:
+            pass
+    # Start loading GPT_OSS_PRELOAD models while the other deployments are checked
+    preload_from_env()
+    
     print("GPT OSS Local Deployment Examples")
     print("=" * 40)
     
     ollama_deployment()
     vllm_deployment()
-    transformers_deployment()
+    transformers_deployment(cpu=args.cpu, threads=threads)
     system_requirements()
     performance_comparison()
+    multi_backend_routing()
     
     print("\n=== Next Steps ===")
     print("1. Choose your deployment method based on your hardware")
     print("2. Follow the installation instructions above")
     print("3. Test with the provided examples")
-    print("4. Check the official documentation for advanced features") 
\ No newline at end of file
+    print("4. Check the official documentation for advanced features") 
+    print_env_report()
\ No newline at end of file
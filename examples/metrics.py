@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+"""
+Metrics for GPT OSS
+Per-request latency, TTFT and token histograms with Prometheus exposition and JSONL traces
+"""
+
+import bisect
+import json
+import os
+import re
+import threading
+import time
+import weakref
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384)
+RATE_BUCKETS = (5, 10, 20, 40, 60, 80, 100, 150, 200, 300, 500)
+
+LABELS = ("model", "reasoning", "backend")
+
+_REASONING_LINE = re.compile(r"reasoning:\s*(low|medium|high)", re.IGNORECASE)
+
+
+def reasoning_level(request):
+    """The request's reasoning effort, from `reasoning_effort` or a "Reasoning: x" system line"""
+    effort = request.get("reasoning_effort")
+    if effort:
+        return effort
+    for message in request.get("messages", ()):
+        if isinstance(message, dict) and message.get("role") in ("system", "developer"):
+            match = _REASONING_LINE.search(message.get("content") or "")
+            if match:
+                return match.group(1).lower()
+    return "unset"
+
+
+class _Sharded:
+    """Per-thread shards of {labels: value}, merged when read
+
+    A shard whose thread has exited is folded into one retired total the
+    next time a shard is added or the values are read, so short-lived
+    threads do not leave a shard behind each.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = []
+        self._retired = {}
+        self._lock = threading.Lock()
+
+    def _shard(self):
+        try:
+            return self._local.series
+        except AttributeError:
+            series = self._local.series = {}
+            with self._lock:
+                self._reap()
+                self._shards.append((weakref.ref(threading.current_thread()), series))
+            return series
+
+    def _reap(self):
+        # Called with the lock held; a dead thread's shard no longer changes
+        live = []
+        for thread, shard in self._shards:
+            owner = thread()
+            if owner is not None and owner.is_alive():
+                live.append((thread, shard))
+            else:
+                self._merge(self._retired, shard)
+        self._shards = live
+
+    def _merged(self):
+        merged = {}
+        with self._lock:
+            self._reap()
+            self._merge(merged, self._retired)
+            shards = [shard for _, shard in self._shards]
+        for shard in shards:
+            self._merge(merged, shard)
+        return merged
+
+
+class Histogram(_Sharded):
+    """Fixed-bucket histogram keyed by label values
+
+    Each thread counts into its own shard, so observing is a bisect and
+    two in-place additions with no lock and no allocation once a label
+    combination has been seen; shards are only merged when read.
+    """
+
+    def __init__(self, name, help, buckets):
+        super().__init__()
+        self.name = name
+        self.help = help
+        self.bounds = tuple(float(bound) for bound in buckets)
+
+    @staticmethod
+    def _merge(merged, shard):
+        for labels, series in list(shard.items()):
+            total = merged.get(labels)
+            if total is None:
+                merged[labels] = list(series)
+            else:
+                for i, value in enumerate(series):
+                    total[i] += value
+
+    def observe(self, labels, value):
+        index = bisect.bisect_left(self.bounds, value)
+        shard = self._shard()
+        series = shard.get(labels)
+        if series is None:
+            # [count per bucket..., +Inf, sum]
+            series = shard[labels] = [0] * (len(self.bounds) + 1) + [0.0]
+        series[index] += 1
+        series[-1] += value
+
+    def samples(self):
+        """Merged series across threads: {labels: [bucket counts..., sum]}"""
+        return self._merged()
+
+    def quantile(self, labels, q):
+        """Estimate a quantile by interpolating inside its bucket"""
+        series = self.samples().get(labels)
+        if not series:
+            return None
+        counts = series[:-1]
+        rank = q * sum(counts)
+        seen = 0
+        for i, count in enumerate(counts):
+            if count and seen + count >= rank:
+                low = self.bounds[i - 1] if i else 0.0
+                high = self.bounds[i] if i < len(self.bounds) else low
+                return low + (high - low) * (rank - seen) / count
+            seen += count
+        return None
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, series in sorted(self.samples().items()):
+            base = _format_labels(labels)
+            cumulative = 0
+            for bound, count in zip(self.bounds + (float("inf"),), series[:-1]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                lines.append(f'{self.name}_bucket{{{base},le="{le}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{base}}} {series[-1]:g}")
+            lines.append(f"{self.name}_count{{{base}}} {cumulative}")
+        return lines
+
+
+class Counter(_Sharded):
+    """Monotonic counter keyed by label values, sharded per thread like Histogram"""
+
+    def __init__(self, name, help, labels=LABELS):
+        super().__init__()
+        self.name = name
+        self.help = help
+        self.labels = labels
+
+    @staticmethod
+    def _merge(merged, shard):
+        for labels, value in list(shard.items()):
+            merged[labels] = merged.get(labels, 0) + value
+
+    def inc(self, labels, amount=1):
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def values(self):
+        return self._merged()
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self.values().items()):
+            lines.append(f"{self.name}{{{_format_labels(labels, self.labels)}}} {value:g}")
+        return lines
+
+
+def _escape_label(value):
+    """Escape a label value as the Prometheus text format requires"""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(values, names=LABELS):
+    return ",".join(f'{name}="{_escape_label(value)}"' for name, value in zip(names, values))
+
+
+class Metrics:
+    """Request metrics for chat completions, with an optional JSONL trace
+
+    wrap() / wrap_async() instrument a chat.completions.create callable.
+    Every request records latency; streamed requests also record time to
+    first token; requests that return usage record prompt and completion
+    tokens and completion tokens per second. All series are labelled by
+    model, reasoning level and backend.
+    """
+
+    def __init__(self, trace_path=None):
+        self.latency = Histogram("gpt_oss_request_latency_seconds",
+                                 "Time from request to last byte", LATENCY_BUCKETS)
+        self.ttft = Histogram("gpt_oss_time_to_first_token_seconds",
+                              "Time from request to first content token (streaming only)",
+                              LATENCY_BUCKETS)
+        self.prompt_tokens = Histogram("gpt_oss_prompt_tokens", "Prompt tokens per request",
+                                       TOKEN_BUCKETS)
+        self.completion_tokens = Histogram("gpt_oss_completion_tokens",
+                                           "Completion tokens per request", TOKEN_BUCKETS)
+        self.tokens_per_second = Histogram("gpt_oss_completion_tokens_per_second",
+                                           "Completion tokens per second of request latency",
+                                           RATE_BUCKETS)
+        self.requests = Counter("gpt_oss_requests_total", "Requests by outcome",
+                                LABELS + ("status",))
+        self.histograms = (self.latency, self.ttft, self.prompt_tokens,
+                           self.completion_tokens, self.tokens_per_second)
+        self._trace = open(trace_path, "a", buffering=1) if trace_path else None
+        self._trace_lock = threading.Lock()
+        self._server = None
+
+    def record(self, labels, latency, ttft=None, usage=None, error=None):
+        """Record one finished request"""
+        self.latency.observe(labels, latency)
+        if ttft is not None:
+            self.ttft.observe(labels, ttft)
+        prompt = completion = None
+        if usage is not None:
+            prompt, completion = usage.prompt_tokens, usage.completion_tokens
+            self.prompt_tokens.observe(labels, prompt)
+            self.completion_tokens.observe(labels, completion)
+            if latency > 0:
+                self.tokens_per_second.observe(labels, completion / latency)
+        status = "ok" if error is None else type(error).__name__
+        self.requests.inc(labels + (status,))
+        if self._trace is not None:
+            event = {
+                "time": time.time(),
+                **dict(zip(LABELS, labels)),
+                "status": status,
+                "latency": latency,
+                "ttft": ttft,
+                "prompt_tokens": prompt,
+                "completion_tokens": completion,
+            }
+            with self._trace_lock:
+                self._trace.write(json.dumps(event) + "\n")
+
+    def wrap(self, create, backend=""):
+        """Instrument a synchronous chat.completions.create"""
+
+        def instrumented_create(**request):
+            labels = (request.get("model", ""), reasoning_level(request), backend)
+            start = time.perf_counter()
+            try:
+                response = create(**request)
+            except Exception as e:
+                self.record(labels, time.perf_counter() - start, error=e)
+                raise
+            if request.get("stream"):
+                return self._track_stream(response, labels, start)
+            self.record(labels, time.perf_counter() - start, usage=getattr(response, "usage", None))
+            return response
+
+        return instrumented_create
+
+    def _track_stream(self, stream, labels, start):
+        ttft = usage = error = None
+        try:
+            for chunk in stream:
+                if ttft is None and chunk.choices and chunk.choices[0].delta.content:
+                    ttft = time.perf_counter() - start
+                usage = getattr(chunk, "usage", None) or usage
+                yield chunk
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self.record(labels, time.perf_counter() - start, ttft, usage, error)
+
+    def wrap_async(self, create, backend=""):
+        """Instrument an AsyncOpenAI chat.completions.create"""
+
+        async def instrumented_create(**request):
+            labels = (request.get("model", ""), reasoning_level(request), backend)
+            start = time.perf_counter()
+            try:
+                response = await create(**request)
+            except Exception as e:
+                self.record(labels, time.perf_counter() - start, error=e)
+                raise
+            if request.get("stream"):
+                return self._track_async_stream(response, labels, start)
+            self.record(labels, time.perf_counter() - start, usage=getattr(response, "usage", None))
+            return response
+
+        return instrumented_create
+
+    async def _track_async_stream(self, stream, labels, start):
+        ttft = usage = error = None
+        try:
+            async for chunk in stream:
+                if ttft is None and chunk.choices and chunk.choices[0].delta.content:
+                    ttft = time.perf_counter() - start
+                usage = getattr(chunk, "usage", None) or usage
+                yield chunk
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self.record(labels, time.perf_counter() - start, ttft, usage, error)
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        for metric in self.histograms + (self.requests,):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        """One line per (model, reasoning, backend) with request count and percentiles"""
+        lines = []
+        for labels, series in sorted(self.latency.samples().items()):
+            count = sum(series[:-1])
+            p50 = self.latency.quantile(labels, 0.5)
+            p95 = self.latency.quantile(labels, 0.95)
+            ttft = self.ttft.quantile(labels, 0.5)
+            rate = self.tokens_per_second.quantile(labels, 0.5)
+            lines.append(
+                f"  {labels[0]:<14} reasoning={labels[1]:<7} {count:>5} requests  "
+                f"p50 {p50 * 1000:7.0f}ms  p95 {p95 * 1000:7.0f}ms"
+                + (f"  ttft p50 {ttft * 1000:6.0f}ms" if ttft is not None else "")
+                + (f"  {rate:5.1f} tok/s" if rate is not None else "")
+                + f"  [{labels[2]}]")
+        return "\n".join(lines)
+
+    def serve(self, port=9464, host="127.0.0.1"):
+        """Expose GET /metrics on a background thread"""
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self._server
+
+    def close(self):
+        if self._server is not None:
+            self._server.shutdown()
+        if self._trace is not None:
+            self._trace.close()
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def metrics_from_env():
+    """The process-wide Metrics configured by GPT_OSS_METRICS, or None
+
+    GPT_OSS_METRICS         1 to record metrics (client_pool.print_env_report prints a summary)
+    GPT_OSS_METRICS_PORT    serve /metrics on this port while the process runs
+    GPT_OSS_TRACE           append one JSON line per request to this file
+    """
+    global _shared
+    enabled = os.getenv("GPT_OSS_METRICS", "").lower() in ("1", "true", "yes")
+    port = os.getenv("GPT_OSS_METRICS_PORT")
+    trace = os.getenv("GPT_OSS_TRACE")
+    if not (enabled or port or trace):
+        return None
+    with _shared_lock:
+        if _shared is None:
+            _shared = Metrics(trace_path=trace)
+            if port:
+                _shared.serve(int(port))
+        return _shared
+
+
+def benchmark_overhead(events=1000000):
+    """Print the cost of recording one event"""
+    histogram = Histogram("bench", "", LATENCY_BUCKETS)
+    labels = ("gpt-oss-20b", "low", "http://localhost:8000/v1")
+    start = time.perf_counter()
+    for i in range(events):
+        histogram.observe(labels, (i % 1000) / 100)
+    observe_cost = (time.perf_counter() - start) / events
+
+    metrics = Metrics()
+    usage = type("Usage", (), {"prompt_tokens": 120, "completion_tokens": 64})()
+    start = time.perf_counter()
+    for i in range(events // 10):
+        metrics.record(labels, 0.8, ttft=0.1, usage=usage)
+    record_cost = (time.perf_counter() - start) / (events // 10)
+
+    print("=== Metrics overhead ===")
+    print(f"histogram observe:   {observe_cost * 1e9:6.0f} ns per event")
+    print(f"full request record: {record_cost * 1e9:6.0f} ns (5 histograms + counter)")
+
+
+if __name__ == "__main__":
+    benchmark_overhead()
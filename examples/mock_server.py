@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+"""
+Mock OpenAI-Compatible Server for GPT OSS
+Offline stand-in for /v1/chat/completions with a latency model and fault injection
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+VOCABULARY = (
+    "the model reasons about each step before it answers and explains why "
+    "light scatters energy speed distance time result because therefore so "
+    "quantum bits can hold many states at once while classical bits cannot"
+).split()
+
+
+@dataclass
+class MockConfig:
+    """Latency model and fault injection settings
+
+    Each response waits `ttft` seconds before the first token and
+    `token_delay` seconds per token after it. A `slow_rate` fraction of
+    requests additionally stalls for `slow_delay` seconds before the first
+    token, which is what drives tail latency in the hedging experiments.
+    Faults are drawn from a seeded generator, so a run with the same seed
+    and request order fails the same requests every time. With a non-zero
+    `capacity`, requests beyond that many in flight are refused with 429,
+    like a server with a fixed number of slots. With `reasoning_tokens`,
+    content is raw Harmony output: that many analysis-channel tokens, then
+    the answer on the final channel, with the special tokens split across
+    deltas the way a byte-level stream can split them.
+    """
+
+    ttft: float = 0.05
+    token_delay: float = 0.005
+    completion_tokens: int = 64
+    slow_rate: float = 0.0
+    slow_delay: float = 2.0
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    retry_after: float = 1.0
+    capacity: int = 0
+    reasoning_tokens: int = 0
+    seed: int = 0
+
+
+def _request_seed(request):
+    canonical = json.dumps(request, sort_keys=True, default=str).encode()
+    return int.from_bytes(hashlib.sha256(canonical).digest()[:8], "big")
+
+
+def _last_user_text(messages):
+    for message in reversed(messages):
+        if message.get("role") == "user" and isinstance(message.get("content"), str):
+            return message["content"]
+    return ""
+
+
+def _sample_argument(name, schema, text, rng):
+    """Deterministic argument value guessed from the user's message"""
+    if "enum" in schema:
+        return schema["enum"][0]
+    kind = schema.get("type", "string")
+    if kind in ("integer", "number"):
+        numbers = re.findall(r"-?\d+(?:\.\d+)?", text)
+        value = float(numbers[0]) if numbers else float(rng.randint(1, 100))
+        return int(value) if kind == "integer" else value
+    if kind == "boolean":
+        return True
+    if name == "expression":
+        match = re.search(r"[\d\s\.\+\-\*/\(\)]{3,}", text)
+        return match.group(0).strip() if match else "1 + 1"
+    places = re.findall(r"\b(?:in|for|at) ([A-Z][\w]*(?: [A-Z][\w]*)*)", text)
+    if places:
+        return places[0]
+    words = re.findall(r"[A-Z][a-z]+", text)
+    return words[-1] if words else f"{name}-{rng.randint(0, 999)}"
+
+
+def _arguments_for(parameters, text, rng):
+    properties = (parameters or {}).get("properties", {})
+    required = (parameters or {}).get("required", list(properties))
+    return {name: _sample_argument(name, properties.get(name, {}), text, rng) for name in required}
+
+
+def plan_response(request):
+    """Decide what the mock assistant says: (content_tokens, tool_calls, function_call)
+
+    Requests with `tools` get one tool call per tool (parallel calls) unless
+    the conversation already ends in tool results; requests with legacy
+    `functions` get a single function_call. Everything else gets
+    deterministic text seeded by the request payload.
+    """
+    rng = random.Random(_request_seed(request))
+    messages = request.get("messages", [])
+    text = _last_user_text(messages)
+    answered = bool(messages) and messages[-1].get("role") in ("tool", "function")
+
+    tools = request.get("tools") or []
+    if tools and request.get("tool_choice") != "none" and not answered:
+        tool_calls = []
+        for tool in tools:
+            function = tool.get("function", {})
+            tool_calls.append({
+                "id": f"call_{rng.getrandbits(48):012x}",
+                "type": "function",
+                "function": {
+                    "name": function.get("name"),
+                    "arguments": json.dumps(_arguments_for(function.get("parameters"), text, rng)),
+                },
+            })
+        return [], tool_calls, None
+
+    functions = request.get("functions") or []
+    if functions and request.get("function_call") != "none" and not answered:
+        function = functions[0]
+        return [], None, {
+            "name": function.get("name"),
+            "arguments": json.dumps(_arguments_for(function.get("parameters"), text, rng)),
+        }
+
+    return None, None, None
+
+
+def _content_tokens(request, config):
+    rng = random.Random(_request_seed(request))
+    limit = request.get("max_tokens") or request.get("max_completion_tokens") or config.completion_tokens
+    count = max(1, min(limit, config.completion_tokens))
+    tokens = [(" " if i else "") + rng.choice(VOCABULARY) for i in range(count)]
+    if not config.reasoning_tokens:
+        return tokens
+    analysis = [(" " if i else "") + rng.choice(VOCABULARY) for i in range(config.reasoning_tokens)]
+    return (["<|chan", "nel|>analysis<|message|>"] + analysis
+            + ["<|end|><|start|>assistant<|channel|>fin", "al<|mess", "age|>"] + tokens + ["<|return|>"])
+
+
+def _argument_pieces(arguments):
+    """Split tool-call arguments into ~4-character pieces, one per streamed token"""
+    return [arguments[i:i + 4] for i in range(0, len(arguments), 4)] or [""]
+
+
+def _argument_tokens(tool_calls, function_call):
+    calls = [call["function"] for call in tool_calls or []]
+    if function_call:
+        calls.append(function_call)
+    return sum(len(_argument_pieces(call["arguments"])) for call in calls)
+
+
+def _prompt_tokens(request):
+    words = 0
+    for message in request.get("messages", []):
+        content = message.get("content")
+        if isinstance(content, str):
+            words += len(content.split())
+    return words
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    """Serves the OpenAI chat completions API from MockConfig"""
+
+    protocol_version = "HTTP/1.1"
+    server_version = "gpt-oss-mock/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._send_json(200, {"object": "list", "data": [
+                {"id": "gpt-oss-120b", "object": "model", "owned_by": "mock"},
+                {"id": "gpt-oss-20b", "object": "model", "owned_by": "mock"},
+            ]})
+        elif self.path.rstrip("/") in ("/health", "/v1/health"):
+            self._send_json(200, {"status": "ok"})
+        else:
+            self._send_json(404, {"error": {"message": f"unknown path {self.path}"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            self._send_json(400, {"error": {"message": "invalid JSON body", "type": "invalid_request_error"}})
+            return
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": f"unknown path {self.path}"}})
+            return
+
+        config = self.server.config
+        if not self.server.admit():
+            self._send_json(429, {"error": {"message": "Server at capacity (mock)", "type": "rate_limit_error"}},
+                            headers={"Retry-After": f"{config.retry_after:g}"})
+            return
+        try:
+            self._respond(request, config)
+        finally:
+            self.server.release()
+
+    def _respond(self, request, config):
+        fault = self.server.next_fault()
+        if fault == "rate_limit":
+            self._send_json(429, {"error": {"message": "Rate limit reached (mock)", "type": "rate_limit_error"}},
+                            headers={"Retry-After": f"{config.retry_after:g}"})
+            return
+        if fault == "error":
+            self._send_json(500, {"error": {"message": "Injected server error (mock)", "type": "server_error"}})
+            return
+
+        tokens, tool_calls, function_call = plan_response(request)
+        if tokens is None:
+            tokens = _content_tokens(request, config)
+        first_token_delay = config.ttft + (config.slow_delay if fault == "slow" else 0.0)
+
+        if request.get("stream"):
+            self._stream(request, tokens, tool_calls, function_call, first_token_delay)
+        else:
+            generated = len(tokens) + _argument_tokens(tool_calls, function_call)
+            time.sleep(first_token_delay + config.token_delay * max(0, generated - 1))
+            try:
+                self._send_json(200, self._completion(request, tokens, tool_calls, function_call))
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+    def _completion(self, request, tokens, tool_calls, function_call):
+        message = {"role": "assistant", "content": "".join(tokens) if tokens else None}
+        finish_reason = "stop"
+        if tool_calls:
+            message["tool_calls"] = tool_calls
+            finish_reason = "tool_calls"
+        if function_call:
+            message["function_call"] = function_call
+            finish_reason = "function_call"
+        prompt_tokens = _prompt_tokens(request)
+        completion_tokens = len(tokens) + _argument_tokens(tool_calls, function_call)
+        return {
+            "id": f"chatcmpl-mock-{_request_seed(request):016x}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "gpt-oss-20b"),
+            "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    def _stream(self, request, tokens, tool_calls, function_call, first_token_delay):
+        config = self.server.config
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        base = {
+            "id": f"chatcmpl-mock-{_request_seed(request):016x}",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": request.get("model", "gpt-oss-20b"),
+        }
+
+        def send(delta, finish_reason=None, usage=None):
+            chunk = dict(base, choices=[{"index": 0, "delta": delta, "finish_reason": finish_reason}])
+            if usage is not None:
+                chunk = dict(base, choices=[], usage=usage)
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+
+        deltas = [{"role": "assistant", "content": token} for token in tokens[:1]]
+        deltas += [{"content": token} for token in tokens[1:]]
+        for index, call in enumerate(tool_calls or []):
+            arguments = call["function"]["arguments"]
+            pieces = _argument_pieces(arguments)
+            deltas.append({"tool_calls": [{
+                "index": index, "id": call["id"], "type": "function",
+                "function": {"name": call["function"]["name"], "arguments": pieces[0]},
+            }]})
+            deltas += [{"tool_calls": [{"index": index, "function": {"arguments": piece}}]}
+                       for piece in pieces[1:]]
+        if function_call:
+            arguments = function_call["arguments"]
+            pieces = _argument_pieces(arguments)
+            deltas.append({"function_call": {"name": function_call["name"], "arguments": pieces[0]}})
+            deltas += [{"function_call": {"arguments": piece}} for piece in pieces[1:]]
+
+        try:
+            time.sleep(first_token_delay)
+            for i, delta in enumerate(deltas):
+                if i:
+                    time.sleep(config.token_delay)
+                send(delta)
+            finish_reason = "tool_calls" if tool_calls else "function_call" if function_call else "stop"
+            send({}, finish_reason=finish_reason)
+            if (request.get("stream_options") or {}).get("include_usage"):
+                prompt_tokens = _prompt_tokens(request)
+                completion_tokens = len(tokens) + _argument_tokens(tool_calls, function_call)
+                send(None, usage={
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                })
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # The client cancelled (e.g. a hedged request that lost the race)
+            pass
+
+
+class MockServer(ThreadingHTTPServer):
+    """HTTP server holding the shared config and the seeded fault generator"""
+
+    daemon_threads = True
+
+    def __init__(self, address, config):
+        super().__init__(address, MockHandler)
+        self.config = config
+        self.requests_served = 0
+        self.in_flight = 0
+        self.rejected = 0
+        self._rng = random.Random(config.seed)
+        self._lock = threading.Lock()
+
+    def admit(self):
+        """Take a slot for one request; False when the server is at capacity"""
+        with self._lock:
+            if self.config.capacity and self.in_flight >= self.config.capacity:
+                self.rejected += 1
+                return False
+            self.in_flight += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def next_fault(self):
+        """Draw the fault for the next request: None, 'slow', 'error' or 'rate_limit'"""
+        with self._lock:
+            self.requests_served += 1
+            roll = self._rng.random()
+        if roll < self.config.rate_limit_rate:
+            return "rate_limit"
+        roll -= self.config.rate_limit_rate
+        if roll < self.config.error_rate:
+            return "error"
+        roll -= self.config.error_rate
+        if roll < self.config.slow_rate:
+            return "slow"
+        return None
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+
+def start_mock_server(config=None, host="127.0.0.1", port=0):
+    """Start a mock server in a background thread; returns the server (see .base_url)"""
+    server = MockServer((host, port), config or MockConfig())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline OpenAI-compatible mock server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--ttft", type=float, default=0.05, help="seconds before the first token")
+    parser.add_argument("--token-delay", type=float, default=0.005, help="seconds per token after the first")
+    parser.add_argument("--completion-tokens", type=int, default=64)
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="fraction of requests that stall")
+    parser.add_argument("--slow-delay", type=float, default=2.0, help="extra seconds for stalled requests")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction answered with HTTP 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction answered with HTTP 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with 429s")
+    parser.add_argument("--capacity", type=int, default=0, help="max requests in flight before 429s (0 = unlimited)")
+    parser.add_argument("--reasoning-tokens", type=int, default=0,
+                        help="emit raw Harmony output with this many analysis tokens")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    config = MockConfig(
+        ttft=args.ttft,
+        token_delay=args.token_delay,
+        completion_tokens=args.completion_tokens,
+        slow_rate=args.slow_rate,
+        slow_delay=args.slow_delay,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+        capacity=args.capacity,
+        reasoning_tokens=args.reasoning_tokens,
+        seed=args.seed,
+    )
+    server = MockServer((args.host, args.port), config)
+    print(f"Mock server listening on {server.base_url}")
+    print(f"Point the examples at it with: OPENAI_BASE_URL={server.base_url} OPENAI_API_KEY=mock")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Model Registry for GPT OSS
+Process-wide cache of warm Transformers pipelines, loaded from memory-mapped safetensors
+"""
+
+import argparse
+import gc
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+
+@dataclass(frozen=True)
+class ModelKey:
+    """What makes two loaded pipelines interchangeable"""
+
+    model: str
+    dtype: str = "auto"
+    device: str = "auto"
+
+
+@dataclass
+class LoadStats:
+    """Cold-load time and warm hits for one ModelKey"""
+
+    cold_seconds: float = None
+    hits: int = 0
+    hit_seconds: list = field(default_factory=list)
+    preloaded: bool = False
+
+
+def _torch_dtype(dtype):
+    if dtype == "auto":
+        return "auto"
+    import torch
+    return getattr(torch, dtype)
+
+
+def load_pipeline(key, task="text-generation"):
+    """Build a pipeline for `key` without random init or a second copy of the weights
+
+    safetensors checkpoints are opened with mmap, and low_cpu_mem_usage
+    creates the model on the meta device and fills it from the mapped
+    file, so weights are read once instead of initialized, loaded and
+    then copied. device "auto" spreads the model with accelerate's
+    device_map; anything else ("cpu", "cuda:0") places it there. dtype
+    "int8" loads the checkpoint's own dtype on CPU, then quantizes its
+    Linear layers dynamically (see cpu_inference.quantize_int8).
+    """
+    from transformers import AutoModelForCausalLM, AutoTokenizer, pipeline
+
+    quantize = key.dtype == "int8"
+    if quantize and key.device not in ("cpu", "auto"):
+        raise ValueError(f"int8 dynamic quantization runs on CPU, not {key.device}")
+    if quantize:
+        key = ModelKey(key.model, "auto", "cpu")
+    tokenizer = AutoTokenizer.from_pretrained(key.model)
+    kwargs = {"torch_dtype": _torch_dtype(key.dtype), "low_cpu_mem_usage": True}
+    if key.device == "auto":
+        kwargs["device_map"] = "auto"
+    model = AutoModelForCausalLM.from_pretrained(key.model, **kwargs)
+    model.eval()
+    if quantize:
+        from cpu_inference import quantize_int8
+        model = quantize_int8(model)
+    if key.device == "auto":
+        return pipeline(task, model=model, tokenizer=tokenizer)
+    return pipeline(task, model=model, tokenizer=tokenizer, device=key.device)
+
+
+class ModelRegistry:
+    """Keeps loaded pipelines keyed by (model, dtype, device)
+
+    The first get() for a key loads it; every later get() returns the same
+    warm pipeline. Concurrent requests for a key that is still loading
+    wait for that one load instead of starting their own, and preload()
+    starts a load in a background thread so startup work can overlap it.
+    """
+
+    def __init__(self, loader=load_pipeline, preload_workers=1):
+        self.loader = loader
+        self._pipelines = {}
+        self._loading = {}
+        self._lock = threading.Lock()
+        self._preloader = ThreadPoolExecutor(max_workers=preload_workers,
+                                             thread_name_prefix="model-preload")
+        self.stats = {}
+
+    def get(self, model, dtype="auto", device="auto"):
+        key = ModelKey(model, dtype, device)
+        start = time.perf_counter()
+        with self._lock:
+            pipe = self._pipelines.get(key)
+            if pipe is not None:
+                stats = self.stats[key]
+                stats.hits += 1
+                stats.hit_seconds.append(time.perf_counter() - start)
+                return pipe
+            future = self._loading.get(key)
+            owner = future is None
+            if owner:
+                future = self._loading[key] = Future()
+        if owner:
+            self._load(key, future)
+        return future.result()
+
+    def preload(self, model, dtype="auto", device="auto"):
+        """Start loading in the background; returns a Future for the pipeline"""
+        key = ModelKey(model, dtype, device)
+        with self._lock:
+            if key in self._pipelines:
+                done = Future()
+                done.set_result(self._pipelines[key])
+                return done
+            if key in self._loading:
+                return self._loading[key]
+            future = self._loading[key] = Future()
+        self._preloader.submit(self._load, key, future, True)
+        return future
+
+    def _load(self, key, future, preloaded=False):
+        start = time.perf_counter()
+        try:
+            pipe = self.loader(key)
+        except BaseException as e:
+            with self._lock:
+                del self._loading[key]
+            future.set_exception(e)
+            return
+        with self._lock:
+            self._pipelines[key] = pipe
+            del self._loading[key]
+            self.stats[key] = LoadStats(time.perf_counter() - start, preloaded=preloaded)
+        future.set_result(pipe)
+
+    def evict(self, model, dtype="auto", device="auto"):
+        """Drop a pipeline so its memory can be reclaimed"""
+        with self._lock:
+            pipe = self._pipelines.pop(ModelKey(model, dtype, device), None)
+        if pipe is not None:
+            del pipe
+            gc.collect()
+            try:
+                import torch
+                if torch.cuda.is_available():
+                    torch.cuda.empty_cache()
+            except ImportError:
+                pass
+
+    def loaded(self):
+        with self._lock:
+            return list(self._pipelines)
+
+    def report(self):
+        lines = [f"{'model':<32} {'dtype':<9} {'device':<7} {'cold load':>10} {'hits':>6} {'warm hit':>10}"]
+        with self._lock:
+            for key, stats in self.stats.items():
+                warm = (sum(stats.hit_seconds) / len(stats.hit_seconds) * 1e6) if stats.hit_seconds else 0.0
+                cold = f"{stats.cold_seconds:.2f}s" + ("*" if stats.preloaded else "")
+                lines.append(f"{key.model:<32} {key.dtype:<9} {key.device:<7} {cold:>10} "
+                             f"{stats.hits:>6} {warm:>8.1f}us")
+        return "\n".join(lines) + "\n(* loaded in the background by preload)"
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def get_registry():
+    """The process-wide registry"""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = ModelRegistry()
+        return _shared
+
+
+def get_pipeline(model, dtype="auto", device="auto"):
+    """Return the shared warm pipeline for (model, dtype, device), loading it once"""
+    return get_registry().get(model, dtype, device)
+
+
+def preload_from_env():
+    """Start background loads for GPT_OSS_PRELOAD=model[@dtype[@device]],...
+
+    Returns the futures (empty when the variable is unset), so a script
+    can call this first thing and do its other startup work meanwhile.
+    """
+    futures = []
+    for spec in filter(None, (part.strip() for part in os.getenv("GPT_OSS_PRELOAD", "").split(","))):
+        model, dtype, device = (spec.split("@") + ["auto", "auto"])[:3]
+        futures.append(get_registry().preload(model, dtype or "auto", device or "auto"))
+    return futures
+
+
+def prepare_checkpoint(model, path, dtype="float32"):
+    """Save `model` as a local safetensors checkpoint, for a benchmark with no network I/O"""
+    from transformers import AutoModelForCausalLM, AutoTokenizer
+
+    if not os.path.exists(os.path.join(path, "model.safetensors")):
+        AutoTokenizer.from_pretrained(model).save_pretrained(path)
+        AutoModelForCausalLM.from_pretrained(model, torch_dtype=_torch_dtype(dtype)).save_pretrained(
+            path, safe_serialization=True)
+    return path
+
+
+def benchmark(model="sshleifer/tiny-gpt2", repeats=5, dtype="float32", device="cpu", checkpoint=None):
+    """Rebuilding the pipeline every call versus cold, warm and preloaded registry loads"""
+    from transformers import pipeline
+
+    checkpoint = prepare_checkpoint(model, checkpoint or os.path.join(
+        tempfile.gettempdir(), "gpt-oss-registry-" + model.replace("/", "--")), dtype)
+    messages = [{"role": "user", "content": "What is artificial intelligence?"}]
+
+    def generate(pipe):
+        pipe(messages if pipe.tokenizer.chat_template else messages[0]["content"],
+             max_new_tokens=8, do_sample=False, pad_token_id=pipe.tokenizer.eos_token_id)
+
+    # Warm the OS page cache and Python imports so every mode reads from memory
+    generate(pipeline("text-generation", model=checkpoint, device=device))
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        generate(pipeline("text-generation", model=checkpoint, device=device,
+                          torch_dtype=_torch_dtype(dtype)))
+    rebuild = (time.perf_counter() - start) / repeats
+
+    registry = ModelRegistry()
+    start = time.perf_counter()
+    generate(registry.get(checkpoint, dtype, device))
+    cold = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(repeats):
+        generate(registry.get(checkpoint, dtype, device))
+    warm = (time.perf_counter() - start) / repeats
+
+    # Preload while the "application" spends a cold load's worth of time starting up
+    preloading = ModelRegistry()
+    start = time.perf_counter()
+    preloading.preload(checkpoint, dtype, device)
+    time.sleep(cold)
+    waited = time.perf_counter()
+    pipe = preloading.get(checkpoint, dtype, device)
+    waited = time.perf_counter() - waited
+    generate(pipe)
+
+    print(f"=== {model} ({dtype}, {device}), checkpoint {checkpoint} ===")
+    print(f"{'rebuild pipeline per call':<28} {rebuild * 1000:>9.1f}ms per request")
+    print(f"{'registry, cold':<28} {cold * 1000:>9.1f}ms")
+    print(f"{'registry, warm':<28} {warm * 1000:>9.1f}ms per request")
+    print(f"{'registry, preloaded':<28} {waited * 1000:>9.1f}ms waiting for the model after startup")
+    print()
+    print(registry.report())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark cold and warm pipeline loads on CPU")
+    parser.add_argument("--model", default="sshleifer/tiny-gpt2")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--dtype", default="float32")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--checkpoint", help="directory for the local safetensors copy")
+    args = parser.parse_args()
+    benchmark(args.model, args.repeats, args.dtype, args.device, args.checkpoint)
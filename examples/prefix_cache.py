@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Prefix KV Cache for GPT OSS
+Reuses past_key_values across turns so prefill only runs over tokens not seen before
+"""
+
+import argparse
+import collections
+import copy
+import hashlib
+import time
+from dataclasses import dataclass
+
+BLOCK_SIZE = 16
+
+# The long fixed system prompts from cot_reasoning.py, padded out the way production prompts are
+MATH_TUTOR = ("You are a helpful math tutor. Always show your step-by-step reasoning before giving "
+              "the final answer. State the quantities you are given, name the formula you use, "
+              "substitute the values with their units, simplify one operation per line, check the "
+              "result against a rough estimate, and finish with a single line that starts with "
+              "'Answer:'. If the problem is ambiguous, say which reading you chose and why. ") * 3
+LOGIC_EXPERT = ("You are a logic expert. Analyze the problem step by step and explain your reasoning. "
+                "List every statement, consider each case in turn, derive what follows from assuming "
+                "it, discard cases that lead to a contradiction, and report the unique consistent "
+                "assignment. If more than one assignment survives, say so and list them all. ") * 3
+
+
+def block_hashes(tokens, block_size=BLOCK_SIZE):
+    """Chained hash per full block: entry i identifies tokens[:(i + 1) * block_size]"""
+    hashes = []
+    digest = b""
+    for end in range(block_size, len(tokens) + 1, block_size):
+        block = ",".join(map(str, tokens[end - block_size:end])).encode()
+        digest = hashlib.blake2b(digest + block, digest_size=16).digest()
+        hashes.append(digest)
+    return hashes
+
+
+def _crop(cache, length):
+    """Crop a KV cache in place; False for caches that cannot be (e.g. sliding-window layers)"""
+    try:
+        cache.crop(length)
+        return True
+    except (AttributeError, NotImplementedError, ValueError):
+        return False
+
+
+@dataclass
+class _Entry:
+    cache: object
+    length: int
+    hashes: list
+
+
+@dataclass
+class TurnStats:
+    """Prefill work for one generate() call"""
+
+    prompt_tokens: int
+    reused_tokens: int
+    prefill_seconds: float
+    copy_seconds: float
+    total_seconds: float
+    new_tokens: int
+
+
+class PrefixCache:
+    """Bounded LRU of KV caches keyed by token-prefix hash
+
+    Each stored cache covers a block-aligned token prefix, and every block
+    boundary inside it is indexed, so a lookup finds the longest cached
+    prefix shared with a new prompt even when the cached sequence went on
+    differently. Entries are evicted least recently used first, when there
+    are more than `capacity` of them or they hold more than `max_tokens`.
+    """
+
+    def __init__(self, capacity=8, max_tokens=32768, block_size=BLOCK_SIZE):
+        self.capacity = capacity
+        self.max_tokens = max_tokens
+        self.block_size = block_size
+        self._entries = collections.OrderedDict()
+        self._index = {}
+        self._tokens = 0
+        self._next_id = 0
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "reused_tokens": 0}
+
+    def lookup(self, tokens):
+        """(cache, length) for the longest cached prefix of `tokens`, or (None, 0)
+
+        The returned cache is a private copy cropped to `length`; it is
+        always shorter than `tokens` so at least one token is left to feed.
+        """
+        hashes = block_hashes(tokens, self.block_size)
+        for i in range(len(hashes) - 1, -1, -1):
+            length = (i + 1) * self.block_size
+            entry_id = self._index.get(hashes[i])
+            if entry_id is None or length >= len(tokens):
+                continue
+            entry = self._entries[entry_id]
+            self._entries.move_to_end(entry_id)
+            cache = copy.deepcopy(entry.cache)
+            if length < entry.length and not _crop(cache, length):
+                break
+            self.stats["hits"] += 1
+            self.stats["reused_tokens"] += length
+            return cache, length
+        self.stats["misses"] += 1
+        return None, 0
+
+    def store(self, tokens, cache):
+        """Keep `cache` (which covers `tokens`) cropped to its last full block"""
+        length = min(len(tokens), cache.get_seq_length()) // self.block_size * self.block_size
+        if not length or not self.capacity:
+            return
+        hashes = block_hashes(tokens[:length], self.block_size)
+        if self._index.get(hashes[-1]) is not None:
+            # This exact prefix is already cached; refresh it instead of storing a copy
+            self._entries.move_to_end(self._index[hashes[-1]])
+            return
+        if length < cache.get_seq_length() and not _crop(cache, length):
+            return
+        entry_id = self._next_id
+        self._next_id += 1
+        self._entries[entry_id] = _Entry(cache, length, hashes)
+        self._tokens += length
+        for digest in hashes:
+            self._index[digest] = entry_id
+        self.stats["stores"] += 1
+        while self._entries and (len(self._entries) > self.capacity or self._tokens > self.max_tokens):
+            self._evict()
+
+    def _evict(self):
+        entry_id, entry = self._entries.popitem(last=False)
+        self._tokens -= entry.length
+        for digest in entry.hashes:
+            if self._index.get(digest) == entry_id:
+                del self._index[digest]
+        # Shorter prefixes of the evicted entry may still live in another one
+        for other_id, other in self._entries.items():
+            for digest in other.hashes:
+                self._index.setdefault(digest, other_id)
+        self.stats["evictions"] += 1
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def _prefill_timer():
+    """A logits processor that records when the first decoding step begins"""
+    from transformers import LogitsProcessor
+
+    class PrefillTimer(LogitsProcessor):
+        def __init__(self):
+            self.first_step = None
+
+        def __call__(self, input_ids, scores):
+            if self.first_step is None:
+                self.first_step = time.perf_counter()
+            return scores
+
+    return PrefillTimer()
+
+
+class CachedGenerator:
+    """Greedy generation that resumes from the longest cached prompt prefix
+
+    Wraps a causal LM and its tokenizer. Each call renders the messages,
+    looks up the longest block-aligned prefix already in the PrefixCache,
+    hands generate() a copy of that KV cache so only the remaining tokens
+    are prefilled, and stores the resulting cache (prompt plus reply) for
+    the next turn. `turns` records the prefill time of every call.
+    """
+
+    def __init__(self, model, tokenizer, cache=None):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.cache = PrefixCache() if cache is None else cache
+        self.turns = []
+
+    def encode(self, messages):
+        if self.tokenizer.chat_template:
+            return self.tokenizer.apply_chat_template(messages, add_generation_prompt=True, return_dict=False)
+        # Models without a chat template (tiny test checkpoints) get a plain transcript
+        text = "".join(f"{message['role']}: {message['content']}\n" for message in messages)
+        return self.tokenizer(text + "assistant:").input_ids
+
+    def generate(self, messages, max_new_tokens=64, **kwargs):
+        import torch
+        from transformers import DynamicCache
+
+        start = time.perf_counter()
+        tokens = list(self.encode(messages))
+        past, reused = self.cache.lookup(tokens)
+        copied = time.perf_counter()
+        if past is None:
+            past = DynamicCache()
+        timer = _prefill_timer()
+        pad = self.tokenizer.pad_token_id
+        with torch.inference_mode():
+            output = self.model.generate(
+                torch.tensor([tokens], device=self.model.device),
+                past_key_values=past,
+                max_new_tokens=max_new_tokens,
+                do_sample=False,
+                pad_token_id=self.tokenizer.eos_token_id if pad is None else pad,
+                logits_processor=[timer],
+                return_dict_in_generate=True,
+                **kwargs,
+            )
+        end = time.perf_counter()
+        sequence = output.sequences[0].tolist()
+        self.cache.store(sequence, output.past_key_values)
+        self.turns.append(TurnStats(
+            prompt_tokens=len(tokens),
+            reused_tokens=reused,
+            prefill_seconds=(timer.first_step or end) - copied,
+            copy_seconds=copied - start,
+            total_seconds=end - start,
+            new_tokens=len(sequence) - len(tokens),
+        ))
+        return self.tokenizer.decode(sequence[len(tokens):], skip_special_tokens=True)
+
+    def report(self):
+        lines = [f"{'turn':>4} {'prompt':>7} {'reused':>7} {'prefill':>9} {'copy':>7} {'total':>8}"]
+        for i, turn in enumerate(self.turns, 1):
+            lines.append(f"{i:>4} {turn.prompt_tokens:>7} {turn.reused_tokens:>7} "
+                         f"{turn.prefill_seconds * 1000:>7.1f}ms {turn.copy_seconds * 1000:>5.1f}ms "
+                         f"{turn.total_seconds * 1000:>6.0f}ms")
+        return "\n".join(lines)
+
+
+CONVERSATIONS = [
+    (MATH_TUTOR, [
+        "If a train travels 120 km in 2 hours, and then 180 km in 3 hours, what is the average speed?",
+        "And if the second leg took 4 hours instead?",
+        "Convert that speed to metres per second.",
+    ]),
+    (LOGIC_EXPERT, [
+        "Alice says Bob is lying, Bob says Charlie is lying and Charlie says Alice is lying. "
+        "If exactly one person is telling the truth, who is it?",
+        "What if exactly two people are telling the truth?",
+    ]),
+    (MATH_TUTOR, [
+        "A rectangle has a perimeter of 30 cm and one side of 6 cm. What is its area?",
+    ]),
+]
+
+
+def _run(generator, max_new_tokens):
+    replies = []
+    for system, questions in CONVERSATIONS:
+        messages = [{"role": "system", "content": system}]
+        for question in questions:
+            messages.append({"role": "user", "content": question})
+            reply = generator.generate(messages, max_new_tokens=max_new_tokens)
+            messages.append({"role": "assistant", "content": reply})
+            replies.append(reply)
+    return replies
+
+
+def benchmark(model_name="HuggingFaceTB/SmolLM2-135M-Instruct", max_new_tokens=24, device="cpu"):
+    """The same multi-turn conversations with and without prefix reuse"""
+    from transformers import AutoModelForCausalLM, AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForCausalLM.from_pretrained(model_name, torch_dtype="float32").to(device).eval()
+
+    # Warm up kernels and allocator so the first measured turn is not an outlier
+    _run(CachedGenerator(model, tokenizer, PrefixCache(capacity=0)), 2)
+
+    cold = CachedGenerator(model, tokenizer, PrefixCache(capacity=0))
+    cold_replies = _run(cold, max_new_tokens)
+    warm = CachedGenerator(model, tokenizer)
+    warm_replies = _run(warm, max_new_tokens)
+
+    print(f"=== {model_name} on {device}, {len(cold.turns)} turns, block size {BLOCK_SIZE} ===")
+    print(f"{'turn':>4} {'prompt':>7} {'reused':>7} {'cold prefill':>13} {'cached prefill':>15} {'saved':>9}")
+    for i, (a, b) in enumerate(zip(cold.turns, warm.turns), 1):
+        saved = a.prefill_seconds - (b.prefill_seconds + b.copy_seconds)
+        print(f"{i:>4} {a.prompt_tokens:>7} {b.reused_tokens:>7} {a.prefill_seconds * 1000:>11.1f}ms "
+              f"{(b.prefill_seconds + b.copy_seconds) * 1000:>13.1f}ms {saved * 1000:>7.1f}ms")
+    cold_prefill = sum(turn.prefill_seconds for turn in cold.turns)
+    warm_prefill = sum(turn.prefill_seconds + turn.copy_seconds for turn in warm.turns)
+    print(f"total prefill {cold_prefill * 1000:.0f}ms -> {warm_prefill * 1000:.0f}ms "
+          f"({1 - warm_prefill / cold_prefill:.0%} saved, cache copy included); "
+          f"{warm.cache.stats['hits']} hits, {warm.cache.stats['reused_tokens']} tokens reused")
+    same = sum(a == b for a, b in zip(cold_replies, warm_replies))
+    print(f"greedy replies identical with and without the cache: {same}/{len(cold_replies)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure prefill saved by reusing prefix KV caches")
+    parser.add_argument("--model", default="HuggingFaceTB/SmolLM2-135M-Instruct",
+                        help="any small causal LM, e.g. sshleifer/tiny-gpt2")
+    parser.add_argument("--max-new-tokens", type=int, default=24)
+    parser.add_argument("--device", default="cpu")
+    args = parser.parse_args()
+    benchmark(args.model, args.max_new_tokens, args.device)
@@ -0,0 +1,461 @@
+#!/usr/bin/env python3
+"""
+Python Tool for GPT OSS
+Executes model-issued Python code in a pool of warm, resource-limited worker processes
+"""
+
+import ast
+import builtins
+import contextlib
+import io
+import itertools
+import multiprocessing
+import os
+import queue
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+import traceback
+import types
+from dataclasses import dataclass
+
+try:
+    import resource
+except ImportError:  # Windows: no rlimits, the wall-clock timeout still applies
+    resource = None
+
+PREIMPORTS = (
+    "math", "cmath", "statistics", "json", "re", "itertools", "functools",
+    "collections", "decimal", "fractions", "datetime", "random", "string",
+)
+
+# Modules model code may import; anything that reaches files, processes or sockets is left out
+ALLOWED_IMPORTS = frozenset(PREIMPORTS) | {
+    "operator", "heapq", "bisect", "array", "copy", "textwrap", "unicodedata", "numbers",
+    "typing", "dataclasses", "enum", "time", "calendar", "zoneinfo", "hashlib", "base64",
+}
+
+# Builtins removed from the namespace model code runs in
+BLOCKED_BUILTINS = ("open", "input", "breakpoint", "help", "exit", "quit", "copyright", "credits", "license")
+
+CLONE_NEWUSER = 0x10000000
+CLONE_NEWNET = 0x40000000
+
+PYTHON_TOOL = {
+    "type": "function",
+    "function": {
+        "name": "python",
+        "description": "Run Python code and return its stdout and the value of the last expression",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "code": {"type": "string", "description": "Python source to execute"}
+            },
+            "required": ["code"]
+        }
+    }
+}
+
+
+class _ModuleView:
+    """Read-only view of a module that hides its private names
+
+    Model code only ever sees modules through these, so helpers a module
+    imported for itself (random._os, for one) stay out of reach.
+    """
+
+    # No __dict__, so vars() cannot reach the wrapped module either
+    __slots__ = ("_module", "_views")
+
+    def __init__(self, module, views):
+        object.__setattr__(self, "_module", module)
+        object.__setattr__(self, "_views", views)
+
+    def __getattr__(self, name):
+        if name == "__all__":
+            # What `from module import *` binds
+            return getattr(self._module, "__all__", self.__dir__())
+        if name.startswith("_"):
+            raise AttributeError(f"module {self._module.__name__!r} has no attribute {name!r}")
+        return _public(getattr(self._module, name), self._views)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"module {self._module.__name__!r} is read-only in the python tool")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"module {self._module.__name__!r} is read-only in the python tool")
+
+    def __dir__(self):
+        return [name for name in dir(self._module) if not name.startswith("_")]
+
+    def __repr__(self):
+        return f"<module {self._module.__name__!r}>"
+
+
+def _public(value, views):
+    """Return `value`, with modules replaced by their (cached) _ModuleView"""
+    if not isinstance(value, types.ModuleType):
+        return value
+    view = views.get(value.__name__)
+    if view is None:
+        view = views[value.__name__] = _ModuleView(value, views)
+    return view
+
+
+def _check_code(tree):
+    """Reject private and dunder attribute access (obj.__class__, f.__globals__, ...)"""
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Attribute) and node.attr.startswith("_"):
+            raise AttributeError(f"access to attribute {node.attr!r} is not allowed in the python tool")
+
+
+def _run_code(code, namespace):
+    """Exec `code`, evaluating a trailing expression so its value can be returned"""
+    tree = ast.parse(code, mode="exec")
+    _check_code(tree)
+    last = None
+    if tree.body and isinstance(tree.body[-1], ast.Expr):
+        last = ast.Expression(tree.body.pop().value)
+    exec(compile(tree, "<python-tool>", "exec"), namespace)
+    if last is not None:
+        return eval(compile(last, "<python-tool>", "eval"), namespace)
+    return None
+
+
+def _restricted_builtins(views):
+    """Builtins without open() and friends
+
+    __import__ only loads ALLOWED_IMPORTS and returns module views, and
+    getattr() and friends refuse the private names _check_code rejects
+    in source.
+    """
+    def guarded_import(name, globals=None, locals=None, fromlist=(), level=0):
+        if level or name.partition(".")[0] not in ALLOWED_IMPORTS:
+            raise ImportError(f"import of {name!r} is not allowed in the python tool")
+        return _public(builtins.__import__(name, globals, locals, fromlist, level), views)
+
+    def guarded(function):
+        def wrapper(obj, name, *args):
+            if isinstance(name, str) and name.startswith("_"):
+                raise AttributeError(f"access to attribute {name!r} is not allowed in the python tool")
+            return function(obj, name, *args)
+        return wrapper
+
+    restricted = {name: value for name, value in vars(builtins).items() if name not in BLOCKED_BUILTINS}
+    restricted["__import__"] = guarded_import
+    for name in ("getattr", "hasattr", "setattr", "delattr"):
+        restricted[name] = guarded(getattr(builtins, name))
+    return restricted
+
+
+def _unshare_network():
+    """Move this process into new user and network namespaces; False where that is not permitted"""
+    if hasattr(os, "unshare"):
+        try:
+            os.unshare(CLONE_NEWUSER | CLONE_NEWNET)
+            return True
+        except OSError:
+            return False
+    try:
+        import ctypes
+        libc = ctypes.CDLL(None, use_errno=True)
+        return libc.unshare(CLONE_NEWUSER | CLONE_NEWNET) == 0
+    except (OSError, AttributeError):
+        return False
+
+
+def _isolate(workdir, memory_bytes):
+    """Cut a worker off from the parent's secrets, files and network before it runs any code
+
+    The environment (OPENAI_API_KEY included) is cleared and the working
+    directory becomes `workdir`, a fresh empty tempdir. On Linux the worker moves
+    into its own network namespace, which has no interfaces but loopback,
+    when unprivileged user namespaces are enabled. Rlimits stop it from
+    writing files, starting processes or growing past `memory_bytes`.
+    """
+    _unshare_network()
+    os.environ.clear()
+    os.chdir(workdir)
+    os.environ.update({"HOME": workdir, "TMPDIR": workdir})
+    if resource is not None:
+        if memory_bytes:
+            resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, memory_bytes))
+        resource.setrlimit(resource.RLIMIT_FSIZE, (0, 0))
+        resource.setrlimit(resource.RLIMIT_NPROC, (0, 0))
+
+
+def _worker_main(conn, workdir, preimports, memory_bytes):
+    """Worker loop: import once, then execute one snippet per message"""
+    views = {}
+    modules = {name: _public(__import__(name), views) for name in preimports}
+    _isolate(workdir, memory_bytes)
+    restricted = _restricted_builtins(views)
+
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            return
+        if message is None:
+            return
+        code, cpu_seconds = message
+
+        if resource is not None and cpu_seconds:
+            # RLIMIT_CPU is cumulative, so grant this call `cpu_seconds` on top of what is used
+            usage = resource.getrusage(resource.RUSAGE_SELF)
+            used = int(usage.ru_utime + usage.ru_stime) + 1
+            hard = resource.getrlimit(resource.RLIMIT_CPU)[1]
+            soft = used + cpu_seconds
+            if hard != resource.RLIM_INFINITY:
+                soft = min(soft, hard)
+            resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+        stdout, stderr = io.StringIO(), io.StringIO()
+        namespace = {"__name__": "__main__", "__builtins__": restricted, **modules}
+        result = error = None
+        try:
+            with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+                value = _run_code(code, namespace)
+            result = None if value is None else repr(value)
+        except MemoryError:
+            error = "MemoryError: memory limit exceeded"
+        except BaseException:
+            error = traceback.format_exc(limit=-3)
+        conn.send({
+            "stdout": stdout.getvalue(),
+            "stderr": stderr.getvalue(),
+            "result": result,
+            "error": error,
+        })
+
+
+@dataclass
+class ExecutionResult:
+    """Captured output of one snippet"""
+
+    stdout: str = ""
+    stderr: str = ""
+    result: str = None
+    error: str = None
+    duration: float = 0.0
+    queue_wait: float = 0.0
+
+    def to_tool_output(self):
+        output = {"stdout": self.stdout, "result": self.result}
+        if self.stderr:
+            output["stderr"] = self.stderr
+        if self.error:
+            output["error"] = self.error
+        return output
+
+
+class _Worker:
+    _ids = itertools.count(1)
+
+    def __init__(self, context, preimports, memory_bytes):
+        self.id = next(self._ids)
+        self.conn, child = context.Pipe()
+        self.workdir = tempfile.mkdtemp(prefix=f"python-tool-{self.id}-")
+        self.process = context.Process(
+            target=_worker_main, args=(child, self.workdir, preimports, memory_bytes),
+            name=f"python-tool-{self.id}", daemon=True)
+        self.process.start()
+        child.close()
+        self.executions = 0
+
+    def stop(self, timeout=1.0):
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+class PythonToolPool:
+    """Pool of pre-started, pre-imported interpreters for the python tool
+
+    Workers are forked from a forkserver that already imported PREIMPORTS,
+    so both the first call and every replacement worker start warm. Each
+    call gets a CPU-time budget (RLIMIT_CPU), each worker a memory cap
+    (RLIMIT_AS), and the parent enforces a wall-clock timeout, killing and
+    replacing any worker that overruns. Workers are recycled after
+    `max_executions` calls so state leaked by user code cannot accumulate.
+
+    Workers run with an empty environment in an empty tempdir, without
+    open(), with imports limited to ALLOWED_IMPORTS and without access to
+    private attributes, modules' included (see _isolate and _ModuleView).
+    That stops casual file, network and secret access, but builtins-level
+    restrictions can be escaped by determined code; the network namespace
+    is the only kernel-enforced part. Run the pool inside a container or VM
+    before pointing it at untrusted input.
+    """
+
+    def __init__(self, workers=2, max_executions=100, timeout=5.0, cpu_seconds=5,
+                 memory_mb=512, preimports=PREIMPORTS):
+        methods = multiprocessing.get_all_start_methods()
+        method = "forkserver" if "forkserver" in methods else "spawn"
+        self._context = multiprocessing.get_context(method)
+        if method == "forkserver":
+            self._context.set_forkserver_preload(list(preimports))
+        self.max_executions = max_executions
+        self.timeout = timeout
+        self.cpu_seconds = cpu_seconds
+        self._memory_bytes = memory_mb * 1024 * 1024 if memory_mb else 0
+        self._preimports = tuple(preimports)
+
+        self._lock = threading.Lock()
+        self._idle = queue.Queue()
+        self._workers = set()
+        self._waiting = 0
+        self._closed = False
+        self.stats = {
+            "executions": 0,
+            "errors": 0,
+            "timeouts": 0,
+            "crashes": 0,
+            "recycles": 0,
+            "max_queue_depth": 0,
+        }
+        self._durations = []
+        self._waits = []
+
+        for _ in range(workers):
+            self._add_worker()
+
+    def _add_worker(self):
+        worker = _Worker(self._context, self._preimports, self._memory_bytes)
+        with self._lock:
+            self._workers.add(worker)
+        self._idle.put(worker)
+
+    def _replace(self, worker, reason):
+        with self._lock:
+            self._workers.discard(worker)
+            self.stats[reason] += 1
+        worker.stop(timeout=0)
+        if not self._closed:
+            self._add_worker()
+
+    def execute(self, code, timeout=None, cpu_seconds=None):
+        """Run `code` on an idle worker and return an ExecutionResult"""
+        if self._closed:
+            raise RuntimeError("python tool pool is closed")
+        timeout = self.timeout if timeout is None else timeout
+        cpu_seconds = self.cpu_seconds if cpu_seconds is None else cpu_seconds
+
+        enqueued = time.perf_counter()
+        with self._lock:
+            self._waiting += 1
+            self.stats["max_queue_depth"] = max(self.stats["max_queue_depth"], self._waiting)
+        try:
+            worker = self._idle.get()
+        finally:
+            with self._lock:
+                self._waiting -= 1
+        if worker is None:
+            # close() woke us up; pass the sentinel on to the next waiter
+            self._idle.put(None)
+            raise RuntimeError("python tool pool is closed")
+        started = time.perf_counter()
+        queue_wait = started - enqueued
+
+        worker.conn.send((code, cpu_seconds))
+        if worker.conn.poll(timeout):
+            try:
+                outcome = worker.conn.recv()
+            except EOFError:
+                # Killed by SIGXCPU or the memory limit while running
+                outcome = {"error": "worker terminated: CPU or memory limit exceeded"}
+                self._replace(worker, "crashes")
+                worker = None
+        else:
+            outcome = {"error": f"TimeoutError: execution exceeded {timeout:g}s"}
+            self._replace(worker, "timeouts")
+            worker = None
+
+        duration = time.perf_counter() - started
+        if worker is not None:
+            worker.executions += 1
+            if self._closed:
+                worker.stop(timeout=0)
+            elif worker.executions >= self.max_executions:
+                self._replace(worker, "recycles")
+            else:
+                self._idle.put(worker)
+
+        result = ExecutionResult(queue_wait=queue_wait, duration=duration, **outcome)
+        with self._lock:
+            self.stats["executions"] += 1
+            if result.error:
+                self.stats["errors"] += 1
+            self._durations.append(duration)
+            self._waits.append(queue_wait)
+            del self._durations[:-1000], self._waits[:-1000]
+        return result
+
+    def handler(self, code):
+        """Tool handler for tool_agent.run_tool_agent: {"python": pool.handler}"""
+        return self.execute(code).to_tool_output()
+
+    def metrics(self):
+        """Current queue depth, counters and execution-time percentiles"""
+        with self._lock:
+            durations = sorted(self._durations)
+            waits = list(self._waits)
+            metrics = dict(self.stats, queue_depth=self._waiting, workers=len(self._workers))
+        if durations:
+            metrics["exec_p50_ms"] = statistics.median(durations) * 1000
+            metrics["exec_p95_ms"] = durations[min(len(durations) - 1, int(len(durations) * 0.95))] * 1000
+            metrics["queue_wait_mean_ms"] = statistics.mean(waits) * 1000
+        return metrics
+
+    def close(self):
+        self._closed = True
+        with self._lock:
+            workers = list(self._workers)
+            self._workers.clear()
+        for worker in workers:
+            worker.stop()
+        # Wake callers blocked waiting for a worker
+        self._idle.put(None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+if __name__ == "__main__":
+    with PythonToolPool(workers=2, timeout=2.0, cpu_seconds=1, memory_mb=256) as pool:
+        pool.execute("1 + 1")  # warm-up
+        for snippet in [
+            "math.factorial(10)",
+            "print(sum(range(10)))\nstatistics.mean([1, 2, 3, 4])",
+            "while True: pass",
+            "x = 'a' * (1024 ** 3)",
+            "1 / 0",
+            "open('/etc/passwd').read()",
+            "import os",
+            "import socket",
+            "random._os.system('id')",
+            "getattr(random, '_os')",
+            "(1).__class__.__subclasses__()",
+        ]:
+            result = pool.execute(snippet)
+            print(f"{snippet!r:<45} {result.duration * 1000:7.1f}ms "
+                  f"result={result.result!r} stdout={result.stdout!r} "
+                  f"error={(result.error or '').strip().splitlines()[-1:] }")
+
+        start = time.perf_counter()
+        for _ in range(100):
+            pool.execute("sum(i * i for i in range(100))")
+        print(f"\n100 warm calls: {(time.perf_counter() - start) * 10:.2f}ms per call")
+        print(pool.metrics())
@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+"""
+Quantiles for GPT OSS
+Dependency-free percentile helper shared by the routers, limiters and benchmarks
+"""
+
+import math
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of an unsorted list"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Request Executor for GPT OSS
+Deadline-aware retries and hedged requests to keep tail latency under control
+"""
+
+import argparse
+import asyncio
+import collections
+import random
+import time
+from dataclasses import dataclass
+
+from client_pool import close_async_clients, get_async_client
+from quantiles import percentile
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+class DeadlineExceeded(TimeoutError):
+    """The request could not finish, or be retried, before its deadline"""
+
+
+def is_retryable(error):
+    """Timeouts, dropped connections, 429s and 5xx are worth another try"""
+    import openai
+    if isinstance(error, (openai.APITimeoutError, openai.APIConnectionError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code in RETRYABLE_STATUS
+    return False
+
+
+def retry_after(error):
+    """Seconds the server asked us to wait, from a Retry-After header"""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass
+class Backend:
+    """Where an attempt can be sent"""
+
+    base_url: str = None
+    api_key: str = None
+
+    def client(self):
+        # The executor owns retries, so the SDK's own retry loop is switched off
+        return get_async_client(self.base_url, self.api_key).with_options(max_retries=0)
+
+
+class RequestExecutor:
+    """Runs chat completions with a deadline, retries and optional hedging
+
+    Every request gets `deadline` seconds end to end. Retryable failures
+    are retried with full-jitter exponential backoff (or the server's
+    Retry-After, if longer) while the deadline allows; each attempt's
+    HTTP timeout is the time left. With `hedge=True`, an attempt still
+    running after the `hedge_percentile` of recent latencies gets a
+    duplicate on the next backend; whichever answers first wins and the
+    other is cancelled. Hedging starts once `min_samples` latencies have
+    been seen, or right away if `hedge_after` gives a fixed delay.
+    Streaming requests are not supported.
+    """
+
+    def __init__(self, backends=None, deadline=30.0, max_attempts=4, base_delay=0.25,
+                 max_delay=4.0, hedge=False, hedge_percentile=95, hedge_after=None,
+                 min_samples=20, window=1000):
+        self.backends = [Backend(*backend) if isinstance(backend, tuple) else backend
+                         for backend in (backends or [Backend()])]
+        self.deadline = deadline
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_after = hedge_after
+        self.min_samples = min_samples
+        self._latencies = collections.deque(maxlen=window)
+        self._next_backend = 0
+        self.stats = {
+            "requests": 0,
+            "attempts": 0,
+            "retries": 0,
+            "hedges": 0,
+            "hedge_wins": 0,
+            "deadline_exceeded": 0,
+            "failed": 0,
+        }
+
+    def hedge_delay(self):
+        """How long an attempt may run before it is hedged, or None"""
+        if not self.hedge:
+            return None
+        if len(self._latencies) >= self.min_samples:
+            return percentile(self._latencies, self.hedge_percentile)
+        return self.hedge_after
+
+    def _backoff(self, attempt, error):
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        server_delay = retry_after(error)
+        return max(delay, server_delay) if server_delay is not None else delay
+
+    async def _call(self, backend, request, remaining):
+        self.stats["attempts"] += 1
+        start = time.perf_counter()
+        response = await backend.client().chat.completions.create(timeout=remaining, **request)
+        self._latencies.append(time.perf_counter() - start)
+        return response
+
+    async def _attempt(self, request, deadline):
+        """One logical attempt: the primary call plus, if it is slow, a hedge"""
+        index = self._next_backend % len(self.backends)
+        self._next_backend += 1
+        remaining = deadline - time.monotonic()
+        primary = asyncio.ensure_future(self._call(self.backends[index], request, remaining))
+        delay = self.hedge_delay()
+        if delay is None or delay >= remaining:
+            return await asyncio.wait_for(primary, remaining)
+
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                self.stats["hedges"] += 1
+                # The next backend after the primary's, however many attempts started meanwhile
+                backend = self.backends[(index + 1) % len(self.backends)]
+                hedge = asyncio.ensure_future(self._call(backend, request, deadline - time.monotonic()))
+                tasks.add(hedge)
+            while tasks:
+                done, tasks = await asyncio.wait(
+                    tasks, timeout=deadline - time.monotonic(),
+                    return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    raise asyncio.TimeoutError()
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.stats["hedge_wins"] += 1
+                        return task.result()
+            # Both failed: surface the primary's error
+            return primary.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def create(self, **request):
+        """Drop-in for `await client.chat.completions.create(**request)`"""
+        if request.get("stream"):
+            raise ValueError("RequestExecutor does not support streaming requests")
+        self.stats["requests"] += 1
+        deadline = time.monotonic() + self.deadline
+        for attempt in range(self.max_attempts):
+            try:
+                return await self._attempt(request, deadline)
+            except asyncio.TimeoutError:
+                self.stats["deadline_exceeded"] += 1
+                raise DeadlineExceeded(f"no response within {self.deadline:g}s") from None
+            except Exception as e:
+                if not is_retryable(e) or attempt + 1 == self.max_attempts:
+                    self.stats["failed"] += 1
+                    raise
+                delay = self._backoff(attempt, e)
+                remaining = deadline - time.monotonic()
+                if delay >= remaining:
+                    self.stats["deadline_exceeded"] += 1
+                    raise DeadlineExceeded(
+                        f"retry in {delay:.2f}s would pass the deadline ({remaining:.2f}s left)"
+                    ) from e
+                self.stats["retries"] += 1
+                await asyncio.sleep(delay)
+
+    def metrics(self):
+        """Counters plus the latency percentiles that drive hedging"""
+        latencies = list(self._latencies)
+        return dict(
+            self.stats,
+            hedge_delay_ms=None if self.hedge_delay() is None else self.hedge_delay() * 1000,
+            attempt_p50_ms=percentile(latencies, 50) * 1000,
+            attempt_p95_ms=percentile(latencies, 95) * 1000,
+        )
+
+
+async def _measure(executor, requests, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await executor.create(
+                    model="gpt-oss-20b",
+                    messages=[{"role": "user", "content": f"request {i}"}],
+                    max_tokens=8,
+                )
+                return time.perf_counter() - start
+            except Exception:
+                return None
+
+    try:
+        outcomes = await asyncio.gather(*(one(i) for i in range(requests)))
+    finally:
+        await close_async_clients()
+    latencies = [latency for latency in outcomes if latency is not None]
+    return latencies, len(outcomes) - len(latencies)
+
+
+def benchmark(requests=400, concurrency=8, slow_rate=0.05, error_rate=0.05, slow_delay=1.0):
+    """Compare tail latency with no retries, retries, and retries plus hedging"""
+    from mock_server import MockConfig, start_mock_server
+    config = dict(ttft=0.02, token_delay=0.001, completion_tokens=8,
+                  slow_rate=slow_rate, slow_delay=slow_delay, error_rate=error_rate)
+    servers = [start_mock_server(MockConfig(seed=seed, **config)) for seed in (1, 2)]
+    backends = [(server.base_url, "mock") for server in servers]
+
+    print(f"=== {requests} requests, {slow_rate:.0%} stalled by {slow_delay:g}s, "
+          f"{error_rate:.0%} HTTP 500 ===")
+    print(f"{'mode':<16} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8} {'failed':>7}  extra")
+    for mode, executor in [
+        ("no retries", RequestExecutor(backends, deadline=5.0, max_attempts=1)),
+        ("retries", RequestExecutor(backends, deadline=5.0)),
+        ("retries+hedge", RequestExecutor(backends, deadline=5.0, hedge=True, hedge_after=0.1)),
+    ]:
+        latencies, failed = asyncio.run(_measure(executor, requests, concurrency))
+        stats = executor.stats
+        print(f"{mode:<16} "
+              + " ".join(f"{percentile(latencies, pct) * 1000:7.0f}ms" for pct in (50, 95, 99, 100))
+              + f" {failed:>7}  retries={stats['retries']} hedges={stats['hedges']} "
+                f"hedge_wins={stats['hedge_wins']} attempts={stats['attempts']}")
+
+    for server in servers:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tail latency with retries and hedging on mock servers")
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--slow-rate", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.05)
+    parser.add_argument("--slow-delay", type=float, default=1.0)
+    args = parser.parse_args()
+
+    benchmark(args.requests, args.concurrency, args.slow_rate, args.error_rate, args.slow_delay)
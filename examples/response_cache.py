@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Response Cache for GPT OSS
+Persistent, content-addressed cache in front of chat.completions.create
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    body BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    expires REAL,
+    last_access REAL NOT NULL,
+    latency REAL NOT NULL,
+    tokens INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_lru ON responses (last_access);
+"""
+
+
+def cache_key(request, namespace=""):
+    """Canonical SHA-256 of a request payload
+
+    Keys are sorted and whitespace stripped so that dict ordering in the
+    caller never produces a different key for the same request.
+    """
+    payload = {key: value for key, value in request.items() if key != "stream"}
+    canonical = json.dumps(
+        {"namespace": namespace, "request": payload},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+@dataclass
+class CacheStats:
+    """Counters for one process' use of the cache"""
+
+    hits: int = 0
+    misses: int = 0
+    bypasses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    saved_seconds: float = 0.0
+    saved_tokens: int = 0
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def report(self):
+        return (
+            f"[cache hits={self.hits} misses={self.misses} bypasses={self.bypasses} "
+            f"evictions={self.evictions} expired={self.expirations} "
+            f"hit_rate={self.hit_rate:.0%} saved={self.saved_seconds:.2f}s/{self.saved_tokens} tokens]"
+        )
+
+
+class ResponseCache:
+    """SQLite-backed response store with LRU size cap and per-entry TTL
+
+    Requests with temperature > 0 are sampled, so by default they bypass
+    the cache; pass force=True to cache them anyway (useful for
+    regression runs that only need *a* valid answer).
+    """
+
+    def __init__(self, path, max_bytes=256 * 1024 * 1024, ttl=None, force=False):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.force = force
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+        self._total_bytes = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()[0]
+
+    def cacheable(self, request):
+        """Whether a request may be served from or stored in the cache"""
+        if request.get("stream"):
+            return False
+        # The API samples at temperature 1.0 when none (or None) is given
+        temperature = request.get("temperature")
+        return self.force or (temperature if temperature is not None else 1.0) <= 0
+
+    def get(self, key):
+        """Return the cached ChatCompletion for key, or None"""
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT body, size, expires, latency, tokens FROM responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                self.stats.misses += 1
+                return None
+            body, size, expires, latency, tokens = row
+            if expires is not None and expires <= now:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._total_bytes -= size
+                self.stats.expirations += 1
+                self.stats.misses += 1
+                return None
+            self._db.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self.stats.hits += 1
+            self.stats.saved_seconds += latency
+            self.stats.saved_tokens += tokens
+        from openai.types.chat import ChatCompletion
+        return ChatCompletion.model_validate_json(body)
+
+    def put(self, key, response, latency, ttl=None):
+        """Store a response, then evict least-recently-used entries over the size cap"""
+        body = response.model_dump_json().encode()
+        size = len(body)
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        ttl = self.ttl if ttl is None else ttl
+        expires = now + ttl if ttl else None
+        tokens = response.usage.total_tokens if response.usage else 0
+        with self._lock:
+            old = self._db.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            if old:
+                self._total_bytes -= old[0]
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, body, size, now, expires, now, latency, tokens),
+            )
+            self._total_bytes += size
+            self._evict()
+
+    def _evict(self):
+        while self._total_bytes > self.max_bytes:
+            row = self._db.execute(
+                "SELECT key, size FROM responses ORDER BY last_access LIMIT 1"
+            ).fetchone()
+            if row is None:
+                self._total_bytes = 0
+                return
+            self._db.execute("DELETE FROM responses WHERE key = ?", (row[0],))
+            self._total_bytes -= row[1]
+            self.stats.evictions += 1
+
+    def wrap(self, create, namespace=""):
+        """Wrap a chat.completions.create callable with this cache"""
+
+        def cached_create(**request):
+            if not self.cacheable(request):
+                self.stats.bypasses += 1
+                return create(**request)
+            key = cache_key(request, namespace)
+            response = self.get(key)
+            if response is not None:
+                return response
+            start = time.perf_counter()
+            response = create(**request)
+            self.put(key, response, time.perf_counter() - start)
+            return response
+
+        return cached_create
+
+    def report(self):
+        return self.stats.report()
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+            self._total_bytes = 0
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def cache_from_env():
+    """The process-wide cache configured by GPT_OSS_RESPONSE_CACHE, or None
+
+    GPT_OSS_RESPONSE_CACHE          path of the SQLite file (enables the cache)
+    GPT_OSS_RESPONSE_CACHE_MAX_MB   size cap before LRU eviction (default 256)
+    GPT_OSS_RESPONSE_CACHE_TTL      seconds each entry stays valid (default: forever)
+    GPT_OSS_RESPONSE_CACHE_FORCE    1 to also cache temperature > 0 requests
+    """
+    global _shared
+    path = os.getenv("GPT_OSS_RESPONSE_CACHE")
+    if not path:
+        return None
+    with _shared_lock:
+        if _shared is None:
+            ttl = os.getenv("GPT_OSS_RESPONSE_CACHE_TTL")
+            _shared = ResponseCache(
+                path,
+                max_bytes=int(float(os.getenv("GPT_OSS_RESPONSE_CACHE_MAX_MB", "256")) * 1024 * 1024),
+                ttl=float(ttl) if ttl else None,
+                force=os.getenv("GPT_OSS_RESPONSE_CACHE_FORCE", "").lower() in ("1", "true", "yes"),
+            )
+        return _shared
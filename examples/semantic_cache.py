@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+Semantic Cache for GPT OSS
+Answers near-duplicate prompts from a NumPy matrix of prompt embeddings
+"""
+
+import argparse
+import atexit
+import json
+import os
+import re
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+
+import numpy as np
+
+_WORD = re.compile(r"\w+")
+
+
+class HashingEmbedder:
+    """Dependency-free embedder: signed feature hashing of words, word pairs and character trigrams
+
+    Good at the near-duplicates that dominate real traffic (casing,
+    punctuation, a word added or dropped), blind to true paraphrases.
+    Word pairs keep some word order, so "100 USD to EUR" and "100 EUR to
+    USD" differ. Useful offline and for benchmarks; use
+    TransformersEmbedder otherwise.
+    """
+
+    name = "hashing"
+
+    def __init__(self, dim=384):
+        self.dim = dim
+
+    def _features(self, text):
+        words = _WORD.findall(text.lower())
+        yield from words
+        for first, second in zip(words, words[1:]):
+            yield f"{first} {second}"
+        for word in words:
+            padded = f" {word} "
+            for i in range(len(padded) - 2):
+                yield padded[i:i + 3]
+
+    def embed(self, texts):
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                h = zlib.crc32(feature.encode())
+                vectors[row, h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+        return _normalize(vectors)
+
+
+class TransformersEmbedder:
+    """Mean-pooled sentence embeddings from a local Hugging Face encoder"""
+
+    def __init__(self, model="sentence-transformers/all-MiniLM-L6-v2", device="cpu", batch_size=64):
+        import torch
+        from transformers import AutoModel, AutoTokenizer
+
+        self._torch = torch
+        self.name = model
+        self.tokenizer = AutoTokenizer.from_pretrained(model)
+        self.model = AutoModel.from_pretrained(model).to(device).eval()
+        self.device = device
+        self.batch_size = batch_size
+        self.dim = self.model.config.hidden_size
+
+    def embed(self, texts):
+        chunks = []
+        with self._torch.inference_mode():
+            for i in range(0, len(texts), self.batch_size):
+                batch = self.tokenizer(list(texts[i:i + self.batch_size]), padding=True,
+                                       truncation=True, return_tensors="pt").to(self.device)
+                hidden = self.model(**batch).last_hidden_state
+                mask = batch["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+                pooled = (hidden * mask).sum(1) / mask.sum(1).clamp(min=1e-9)
+                chunks.append(pooled.float().cpu().numpy())
+        return _normalize(np.concatenate(chunks))
+
+
+def _normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+@dataclass
+class SemanticStats:
+    """Hit rate and lookup cost of a semantic cache"""
+
+    hits: int = 0
+    misses: int = 0
+    bypasses: int = 0
+    evictions: int = 0
+    lookup_seconds: float = 0.0
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def report(self):
+        lookups = self.hits + self.misses
+        mean = self.lookup_seconds / lookups * 1000 if lookups else 0.0
+        return (f"[semantic cache: {self.hits} hits / {lookups} lookups ({self.hit_rate:.0%}), "
+                f"{mean:.2f}ms per lookup, {self.evictions} evictions, {self.bypasses} bypassed]")
+
+
+class SemanticCache:
+    """Cache of answers keyed by prompt embeddings
+
+    Embeddings live in one preallocated, L2-normalized float32 matrix, so
+    a lookup is a single matrix-vector product (a matrix-matrix product
+    for batches) followed by argmax over the rows in the request's
+    namespace (the model); an answer is returned when the best cosine
+    similarity reaches `threshold`. When full, the least recently used row
+    is overwritten. save()/load() keep the matrix in `.npy` form and
+    memory-map it back copy-on-write, so loading is instant and never
+    modifies the file.
+
+    A false hit serves the answer to a different question, so the default
+    threshold is strict: with HashingEmbedder, 0.95 gives no false hits on
+    LABELLED_PAIRS but only catches near-verbatim repeats (60% of the
+    true pairs are missed). Lowering it raises the hit rate at the cost of
+    wrong answers; with TransformersEmbedder, pick it from evaluate().
+    """
+
+    def __init__(self, embedder=None, capacity=10000, threshold=0.95):
+        self.embedder = embedder or HashingEmbedder()
+        self.capacity = capacity
+        self.threshold = threshold
+        self.vectors = np.zeros((capacity, self.embedder.dim), dtype=np.float32)
+        self.last_used = np.zeros(capacity, dtype=np.int64)
+        self.entries = [None] * capacity
+        self.namespaces = np.full(capacity, -1, dtype=np.int32)
+        self._namespace_ids = {}
+        self.size = 0
+        self.stats = SemanticStats()
+        self._clock = 0
+        self._lock = threading.Lock()
+
+    def _namespace_id(self, namespace):
+        return self._namespace_ids.setdefault(namespace, len(self._namespace_ids))
+
+    def _search(self, queries, namespace=None):
+        """Best (row, score) per query row, among rows in `namespace` if one is given"""
+        if self.size == 0 or (namespace is not None and namespace not in self._namespace_ids):
+            return np.full(len(queries), -1), np.full(len(queries), -1.0, dtype=np.float32)
+        scores = queries @ self.vectors[:self.size].T
+        if namespace is not None and len(self._namespace_ids) > 1:
+            # Other namespaces must not win the argmax and hide a match in this one
+            scores[:, self.namespaces[:self.size] != self._namespace_ids[namespace]] = -np.inf
+        rows = scores.argmax(axis=1)
+        return rows, scores[np.arange(len(queries)), rows]
+
+    def lookup_batch(self, prompts, namespace=""):
+        """[(answer or None, score)] for each prompt"""
+        start = time.perf_counter()
+        queries = self.embedder.embed(prompts)
+        results = []
+        with self._lock:
+            rows, scores = self._search(queries, namespace)
+            for row, score in zip(rows, scores):
+                entry = self.entries[row] if row >= 0 else None
+                if entry is not None and score >= self.threshold:
+                    self._clock += 1
+                    self.last_used[row] = self._clock
+                    self.stats.hits += 1
+                    results.append((entry[2], float(score)))
+                else:
+                    self.stats.misses += 1
+                    results.append((None, float(score)))
+            self.stats.lookup_seconds += time.perf_counter() - start
+        return results
+
+    def lookup(self, prompt, namespace=""):
+        return self.lookup_batch([prompt], namespace)[0]
+
+    def add(self, prompt, answer, namespace="", vector=None):
+        if vector is None:
+            vector = self.embedder.embed([prompt])[0]
+        with self._lock:
+            if self.size < self.capacity:
+                row = self.size
+                self.size += 1
+            else:
+                row = int(self.last_used.argmin())
+                self.stats.evictions += 1
+            self._clock += 1
+            self.vectors[row] = vector
+            self.last_used[row] = self._clock
+            self.entries[row] = (namespace, prompt, answer)
+            self.namespaces[row] = self._namespace_id(namespace)
+        return row
+
+    def save(self, path):
+        """Write `path`.npy (the full matrix) and `path`.json (entries and LRU state)
+
+        Both are written to temporary files and renamed into place, so saving
+        over the files this cache was loaded (memory-mapped) from is safe and
+        a crash never leaves a matrix and entries that disagree.
+        """
+        with self._lock:
+            with open(f"{path}.npy.tmp", "wb") as f:
+                np.save(f, self.vectors)
+            with open(f"{path}.json.tmp", "w") as f:
+                json.dump({
+                    "threshold": self.threshold,
+                    "embedder": getattr(self.embedder, "name", ""),
+                    "size": self.size,
+                    "clock": self._clock,
+                    "last_used": self.last_used[:self.size].tolist(),
+                    "entries": self.entries[:self.size],
+                }, f)
+            os.replace(f"{path}.npy.tmp", f"{path}.npy")
+            os.replace(f"{path}.json.tmp", f"{path}.json")
+
+    @classmethod
+    def load(cls, path, embedder=None):
+        """Open a saved cache with its matrix memory-mapped copy-on-write"""
+        with open(f"{path}.json") as f:
+            state = json.load(f)
+        vectors = np.load(f"{path}.npy", mmap_mode="c")
+        cache = cls.__new__(cls)
+        cache.embedder = embedder or HashingEmbedder(vectors.shape[1])
+        if cache.embedder.dim != vectors.shape[1]:
+            raise ValueError(f"embedder dim {cache.embedder.dim} != saved dim {vectors.shape[1]}")
+        cache.capacity = vectors.shape[0]
+        cache.threshold = state["threshold"]
+        cache.vectors = vectors
+        cache.size = state["size"]
+        cache.last_used = np.zeros(cache.capacity, dtype=np.int64)
+        cache.last_used[:cache.size] = state["last_used"]
+        cache.entries = [tuple(entry) for entry in state["entries"]] + [None] * (cache.capacity - cache.size)
+        cache.namespaces = np.full(cache.capacity, -1, dtype=np.int32)
+        cache._namespace_ids = {}
+        for row, entry in enumerate(cache.entries[:cache.size]):
+            cache.namespaces[row] = cache._namespace_id(entry[0])
+        cache.stats = SemanticStats()
+        cache._clock = state["clock"]
+        cache._lock = threading.Lock()
+        return cache
+
+    def wrap(self, create, namespace=""):
+        """Wrap a chat.completions.create callable with this cache
+
+        The prompt is the request's user and system text, looked up among
+        entries for the same `namespace` (e.g. the base URL) and model;
+        streaming and tool-calling requests go straight through.
+        """
+        from openai.types.chat import ChatCompletion
+
+        def cached_create(**request):
+            if request.get("stream") or request.get("tools") or request.get("functions"):
+                self.stats.bypasses += 1
+                return create(**request)
+            prompt = "\n".join(message.get("content") or "" for message in request.get("messages", ())
+                               if isinstance(message, dict))
+            model = f"{namespace}|{request.get('model', '')}"
+            answer, _ = self.lookup(prompt, model)
+            if answer is not None:
+                return ChatCompletion.model_validate_json(answer)
+            response = create(**request)
+            self.add(prompt, response.model_dump_json(), model)
+            return response
+
+        return cached_create
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def semantic_cache_from_env():
+    """The process-wide semantic cache configured by GPT_OSS_SEMANTIC_CACHE, or None
+
+    GPT_OSS_SEMANTIC_CACHE            path prefix of the saved cache (enables it; saved at exit)
+    GPT_OSS_SEMANTIC_CACHE_THRESHOLD  cosine similarity needed for a hit (default 0.95)
+    GPT_OSS_SEMANTIC_CACHE_SIZE       entries kept before LRU eviction (default 10000)
+    """
+    global _shared
+    path = os.getenv("GPT_OSS_SEMANTIC_CACHE")
+    if not path:
+        return None
+    with _shared_lock:
+        if _shared is None:
+            threshold = os.getenv("GPT_OSS_SEMANTIC_CACHE_THRESHOLD")
+            if os.path.exists(f"{path}.npy") and os.path.exists(f"{path}.json"):
+                _shared = SemanticCache.load(path)
+            else:
+                _shared = SemanticCache(capacity=int(os.getenv("GPT_OSS_SEMANTIC_CACHE_SIZE", "10000")))
+            if threshold:
+                _shared.threshold = float(threshold)
+            atexit.register(_shared.save, path)
+        return _shared
+
+
+# (prompt, prompt, same question?) for measuring false and missed hits
+LABELLED_PAIRS = [
+    ("Explain quantum computing in simple terms.", "explain quantum computing in simple terms", True),
+    ("Explain quantum computing in simple terms.", "Explain quantum computing in simple terms, please.", True),
+    ("Explain quantum computing in simple terms.", "Can you explain quantum computing in simple terms?", True),
+    ("What are the three laws of robotics?", "what are the 3 laws of robotics", True),
+    ("What are the three laws of robotics?", "What are the three laws of robotics??", True),
+    ("What is machine learning?", "What is machine learning", True),
+    ("What is machine learning?", "Whats machine learning?", True),
+    ("Hello! How are you today?", "Hello, how are you today?", True),
+    ("What is the capital of France?", "what's the capital of France?", True),
+    ("What is artificial intelligence?", "What is artificial intelligence exactly?", True),
+    ("Explain quantum computing in simple terms.", "Explain quantum physics in simple terms.", False),
+    ("Explain quantum computing in simple terms.", "Explain classical computing in simple terms.", False),
+    ("What are the three laws of robotics?", "What are the three laws of thermodynamics?", False),
+    ("What is machine learning?", "What is deep learning?", False),
+    ("What is the capital of France?", "What is the capital of Germany?", False),
+    ("What is the weather like in Tokyo?", "What is the weather like in Paris?", False),
+    ("What is artificial intelligence?", "What is artificial sweetener?", False),
+    ("Convert 100 USD to EUR", "Convert 100 EUR to USD", False),
+    ("Hello! How are you today?", "Goodbye! How was your day?", False),
+    ("What time is it in London?", "What time is it in New York?", False),
+]
+
+
+def evaluate(embedder, threshold, pairs=LABELLED_PAIRS):
+    """False-hit and missed-hit rates of `threshold` on labelled prompt pairs"""
+    left = embedder.embed([a for a, _, _ in pairs])
+    right = embedder.embed([b for _, b, _ in pairs])
+    scores = (left * right).sum(axis=1)
+    same = np.array([label for _, _, label in pairs])
+    hits = scores >= threshold
+    false_hits = int((hits & ~same).sum())
+    missed = int((~hits & same).sum())
+    return false_hits / max(1, (~same).sum()), missed / max(1, same.sum())
+
+
+def benchmark(sizes=(1000, 100000, 1000000), dim=384, queries=32):
+    """Lookup latency by cache size, plus false/missed hit rates by threshold"""
+    rng = np.random.default_rng(0)
+    embedder = HashingEmbedder(dim)
+    print(f"=== Lookup latency (dim {dim}, float32) ===")
+    print(f"{'entries':>10} {'single':>10} {'batch of ' + str(queries):>14} {'per query':>10} {'matrix':>9}")
+    for size in sizes:
+        cache = SemanticCache(embedder, capacity=size)
+        cache.vectors[:] = _normalize(rng.standard_normal((size, dim), dtype=np.float32))
+        cache.size = size
+        cache.entries = [("", "", "")] * size
+        cache.namespaces[:] = cache._namespace_id("")
+        batch = _normalize(rng.standard_normal((queries, dim), dtype=np.float32))
+
+        start = time.perf_counter()
+        for query in batch[:8]:
+            cache._search(query[None, :], "")
+        single = (time.perf_counter() - start) / 8
+        start = time.perf_counter()
+        cache._search(batch, "")
+        batched = time.perf_counter() - start
+        print(f"{size:>10,} {single * 1000:>8.2f}ms {batched * 1000:>12.2f}ms "
+              f"{batched / queries * 1000:>8.2f}ms {cache.vectors.nbytes / 2**20:>7.0f}MB")
+        del cache
+
+    print(f"\n=== Labelled pairs ({embedder.name} embedder) ===")
+    print(f"{'threshold':>9} {'false hits':>11} {'missed':>8}")
+    for threshold in (0.6, 0.7, 0.8, 0.85, 0.9, 0.95):
+        false_hit_rate, missed_rate = evaluate(embedder, threshold)
+        print(f"{threshold:>9.2f} {false_hit_rate:>10.0%} {missed_rate:>8.0%}")
+
+    cache = SemanticCache(embedder, capacity=100)
+    for question, _, _ in LABELLED_PAIRS:
+        if cache.lookup(question)[0] is None:
+            cache.add(question, question)
+    for _, variant, _ in LABELLED_PAIRS:
+        if cache.lookup(variant)[0] is None:
+            cache.add(variant, variant)
+    print(f"\nreplaying the pairs at threshold {cache.threshold}: {cache.stats.report()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Semantic cache lookup and accuracy benchmark")
+    parser.add_argument("--sizes", default="1000,100000,1000000",
+                        help="comma-separated cache sizes to time")
+    parser.add_argument("--dim", type=int, default=384)
+    args = parser.parse_args()
+
+    benchmark(tuple(int(size) for size in args.sizes.split(",")), args.dim)
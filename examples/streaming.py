@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Streaming Helper for GPT OSS
+Prints tokens as they arrive and measures time-to-first-token and throughput
+"""
+
+import os
+import statistics
+import sys
+import time
+from dataclasses import dataclass, field
+
+_streaming = os.getenv("GPT_OSS_STREAM", "").lower() in ("1", "true", "yes")
+
+
+def add_stream_flag(parser):
+    """Add the shared --stream flag to an example's argument parser"""
+    parser.add_argument("--stream", action="store_true",
+                        help="stream tokens as they arrive and report TTFT/tokens per second "
+                             "(or set GPT_OSS_STREAM=1)")
+
+
+def set_streaming(enabled):
+    """Turn streaming on or off for every print_completion() call"""
+    global _streaming
+    _streaming = bool(enabled)
+
+
+def streaming_enabled():
+    return _streaming
+
+
+@dataclass
+class StreamStats:
+    """Timing of one streamed completion"""
+
+    ttft: float = None
+    total_time: float = 0.0
+    tokens: int = 0
+    inter_token: list = field(default_factory=list)
+
+    @property
+    def tokens_per_sec(self):
+        if not self.total_time:
+            return 0.0
+        return self.tokens / self.total_time
+
+    @property
+    def mean_inter_token(self):
+        return statistics.mean(self.inter_token) if self.inter_token else 0.0
+
+    def report(self):
+        ttft = f"{self.ttft * 1000:.0f}ms" if self.ttft is not None else "n/a"
+        return (
+            f"[TTFT {ttft} | ITL {self.mean_inter_token * 1000:.1f}ms | "
+            f"{self.tokens} tokens in {self.total_time:.2f}s = {self.tokens_per_sec:.1f} tok/s]"
+        )
+
+
+def stream_completion(client, out=sys.stdout, on_token=None, **request):
+    """Stream a chat completion, writing content to `out` as it arrives
+
+    Returns (text, StreamStats). Token count comes from the final usage
+    chunk when the server sends one, otherwise from the number of content
+    deltas (one per token on OpenAI, vLLM and Ollama).
+    """
+    request.setdefault("stream_options", {"include_usage": True})
+    stats = StreamStats()
+    parts = []
+    deltas = 0
+    usage = None
+
+    start = last = time.perf_counter()
+    for chunk in client.chat.completions.create(stream=True, **request):
+        if getattr(chunk, "usage", None):
+            usage = chunk.usage
+        if not chunk.choices:
+            continue
+        text = chunk.choices[0].delta.content
+        if not text:
+            continue
+        now = time.perf_counter()
+        if stats.ttft is None:
+            stats.ttft = now - start
+        else:
+            stats.inter_token.append(now - last)
+        last = now
+        deltas += 1
+        parts.append(text)
+        if on_token is not None:
+            on_token(text)
+        if out is not None:
+            out.write(text)
+            out.flush()
+
+    stats.total_time = time.perf_counter() - start
+    stats.tokens = usage.completion_tokens if usage else deltas
+    return "".join(parts), stats
+
+
+def print_completion(client, prefix="", **request):
+    """Print a completion's content, streamed when streaming is enabled
+
+    Every chat example goes through this helper so the --stream flag
+    behaves the same everywhere. Returns the full content text.
+    """
+    print(prefix, end="", flush=True)
+    if not _streaming:
+        response = client.chat.completions.create(**request)
+        text = response.choices[0].message.content
+        print(text)
+        return text
+
+    text, stats = stream_completion(client, **request)
+    print()
+    print(stats.report())
+    return text
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Streaming Function Arguments for GPT OSS
+Parses tool-call argument deltas incrementally so tools can start before generation ends
+"""
+
+import json
+import time
+
+_WHITESPACE = " \t\r\n"
+
+
+class IncrementalArgumentParser:
+    """Single-pass parser for a streamed JSON arguments object
+
+    Every character is examined exactly once, and only the characters of
+    the top-level value currently being read are kept, so the work is
+    linear in the argument length no matter how the stream is chunked.
+    As soon as a top-level field's value is closed it is decoded and
+    reported through `on_field`; once all `required` fields are present
+    `on_ready` fires, once, with the fields seen so far.
+    """
+
+    def __init__(self, required=(), on_field=None, on_ready=None):
+        self.required = set(required)
+        self.on_field = on_field
+        self.on_ready = on_ready
+        self.fields = {}
+        self.ready = False
+        self.done = False
+        self._chunks = []
+        self._state = "start"
+        self._key = []
+        self._value = []
+        self._current_key = None
+        self._escape = False
+        self._in_string = False
+        self._nesting = 0
+        if not self.required:
+            self._fire_ready()
+
+    @property
+    def text(self):
+        """Everything fed so far"""
+        return "".join(self._chunks)
+
+    def feed(self, chunk):
+        """Consume the next piece of the arguments string"""
+        self._chunks.append(chunk)
+        for char in chunk:
+            self._step(char)
+
+    def _step(self, char):
+        state = self._state
+        if state == "value":
+            self._value_char(char)
+        elif state == "key":
+            if self._escape:
+                self._escape = False
+                self._key.append(char)
+            elif char == "\\":
+                self._escape = True
+                self._key.append(char)
+            elif char == '"':
+                self._current_key = json.loads('"' + "".join(self._key) + '"')
+                self._key = []
+                self._state = "colon"
+            else:
+                self._key.append(char)
+        elif char in _WHITESPACE:
+            return
+        elif state == "start":
+            if char == "{":
+                self._state = "key_or_end"
+        elif state == "key_or_end":
+            if char == '"':
+                self._state = "key"
+            elif char == "}":
+                self._finish()
+        elif state == "colon":
+            if char == ":":
+                self._state = "value_start"
+        elif state == "value_start":
+            self._state = "value"
+            self._in_string = char == '"'
+            self._nesting = 1 if char in "{[" else 0
+            self._value.append(char)
+        elif state == "after_value":
+            if char == ",":
+                self._state = "key_or_end"
+            elif char == "}":
+                self._finish()
+
+    def _value_char(self, char):
+        if self._in_string:
+            self._value.append(char)
+            if self._escape:
+                self._escape = False
+            elif char == "\\":
+                self._escape = True
+            elif char == '"':
+                self._in_string = False
+                if self._nesting == 0:
+                    self._complete_value()
+            return
+        if self._nesting == 0:
+            # Bare literal (number, true, false, null): ends at the next delimiter
+            if char in _WHITESPACE or char in ",}":
+                self._complete_value()
+                self._step(char)
+            else:
+                self._value.append(char)
+            return
+        self._value.append(char)
+        if char == '"':
+            self._in_string = True
+        elif char in "{[":
+            self._nesting += 1
+        elif char in "}]":
+            self._nesting -= 1
+            if self._nesting == 0:
+                self._complete_value()
+
+    def _complete_value(self):
+        value = json.loads("".join(self._value))
+        self._value = []
+        self._state = "after_value"
+        self.fields[self._current_key] = value
+        if self.on_field is not None:
+            self.on_field(self._current_key, value)
+        if not self.ready and self.required.issubset(self.fields):
+            self._fire_ready()
+
+    def _fire_ready(self):
+        self.ready = True
+        if self.on_ready is not None:
+            self.on_ready(dict(self.fields))
+
+    def _finish(self):
+        self.done = True
+        self._state = "done"
+
+
+def _required_fields(tools, functions):
+    schemas = {}
+    for tool in tools or []:
+        function = tool.get("function", {})
+        schemas[function.get("name")] = function.get("parameters", {})
+    for function in functions or []:
+        schemas[function.get("name")] = function.get("parameters", {})
+    return {name: (schema or {}).get("required", []) for name, schema in schemas.items()}
+
+
+def stream_tool_calls(client, on_ready, **request):
+    """Stream a completion and parse every tool call's arguments as they arrive
+
+    `on_ready(name, fields, elapsed)` is called for each call as soon as
+    the required fields from its schema are complete, typically well
+    before the model has finished generating. Works with both `tools`
+    (several calls, by index) and legacy `functions`. Returns a list of
+    (name, arguments) for all calls once the stream ends.
+    """
+    required = _required_fields(request.get("tools"), request.get("functions"))
+    parsers = {}
+    names = {}
+    start = time.perf_counter()
+
+    def parser_for(index, name):
+        if index not in parsers:
+            names[index] = name
+            parsers[index] = IncrementalArgumentParser(
+                required=required.get(name, ()),
+                on_ready=lambda fields: on_ready(name, fields, time.perf_counter() - start),
+            )
+        return parsers[index]
+
+    for chunk in client.chat.completions.create(stream=True, **request):
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta
+        for call in delta.tool_calls or []:
+            function = call.function
+            parser = parser_for(call.index, function.name if function else None)
+            if function and function.arguments:
+                parser.feed(function.arguments)
+        function_call = getattr(delta, "function_call", None)
+        if function_call:
+            parser = parser_for(0, function_call.name)
+            if function_call.arguments:
+                parser.feed(function_call.arguments)
+
+    return [(names[index], parsers[index].fields) for index in sorted(parsers)]
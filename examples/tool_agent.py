@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Tool Agent for GPT OSS
+Agent loop over the `tools` API that runs parallel tool calls concurrently
+"""
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _shared_executor(max_workers=8):
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tool")
+        return _executor
+
+
+@dataclass
+class ToolResult:
+    """Outcome of one tool call"""
+
+    call_id: str
+    name: str
+    arguments: dict
+    result: object = None
+    error: str = None
+    duration: float = 0.0
+
+
+@dataclass
+class AgentRun:
+    """Transcript and timing of one agent loop"""
+
+    response: object = None
+    messages: list = field(default_factory=list)
+    round_trips: int = 0
+    results: list = field(default_factory=list)
+    tool_wall_time: float = 0.0
+
+    @property
+    def content(self):
+        return self.response.choices[0].message.content if self.response else None
+
+    @property
+    def tool_time(self):
+        """Total handler time, i.e. the wall time if calls had run one by one"""
+        return sum(result.duration for result in self.results)
+
+    @property
+    def round_trips_saved(self):
+        """Requests avoided versus the legacy one-function_call-per-turn API"""
+        sequential_round_trips = len(self.results) + 1
+        return max(0, sequential_round_trips - self.round_trips)
+
+    def report(self):
+        return (
+            f"[{len(self.results)} tool calls in {self.round_trips} round trips "
+            f"({self.round_trips_saved} saved) | tools {self.tool_wall_time * 1000:.0f}ms wall "
+            f"vs {self.tool_time * 1000:.0f}ms sequential]"
+        )
+
+
+def _run_handler(handlers, call):
+    name = call.function.name
+    start = time.perf_counter()
+    try:
+        arguments = json.loads(call.function.arguments or "{}")
+    except json.JSONDecodeError as e:
+        return ToolResult(call.id, name, {}, error=f"invalid JSON arguments: {e}")
+    handler = handlers.get(name)
+    if handler is None:
+        return ToolResult(call.id, name, arguments, error=f"unknown tool {name!r}")
+    try:
+        result = handler(**arguments)
+        return ToolResult(call.id, name, arguments, result=result,
+                          duration=time.perf_counter() - start)
+    except Exception as e:
+        return ToolResult(call.id, name, arguments, error=str(e),
+                          duration=time.perf_counter() - start)
+
+
+def _run_in_order(handlers, calls):
+    return [_run_handler(handlers, call) for call in calls]
+
+
+def execute_tool_calls(tool_calls, handlers, executor=None, sequential=()):
+    """Run every tool call of one assistant turn concurrently, preserving order
+
+    Calls to tools named in `sequential` (stateful tools, such as a browser
+    whose find() reads the page open() left) run one after another in the
+    order the model made them, as a single task beside the others.
+    """
+    executor = executor or _shared_executor()
+    ordered = [call for call in tool_calls if call.function.name in sequential]
+    futures = {id(call): executor.submit(_run_handler, handlers, call)
+               for call in tool_calls if call.function.name not in sequential}
+    chain = executor.submit(_run_in_order, handlers, ordered) if ordered else None
+    in_order = iter(chain.result() if chain else ())
+    return [next(in_order) if call.function.name in sequential else futures[id(call)].result()
+            for call in tool_calls]
+
+
+def run_tool_agent(client, messages, tools, handlers, max_rounds=5, executor=None, sequential=(),
+                   **request):
+    """Chat with tools until the model answers without calling any
+
+    All tool calls the model makes in one assistant turn are executed at
+    once and their results go back together in a single follow-up request.
+    `handlers` maps tool name to a callable taking the arguments as kwargs;
+    calls to the tools named in `sequential` run in order instead.
+    """
+    run = AgentRun(messages=list(messages))
+    for _ in range(max_rounds):
+        response = client.chat.completions.create(
+            messages=run.messages, tools=tools, tool_choice="auto", **request)
+        run.round_trips += 1
+        run.response = response
+        message = response.choices[0].message
+        if not message.tool_calls:
+            return run
+
+        run.messages.append({
+            "role": "assistant",
+            "content": message.content,
+            "tool_calls": [
+                {
+                    "id": call.id,
+                    "type": "function",
+                    "function": {"name": call.function.name, "arguments": call.function.arguments},
+                }
+                for call in message.tool_calls
+            ],
+        })
+        start = time.perf_counter()
+        results = execute_tool_calls(message.tool_calls, handlers, executor, sequential)
+        run.tool_wall_time += time.perf_counter() - start
+        run.results.extend(results)
+        for result in results:
+            payload = {"error": result.error} if result.error else result.result
+            run.messages.append({
+                "role": "tool",
+                "tool_call_id": result.call_id,
+                "content": json.dumps(payload, default=str),
+            })
+    return run
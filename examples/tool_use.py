@@ -4,14 +4,19 @@ Tool Use Example for GPT OSS
 Demonstrates how to use tools like browser, python, and file operations
 """
 
+import argparse
 import os
-from openai import OpenAI
+from browser_tool import BROWSER_TOOLS, BrowserTool
+from client_pool import get_client, print_env_report
+from python_tool import PYTHON_TOOL, PythonToolPool
+from streaming import add_stream_flag, print_completion, set_streaming
+from tool_agent import run_tool_agent
 
 def browser_tool_example():
     """Example of browser tool usage"""
     print("=== Browser Tool Example ===")
     
-    client = OpenAI()
+    client = get_client()
     
     # System message with browser tool access
     browser_system_message = """
@@ -23,25 +28,38 @@ def browser_tool_example():
     Use the browser tool when you need current information or to verify facts.
     """
     
-    response = client.chat.completions.create(
-        model="gpt-oss-120b",
-        messages=[
-            {"role": "system", "content": browser_system_message},
-            {"role": "user", "content": "What are the latest AI developments in 2024?"}
-        ],
-        max_tokens=300,
-        temperature=0.7
-    )
-    
     print("Question: What are the latest AI developments in 2024?")
-    print(f"Response: {response.choices[0].message.content}")
-    print("\nNote: This is a conceptual example. Actual browser tool implementation requires additional setup.")
+    
+    # Pooled HTTP session, revalidating disk cache and per-page find index
+    browser = BrowserTool(cache_dir=".browser_cache")
+    try:
+        run = run_tool_agent(
+            client,
+            messages=[
+                {"role": "system", "content": browser_system_message},
+                {"role": "user", "content": "What are the latest AI developments in 2024?"}
+            ],
+            tools=BROWSER_TOOLS,
+            handlers=browser.handlers,
+            # search/open/find share the open page, so they run in the order they were called
+            sequential=browser.handlers,
+            model="gpt-oss-120b",
+            max_tokens=300,
+            temperature=0.7
+        )
+        
+        for result in run.results:
+            print(f"browser.{result.name}({result.arguments})" + (f" failed: {result.error}" if result.error else ""))
+        print(f"Response: {run.content}")
+        print(f"Browser cache: {browser.stats}")
+    finally:
+        browser.close()
 
 def python_tool_example():
     """Example of Python tool usage"""
     print("\n=== Python Tool Example ===")
     
-    client = OpenAI()
+    client = get_client()
     
     # System message with Python tool access
     python_system_message = """
@@ -54,25 +72,35 @@ def python_tool_example():
     Use the Python tool when you need to perform calculations or data processing.
     """
     
-    response = client.chat.completions.create(
-        model="gpt-oss-20b",
-        messages=[
-            {"role": "system", "content": python_system_message},
-            {"role": "user", "content": "Calculate the factorial of 10 and show the steps."}
-        ],
-        max_tokens=250,
-        temperature=0.3
-    )
-    
     print("Question: Calculate the factorial of 10 and show the steps.")
-    print(f"Response: {response.choices[0].message.content}")
-    print("\nNote: This is a conceptual example. Actual Python tool implementation requires additional setup.")
+    
+    # Warm, restricted interpreters: each tool call costs milliseconds, not a process spawn
+    with PythonToolPool(workers=2, timeout=5.0, cpu_seconds=5, memory_mb=512) as pool:
+        run = run_tool_agent(
+            client,
+            messages=[
+                {"role": "system", "content": python_system_message},
+                {"role": "user", "content": "Calculate the factorial of 10 and show the steps."}
+            ],
+            tools=[PYTHON_TOOL],
+            handlers={"python": pool.handler},
+            model="gpt-oss-20b",
+            max_tokens=250,
+            temperature=0.3
+        )
+        
+        for result in run.results:
+            print(f"Executed:\n{result.arguments.get('code')}")
+            print(f"Output: {result.error or result.result}")
+        print(f"Response: {run.content}")
+        print(f"Python tool metrics: {pool.metrics()}")
+    print("\nNote: python_tool.py restricts the worker processes but is not a secure sandbox; isolate it further before running untrusted code.")
 
 def file_operations_example():
     """Example of file operations with apply_patch tool"""
     print("\n=== File Operations Example ===")
     
-    client = OpenAI()
+    client = get_client()
     
     # System message with file operations
     file_system_message = """
@@ -84,7 +112,10 @@ def file_operations_example():
     Use file operations when you need to work with local files.
     """
     
-    response = client.chat.completions.create(
+    print("Question: Create a simple Python script that prints 'Hello, World!'")
+    print_completion(
+        client,
+        prefix="Response: ",
         model="gpt-oss-120b",
         messages=[
             {"role": "system", "content": file_system_message},
@@ -93,16 +124,13 @@ def file_operations_example():
         max_tokens=200,
         temperature=0.5
     )
-    
-    print("Question: Create a simple Python script that prints 'Hello, World!'")
-    print(f"Response: {response.choices[0].message.content}")
     print("\nNote: This is a conceptual example. Actual file operations require additional setup.")
 
 def combined_tools_example():
     """Example combining multiple tools"""
     print("\n=== Combined Tools Example ===")
     
-    client = OpenAI()
+    client = get_client()
     
     combined_system_message = """
     You have access to multiple tools:
@@ -113,7 +141,10 @@ def combined_tools_example():
     Use the appropriate tool based on the task requirements.
     """
     
-    response = client.chat.completions.create(
+    print("Question: Research the current stock price of Apple, calculate the percentage change from yesterday, and save the results to a file.")
+    print_completion(
+        client,
+        prefix="Response: ",
         model="gpt-oss-120b",
         messages=[
             {"role": "system", "content": combined_system_message},
@@ -122,9 +153,6 @@ def combined_tools_example():
         max_tokens=350,
         temperature=0.4
     )
-    
-    print("Question: Research the current stock price of Apple, calculate the percentage change from yesterday, and save the results to a file.")
-    print(f"Response: {response.choices[0].message.content}")
     print("\nNote: This is a conceptual example. Actual tool implementation requires additional setup.")
 
 def tool_implementation_notes():
@@ -133,15 +161,17 @@ def tool_implementation_notes():
     print("""
     To implement these tools in practice, you would need:
     
-    1. Browser Tool:
-       - Web scraping capabilities
-       - Search API integration
-       - Content parsing
+    1. Browser Tool (implemented in browser_tool.py):
+       - Pooled HTTP session and search URL (BROWSER_SEARCH_URL)
+       - Disk cache with ETag/Last-Modified revalidation
+       - Content parsing with a per-page find index
     
-    2. Python Tool:
-       - Secure code execution environment
-       - Sandboxed Python interpreter
+    2. Python Tool (implemented in python_tool.py):
+       - Pool of warm, pre-imported worker processes
+       - Per-call CPU, memory and wall-clock limits
+       - Empty environment and working directory, no open(), allowlisted imports
        - Result capture and formatting
+       - Not a secure sandbox on its own: run it in a container or VM for untrusted input
     
     3. File Operations:
        - File system permissions
@@ -153,6 +183,12 @@ def tool_implementation_notes():
     """)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="GPT OSS Tool Use Examples")
+    add_stream_flag(parser)
+    args = parser.parse_args()
+    if args.stream:
+        set_streaming(True)
+    
     if not os.getenv("OPENAI_API_KEY"):
         print("Error: Please set your OPENAI_API_KEY environment variable")
         exit(1)
@@ -168,4 +204,6 @@ if __name__ == "__main__":
         tool_implementation_notes()
     except Exception as e:
         print(f"Error: {e}")
-        print("Make sure you have access to the gpt-oss models and your API key is valid.") 
\ No newline at end of file
+        print("Make sure you have access to the gpt-oss models and your API key is valid.") 
+    finally:
+        print_env_report()
\ No newline at end of file